@@ -0,0 +1,74 @@
+import time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+
+
+# ============================================================
+# Process-per-job runner with hard wall-clock limits
+# ============================================================
+
+def _worker(conn, func, args):
+    try:
+        conn.send((func(*args), None))
+    except Exception as e:
+        conn.send((None, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def run_jobs(jobs, workers, time_limit):
+    """
+    Run jobs [(key, func, args), ...] with at most `workers` processes
+    at a time, and yield (key, result, error) as each job finishes.
+
+    Each job runs in its own process, so a job exceeding `time_limit`
+    seconds is killed (error == "timeout") without affecting the others.
+    `func` must be importable by the workers (module-level function).
+    If `jobs` is a deque, jobs the caller appends to it while iterating
+    (e.g. follow-ups of a finished job) are run too.
+    """
+    ctx = mp.get_context("spawn")
+    queue = jobs if isinstance(jobs, deque) else deque(jobs)
+    running = {}   # conn -> (key, process, deadline)
+
+    while queue or running:
+
+        # --------------------------------------------------
+        # Fill free worker slots
+        # --------------------------------------------------
+        while queue and len(running) < workers:
+            key, func, args = queue.popleft()
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_worker, args=(send_conn, func, args))
+            proc.start()
+            send_conn.close()
+            running[recv_conn] = (key, proc, time.time() + time_limit)
+
+        # --------------------------------------------------
+        # Wait for a result or the next deadline
+        # --------------------------------------------------
+        next_deadline = min(d for _, _, d in running.values())
+        ready = wait(list(running), timeout=max(0.0, next_deadline - time.time()))
+
+        for conn in ready:
+            key, proc, _ = running.pop(conn)
+            try:
+                result, error = conn.recv()
+            except EOFError:
+                result, error = None, f"worker exited with code {proc.exitcode}"
+            conn.close()
+            proc.join()
+            yield key, result, error
+
+        # --------------------------------------------------
+        # Kill jobs over their wall-clock limit
+        # --------------------------------------------------
+        now = time.time()
+        for conn, (key, proc, deadline) in list(running.items()):
+            if now >= deadline:
+                proc.kill()
+                proc.join()
+                conn.close()
+                del running[conn]
+                yield key, None, "timeout"
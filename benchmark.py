@@ -0,0 +1,217 @@
+import os
+import io
+import sys
+import json
+import time
+import platform
+import statistics
+import contextlib
+
+import heuristic
+import instrument
+from instance_io import load_edge_array
+from instance_index import InstanceIndex
+from main import extract_n_from_filename
+
+
+# ============================================================
+# Benchmark configuration
+# ============================================================
+#
+#   python benchmark.py run   [baseline.json]   run and save a baseline
+#   python benchmark.py check [baseline.json]   run and compare, exit 1
+#                                               on regression
+
+INSTANCE_FOLDER = "Spd_Inst_Rid_Final2"
+BASELINE_FILE = "benchmark_baseline.json"
+
+INSTANCES_PER_SIZE = 1      # representative instances per n-class
+REPEATS = 3                 # stage times are medians over the repeats
+
+MAX_ITER = 10
+LOCAL_SEARCH_TIME = 0.5
+MILP_BACKEND = None
+REDUCE = True
+
+# A stage regresses if it is TOLERANCE slower than the baseline
+# AND at least MIN_DELTA seconds slower (timer noise on tiny stages)
+TOLERANCE = 0.25
+MIN_DELTA = 0.02
+
+
+# ============================================================
+# Stages
+# ============================================================
+#
+# Stage times come from the instrument timers of the solver code
+# (see instrument.py), plus loading and indexing timed here.
+
+STAGES = [
+    "load", "index", "reduce", "lower_bound", "model_build", "optimize",
+    "reconnect", "break_cycles", "evaluation", "local_search", "total",
+]
+
+
+# ============================================================
+# Runs
+# ============================================================
+
+def representative_instances():
+    """
+    The first INSTANCES_PER_SIZE instances of every n-class.
+    """
+    by_size = {}
+    for fname in sorted(os.listdir(INSTANCE_FOLDER)):
+        n = extract_n_from_filename(fname)
+        if fname.endswith(".txt") and n is not None:
+            by_size.setdefault(n, []).append(fname)
+
+    return [
+        fname
+        for n in sorted(by_size)
+        for fname in by_size[n][:INSTANCES_PER_SIZE]
+    ]
+
+
+def run_once(path):
+    """
+    One heuristic run. Returns ({stage: seconds}, n, m, branch_vertices).
+    """
+    times = {stage: 0.0 for stage in STAGES}
+    start = time.perf_counter()
+
+    t = time.perf_counter()
+    n, edges = load_edge_array(path)
+    times["load"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    index = InstanceIndex.from_arrays(n, edges)
+    VG, EG = index.VG, index.EG
+    times["index"] = time.perf_counter() - t
+
+    # MILP backend logs are written to stdout
+    with instrument.recording() as rec, contextlib.redirect_stdout(io.StringIO()):
+        _, branch_vertices = heuristic.heuristic_cycle_basis(
+            VG, EG, max_iter=MAX_ITER, index=index,
+            local_search_time=LOCAL_SEARCH_TIME,
+            backend=MILP_BACKEND, reduce=REDUCE
+        )
+
+    for stage, seconds in rec.stages.items():
+        if stage in times:
+            times[stage] = seconds
+
+    times["total"] = time.perf_counter() - start
+    return times, len(VG), len(EG), branch_vertices
+
+
+def run_benchmark():
+    results = {}
+
+    for fname in representative_instances():
+        # Peak memory of this instance's runs only (None if it cannot be reset)
+        peak_reset = instrument.reset_peak_rss()
+        runs = [run_once(os.path.join(INSTANCE_FOLDER, fname)) for _ in range(REPEATS)]
+        _, n, m, branch_vertices = runs[0]
+
+        results[fname] = {
+            "n": n,
+            "m": m,
+            "branch_vertices": min(run[3] for run in runs),
+            "peak_rss_mb": instrument.peak_rss_mb() if peak_reset else None,
+            "stages": {
+                stage: statistics.median(run[0][stage] for run in runs)
+                for stage in STAGES
+            },
+        }
+        print(f"[BENCH] {fname}: {results[fname]['stages']['total']:.3f} s")
+
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "repeats": REPEATS,
+            "max_iter": MAX_ITER,
+            "local_search_time": LOCAL_SEARCH_TIME,
+            "milp_backend": MILP_BACKEND,
+            "reduce": REDUCE,
+        },
+        "instances": results,
+    }
+
+
+# ============================================================
+# Regression check
+# ============================================================
+
+def compare(baseline, current):
+    """
+    Print stage times against the baseline.
+    Returns the list of regressions (instance, stage, old, new).
+    """
+    regressions = []
+
+    for fname, entry in current["instances"].items():
+        old = baseline["instances"].get(fname)
+        if old is None:
+            print(f"[NEW] {fname} not in baseline")
+            continue
+
+        print(f"\n{fname} (n={entry['n']}, m={entry['m']})")
+        print(f"  {'stage':<14}{'baseline':>10}{'current':>10}{'ratio':>8}")
+
+        for stage in STAGES:
+            before = old["stages"].get(stage)
+            after = entry["stages"][stage]
+            if before is None:
+                continue
+
+            ratio = f"{after / before:.2f}" if before > 0 else "-"
+            slower = after > before * (1 + TOLERANCE) and after - before > MIN_DELTA
+            flag = "  REGRESSION" if slower else ""
+            print(f"  {stage:<14}{before:>10.4f}{after:>10.4f}{ratio:>8}{flag}")
+
+            if slower:
+                regressions.append((fname, stage, before, after))
+
+        if entry["branch_vertices"] > old["branch_vertices"]:
+            print(
+                f"  [WORSE] branch vertices {old['branch_vertices']}"
+                f" -> {entry['branch_vertices']}"
+            )
+            regressions.append(
+                (fname, "branch_vertices", old["branch_vertices"], entry["branch_vertices"])
+            )
+
+    return regressions
+
+
+# ============================================================
+# Command line
+# ============================================================
+
+if __name__ == "__main__":
+    instrument.configure(console=False)
+
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in ("run", "check"):
+        print("Usage: python benchmark.py run|check [baseline.json]")
+        sys.exit(1)
+
+    baseline_file = sys.argv[2] if len(sys.argv) == 3 else BASELINE_FILE
+    current = run_benchmark()
+
+    if sys.argv[1] == "run":
+        with open(baseline_file, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"[DONE] Baseline written to {baseline_file}")
+        sys.exit(0)
+
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    regressions = compare(baseline, current)
+    if regressions:
+        print(f"\n[FAIL] {len(regressions)} regression(s) beyond {TOLERANCE:.0%}")
+        sys.exit(1)
+    print("\n[OK] No regression")
@@ -0,0 +1,186 @@
+import heapq
+
+from instance_index import InstanceIndex
+
+
+# ============================================================
+# Solver-free MBVST construction
+# ============================================================
+
+def _neighbours(index):
+    """
+    Adjacency lists (vertex ids) from the CSR incidence of the index.
+    """
+    src = index.src.tolist()
+    dst = index.dst.tolist()
+    inc_ptr = index.inc_ptr.tolist()
+    inc_edges = index.inc_edges.tolist()
+
+    nbrs = []
+    for i in range(index.n):
+        row = []
+        for e in inc_edges[inc_ptr[i]:inc_ptr[i + 1]]:
+            row.append(dst[e] if src[e] == i else src[e])
+        nbrs.append(row)
+    return nbrs
+
+
+def _resume_class(tree_degree):
+    """
+    Cost of growing the tree from a vertex of this tree degree:
+    leaves (and the start vertex) are free, branch vertices already
+    pay, degree-2 vertices would become new branch vertices.
+    """
+    if tree_degree <= 1:
+        return 0
+    if tree_degree >= 3:
+        return 1
+    return 2
+
+
+def build_path_like_tree(nbrs, start):
+    """
+    Grow a spanning tree as long paths.
+
+    The current path end is extended to the unvisited neighbour with the
+    fewest unvisited neighbours (Warnsdorff rule). When it is stuck, growth
+    resumes from the cheapest tree vertex with unvisited neighbours
+    (leaf, then existing branch vertex, then degree-2 vertex).
+    O(m log n). Returns the parent of every vertex (-1 for the root).
+    """
+    n = len(nbrs)
+    parent = [-1] * n
+    in_tree = [False] * n
+    tree_degree = [0] * n
+    remaining = [len(row) for row in nbrs]
+    scan = [0] * n
+
+    def add(v):
+        in_tree[v] = True
+        for z in nbrs[v]:
+            remaining[z] -= 1
+
+    def has_unvisited(v):
+        row = nbrs[v]
+        k = scan[v]
+        while k < len(row) and in_tree[row[k]]:
+            k += 1
+        scan[v] = k
+        return k < len(row)
+
+    add(start)
+    heap = []
+    current = start
+
+    while True:
+        # --------------------------------------------------
+        # Extend the current path as far as possible
+        # --------------------------------------------------
+        while True:
+            best = -1
+            for w in nbrs[current]:
+                if not in_tree[w] and (best < 0 or remaining[w] < remaining[best]):
+                    best = w
+            if best < 0:
+                break
+
+            parent[best] = current
+            tree_degree[current] += 1
+            tree_degree[best] += 1
+            add(best)
+            heapq.heappush(heap, (_resume_class(tree_degree[current]), current))
+            current = best
+
+        # --------------------------------------------------
+        # Stuck: resume from the cheapest frontier vertex
+        # --------------------------------------------------
+        heapq.heappush(heap, (_resume_class(tree_degree[current]), current))
+
+        current = -1
+        while heap:
+            cls, v = heapq.heappop(heap)
+            if not has_unvisited(v):
+                continue
+            if cls != _resume_class(tree_degree[v]):
+                heapq.heappush(heap, (_resume_class(tree_degree[v]), v))
+                continue
+            current = v
+            break
+
+        if current < 0:
+            return parent
+
+
+def repair_leaves(nbrs, tree_adj):
+    """
+    Leaf-aware repair, in place on tree adjacency sets.
+
+    A leaf hanging from a degree-3 vertex b is re-attached to another
+    neighbour w that is a leaf or already a branch vertex: b stops being
+    a branch vertex and no new one appears. Repeated until stable.
+    Returns the number of moves.
+    """
+    moves = 0
+    improved = True
+
+    while improved:
+        improved = False
+        for leaf in range(len(nbrs)):
+            if len(tree_adj[leaf]) != 1:
+                continue
+
+            (b,) = tree_adj[leaf]
+            if len(tree_adj[b]) != 3:
+                continue
+
+            for w in nbrs[leaf]:
+                if w == b:
+                    continue
+                dw = len(tree_adj[w])
+                if dw == 1 or dw >= 3:
+                    tree_adj[b].discard(leaf)
+                    tree_adj[leaf] = {w}
+                    tree_adj[w].add(leaf)
+                    moves += 1
+                    improved = True
+                    break
+
+    return moves
+
+
+def constructive_spanning_tree(VG, EG, index=None):
+    """
+    Solver-free MBVST tree: path-like construction + leaf repair.
+    Returns the tree edges (oriented as in EG).
+    """
+    if index is None:
+        index = InstanceIndex(VG, EG)
+
+    n = index.n
+    if n == 0:
+        return []
+
+    nbrs = _neighbours(index)
+
+    # A minimum-degree vertex is the most natural path end
+    start = min(range(n), key=lambda i: len(nbrs[i]))
+    parent = build_path_like_tree(nbrs, start)
+
+    tree_adj = [set() for _ in range(n)]
+    for v, p in enumerate(parent):
+        if p >= 0:
+            tree_adj[v].add(p)
+            tree_adj[p].add(v)
+
+    if sum(len(a) for a in tree_adj) != 2 * (n - 1):
+        raise ValueError("Original graph is not connected.")
+
+    repair_leaves(nbrs, tree_adj)
+
+    VG = index.VG
+    edges = []
+    for a in range(n):
+        for b in tree_adj[a]:
+            if a < b:
+                edges.append(index.edge_key(VG[a], VG[b]))
+    return edges
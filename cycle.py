@@ -1,5 +1,8 @@
+import heapq
 import networkx as nx
-import random
+
+from union_find import UnionFind
+
 
 def get_cycle_bases(solution):
     VG = solution["vertices"]
@@ -16,24 +19,132 @@ def get_cycle_bases(solution):
     return cycle_basis
 
 
-def break_cycles_intelligently(G):
-    cycles = nx.cycle_basis(G)
-    removed_edges = []
+def break_cycles_intelligently(edges, VG, index=None, rule="degree"):
+    """
+    Extract a spanning tree with few branch vertices from a connected
+    edge selection, in O(m log m).
+
+    Kruskal pass with a lazy priority queue: an edge costs the number
+    of its endpoints it would turn into branch vertices (tree degree,
+    plus the index's degree offset, going from 2 to 3), ties broken
+    towards endpoints of low degree in the selection, which have fewer
+    alternatives. Costs are re-checked when an edge is popped, and the
+    edges of a vertex are re-queued when it becomes a branch vertex
+    (they become free), so every accepted edge is the cheapest at the
+    time it is accepted.
+
+    rule="cost" drops the low-degree tie-break. Remaining ties go to
+    the edge first in `edges`.
+
+    Unlike removing one edge per basis cycle, the union-find makes the
+    result a tree whatever the overlap of the cycles.
+
+    Returns (tree_edges, removed_edges), edges as given. tree_edges
+    spans VG if and only if the selection is connected.
+    """
+    n = len(VG)
+    vertex_id = index.vertex_id if index is not None else {v: i for i, v in enumerate(VG)}
+
+    ends = [(vertex_id[u], vertex_id[v]) for (u, v) in edges]
+
+    incident = [[] for _ in range(n)]
+    for i, (a, b) in enumerate(ends):
+        incident[a].append(i)
+        incident[b].append(i)
+
+    if index is not None:
+        tree_degree = index.offset.tolist()
+    else:
+        tree_degree = [0] * n
+
+    def cost(i):
+        a, b = ends[i]
+        return (tree_degree[a] == 2) + (tree_degree[b] == 2)
+
+    def priority(i):
+        a, b = ends[i]
+        ties = len(incident[a]) + len(incident[b]) if rule == "degree" else 0
+        return (cost(i), ties, i)
+
+    heap = [priority(i) for i in range(len(ends))]
+    heapq.heapify(heap)
+
+    uf = UnionFind(n)
+    in_tree = [False] * len(ends)
+
+    while heap and uf.components > 1:
+        c, _, i = heapq.heappop(heap)
+        a, b = ends[i]
+        if in_tree[i] or uf.find(a) == uf.find(b):
+            continue
+        if c != cost(i):
+            heapq.heappush(heap, priority(i))
+            continue
+
+        uf.union(a, b)
+        in_tree[i] = True
+        for v in (a, b):
+            tree_degree[v] += 1
+            if tree_degree[v] == 3:
+                for j in incident[v]:
+                    if not in_tree[j]:
+                        heapq.heappush(heap, priority(j))
+
+    tree_edges = [e for e, kept in zip(edges, in_tree) if kept]
+    removed_edges = [e for e, kept in zip(edges, in_tree) if not kept]
+    return tree_edges, removed_edges
+
+
+def fundamental_cycles(tree_edges, chords, VG, index=None):
+    """
+    The cycle each chord (non-tree edge) closes with the tree path
+    between its endpoints, as vertex lists.
+    O(n + total cycle length).
+    """
+    n = len(VG)
+    vertex_id = index.vertex_id if index is not None else {v: i for i, v in enumerate(VG)}
 
-    for cycle in cycles:
-        cycle_edges = [
-            (cycle[i], cycle[(i+1) % len(cycle)])
-            for i in range(len(cycle))
-        ]
+    tree_adj = [[] for _ in range(n)]
+    for (u, v) in tree_edges:
+        a = vertex_id[u]
+        b = vertex_id[v]
+        tree_adj[a].append(b)
+        tree_adj[b].append(a)
 
-        # heuristique : enlever l’arête la plus "branchante"
-        edge_to_remove = max(
-            cycle_edges,
-            key=lambda e: G.degree(e[0]) + G.degree(e[1])
-        )
+    # BFS parents and depths of every tree of the forest
+    parent = [-1] * n
+    depth = [0] * n
+    seen = [False] * n
+    for root in range(n):
+        if seen[root]:
+            continue
+        seen[root] = True
+        order = [root]
+        for a in order:
+            for b in tree_adj[a]:
+                if not seen[b]:
+                    seen[b] = True
+                    parent[b] = a
+                    depth[b] = depth[a] + 1
+                    order.append(b)
 
-        if G.has_edge(*edge_to_remove):
-            G.remove_edge(*edge_to_remove)
-            removed_edges.append(edge_to_remove)
+    cycles = []
+    for (u, v) in chords:
+        a = vertex_id[u]
+        b = vertex_id[v]
+        left = [a]
+        right = [b]
+        while a != b:
+            if depth[a] >= depth[b]:
+                a = parent[a]
+                left.append(a)
+            else:
+                b = parent[b]
+                right.append(b)
+            if a < 0 or b < 0:
+                break   # endpoints in different trees
+        else:
+            path = left + right[-2::-1]
+            cycles.append([VG[i] for i in path])
 
-    return removed_edges
+    return cycles
@@ -0,0 +1,307 @@
+import time
+import heapq
+import multiprocessing as mp
+
+import numpy as np
+import networkx as nx
+
+import instrument
+from instance_index import InstanceIndex
+from constructive import constructive_spanning_tree
+from heuristic import heuristic_cycle_basis, fallback_spanning_tree
+from plne_cp2 import solve_mbvst_flow
+from local_search import improve_tree
+from lower_bound import structural_bound
+from instrument import event, timer
+
+
+# ============================================================
+# Block decomposition
+# ============================================================
+#
+# The spanning trees of a connected graph are exactly the unions of
+# one spanning tree per biconnected block, so blocks can be solved
+# independently and their trees stitched. Blocks only interact through
+# the branch degrees of the articulation points: a cut vertex gets
+# tree degree >= 1 from each of its blocks, so block B sees it with the
+# degree offset (see InstanceIndex.deg_offset)
+#
+#     offset_B(v) = offset(v) + tree degree of v in the other blocks
+#
+# starting from 1 per other block. The other trees being fixed, the
+# branch count of B's tree under these offsets is exactly B's share of
+# the total. Hence:
+#   1. every block is solved with the initial offsets,
+#   2. the trees are stitched; blocks whose offsets changed (typically
+#      a cut vertex already branching elsewhere, now free in B) are
+#      solved again, and each new tree is kept if the total does not
+#      increase, given the trees kept so far. Repeated `rounds` times.
+#
+# Bridges (one-edge blocks) and cycles are solved directly. Small
+# blocks go to the exact flow model, large ones to the heuristic, in
+# chunks of similar total size spread over worker processes.
+
+EXACT_BLOCK_EDGES = 200
+
+
+def _cycle_tree(EG, offset):
+    """
+    Best tree of a cycle block: drop the edge whose endpoints stop
+    branching (offset exactly 1: degree 2 + 1 branches, 1 + 1 not).
+    """
+    drop = max(
+        range(len(EG)),
+        key=lambda i: (offset.get(EG[i][0], 0) == 1) + (offset.get(EG[i][1], 0) == 1)
+    )
+    return EG[:drop] + EG[drop + 1:]
+
+
+def _solve_block(VG, EG, deg_offset, start_tree, time_limit, options):
+    """
+    Tree of one block (labels = vertex ids of the whole instance):
+    exact flow model up to `exact_edges` edges, heuristic above,
+    `start_tree` if the solver finds nothing better in time.
+    """
+    index = InstanceIndex(VG, EG, deg_offset=deg_offset)
+    start_obj = index.branch_count(start_tree)
+    if time_limit <= 0 or start_obj == 0:
+        return start_tree
+
+    if index.m <= options["exact_edges"]:
+        T, _, _ = solve_mbvst_flow(
+            None, time_limit=time_limit, index=index, threads=options["threads"],
+            backend=options["backend"], reduce=options["reduce"],
+            start_tree=start_tree, cutoff=start_obj
+        )
+        if T.number_of_nodes() != index.n or not nx.is_tree(T):
+            return start_tree
+        tree = list(T.edges())
+    else:
+        tree, _ = heuristic_cycle_basis(
+            VG, EG, index=index, time_limit=time_limit,
+            max_iter=options["max_iter"], threads=options["threads"],
+            local_search_time=min(options["local_search_time"], time_limit / 4),
+            backend=options["backend"], reduce=options["reduce"]
+        )
+
+    return tree if index.branch_count(tree) <= start_obj else start_tree
+
+
+def _solve_chunk(blocks, time_limit, options):
+    """
+    Solve blocks [(VG, EG, deg_offset, start_tree), ...] in turn, each
+    with its share (by edge count) of the remaining time. Returns the
+    list of trees.
+    """
+    deadline = time.time() + time_limit
+    left = sum(len(EG) for _, EG, _, _ in blocks)
+    trees = []
+    for VG, EG, deg_offset, start_tree in blocks:
+        share = (deadline - time.time()) * len(EG) / left
+        left -= len(EG)
+        trees.append(_solve_block(VG, EG, deg_offset, start_tree, share, options))
+    return trees
+
+
+def _chunk_worker(blocks, time_limit, options):
+    """
+    _solve_chunk in a worker process (module level for spawn).
+    """
+    instrument.configure(console=False)
+    return _solve_chunk(blocks, time_limit, options)
+
+
+def _chunks(sizes, count):
+    """
+    Split block positions into `count` groups of similar total size
+    (largest first onto the lightest group).
+    """
+    heap = [(0, k) for k in range(count)]
+    groups = [[] for _ in range(count)]
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        load, k = heapq.heappop(heap)
+        groups[k].append(i)
+        heapq.heappush(heap, (load + sizes[i], k))
+    return [g for g in groups if g]
+
+
+def _solve_blocks(jobs, workers, time_limit, options):
+    """
+    Solve blocks [(VG, EG, deg_offset, start_tree), ...]; returns the
+    trees in order, the start tree for blocks of failed chunks.
+    """
+    trees = [job[3] for job in jobs]
+    groups = _chunks([len(job[1]) for job in jobs], max(1, workers))
+
+    if workers <= 1:
+        with instrument.quiet():
+            for group in groups:
+                for i, tree in zip(group, _solve_chunk([jobs[i] for i in group],
+                                                       time_limit, options)):
+                    trees[i] = tree
+        return trees
+
+    from batch_runner import run_jobs
+
+    chunk_jobs = [
+        (k, _chunk_worker, ([jobs[i] for i in group], time_limit, options))
+        for k, group in enumerate(groups)
+    ]
+    grace = 10 + 0.1 * time_limit
+    for k, result, error in run_jobs(chunk_jobs, workers, time_limit + grace):
+        if error is not None:
+            event("blocks_chunk", chunk=k, error=error)
+            continue
+        for i, tree in zip(groups[k], result):
+            trees[i] = tree
+    return trees
+
+
+def solve_by_blocks(VG, EG, index=None, workers=1, time_limit=60.0, rounds=1,
+                    exact_edges=EXACT_BLOCK_EDGES, lower_bound=None,
+                    local_search_time=1.0, max_iter=50, threads=None,
+                    backend=None, reduce=False):
+    """
+    MBVST tree stitched from per-block trees (see above), blocks solved
+    by `workers` processes (in this process if 1) within about
+    `time_limit` seconds, split between the first pass and `rounds`
+    refinement rounds. The stitched tree gets `local_search_time`
+    seconds of edge exchanges.
+
+    Same return as heuristic_cycle_basis: (tree_edges, branch_vertices).
+    """
+    start_time = time.time()
+    deadline = start_time + time_limit
+    if index is None:
+        index = InstanceIndex(VG, EG)
+    if lower_bound is None:
+        with timer("lower_bound"):
+            lower_bound = structural_bound(VG, EG, index=index)
+
+    if threads is None and workers > 1:
+        threads = max(1, mp.cpu_count() // workers)
+
+    core = index.core
+    src = index.src.tolist()
+    dst = index.dst.tolist()
+
+    with timer("decompose"):
+        count, labels = core.block_labels()
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(count + 1))
+        block_edges = [order[bounds[b]:bounds[b + 1]] for b in range(count)]
+        block_vertices = [
+            np.unique(np.concatenate([index.src[e], index.dst[e]])).tolist()
+            for e in block_edges
+        ]
+        in_blocks = core.blocks_per_vertex(labels)
+
+    # Start: any spanning tree splits into spanning trees of the blocks
+    with timer("construct"):
+        start = index.edge_ids(constructive_spanning_tree(VG, EG, index=index))
+    in_tree = np.zeros(index.m, dtype=bool)
+    in_tree[start] = True
+    trees = [e[in_tree[e]].tolist() for e in block_edges]
+
+    base = index.offset.tolist()
+    degree = (np.bincount(index.src[start], minlength=index.n)
+              + np.bincount(index.dst[start], minlength=index.n)).tolist()
+
+    def offsets(b, first):
+        # {vertex id: offset} of the cut vertices (and kernel offsets) of block b
+        own = {}
+        for e in trees[b]:
+            own[src[e]] = own.get(src[e], 0) + 1
+            own[dst[e]] = own.get(dst[e], 0) + 1
+        result = {}
+        for v in block_vertices[b]:
+            if first:
+                off = base[v] + int(in_blocks[v]) - 1
+            else:
+                off = base[v] + degree[v] - own.get(v, 0)
+            if off:
+                result[v] = off
+        return result
+
+    def total():
+        return sum(1 for v in range(index.n) if degree[v] + base[v] >= 3)
+
+    def swap(b, new_ids):
+        # Replace the tree of block b if the total does not increase
+        change = {}
+        for e in trees[b]:
+            change[src[e]] = change.get(src[e], 0) - 1
+            change[dst[e]] = change.get(dst[e], 0) - 1
+        for e in new_ids:
+            change[src[e]] = change.get(src[e], 0) + 1
+            change[dst[e]] = change.get(dst[e], 0) + 1
+        delta = sum(
+            (degree[v] + d + base[v] >= 3) - (degree[v] + base[v] >= 3)
+            for v, d in change.items()
+        )
+        if delta > 0:
+            return False
+        for v, d in change.items():
+            degree[v] += d
+        trees[b] = new_ids
+        return True
+
+    direct = sum(1 for e, v in zip(block_edges, block_vertices) if len(e) <= len(v))
+    event("blocks_start", blocks=count, direct=direct,
+          articulation=int(np.count_nonzero(in_blocks >= 2)),
+          largest=max((len(e) for e in block_edges), default=0))
+
+    options = {
+        "exact_edges": exact_edges, "max_iter": max_iter, "threads": threads,
+        "local_search_time": local_search_time, "backend": backend,
+        "reduce": reduce,
+    }
+
+    used = [None] * count
+    for r in range(rounds + 1):
+        best = total()
+        if best <= lower_bound:
+            break
+
+        todo = []
+        for b in range(count):
+            off = offsets(b, first=(r == 0))
+            if off == used[b] or len(block_edges[b]) == 1:
+                continue
+            used[b] = off
+            if len(block_edges[b]) == len(block_vertices[b]):
+                edges = [(src[e], dst[e]) for e in block_edges[b]]
+                swap(b, index.core.find_edges(*zip(*_cycle_tree(edges, off))).tolist())
+            else:
+                todo.append(b)
+
+        if todo:
+            jobs = [
+                (block_vertices[b],
+                 [(src[e], dst[e]) for e in block_edges[b]],
+                 used[b],
+                 [(src[e], dst[e]) for e in trees[b]])
+                for b in todo
+            ]
+            budget = (deadline - time.time()) / (rounds + 1 - r)
+            solved = _solve_blocks(jobs, workers, budget, options)
+
+            with timer("stitch"):
+                for b, tree in zip(todo, solved):
+                    a, c = zip(*tree) if tree else ((), ())
+                    swap(b, index.core.find_edges(a, c).tolist())
+
+        event("blocks_round", round=r, solved=len(todo), branch_vertices=total())
+
+    ids = sorted(e for tree in trees for e in tree)
+    tree = [index.EG[e] for e in ids]
+    if len(tree) != index.n - 1:
+        event("no_valid_solution")
+        tree, obj = fallback_spanning_tree(VG, EG, index=index)
+    else:
+        with timer("local_search"):
+            tree, obj = improve_tree(VG, EG, tree, time_limit=local_search_time,
+                                     index=index)
+
+    event("heuristic_done", runtime=time.time() - start_time, branch_vertices=obj)
+    return tree, obj
@@ -0,0 +1,389 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from union_find import UnionFind
+
+
+# ============================================================
+# Compact graph core
+# ============================================================
+#
+# Undirected graph on vertex ids 0..n-1 stored as NumPy arrays:
+# int32 endpoints per edge plus CSR adjacency, about 30 bytes per edge
+# against several hundred for a networkx dict-of-dicts. Built without
+# Python loops; structural queries run on the arrays.
+
+
+class CsrGraph:
+    """
+    - src, dst   : int32 endpoints of edge i
+    - ptr        : CSR row pointers (int64, n + 1)
+    - adj, eid   : neighbour id and edge id of each adjacency slot,
+                   vertex a owns slots ptr[a]:ptr[a + 1]
+    - degree     : int64 degree per vertex
+    """
+
+    __slots__ = ("n", "m", "src", "dst", "ptr", "adj", "eid", "degree",
+                 "_keys", "_key_edges")
+
+    def __init__(self, n, src, dst):
+        self.n = n
+        self.src = np.ascontiguousarray(src, dtype=np.int32)
+        self.dst = np.ascontiguousarray(dst, dtype=np.int32)
+        self.m = len(self.src)
+
+        ends = np.concatenate([self.src, self.dst])
+        other = np.concatenate([self.dst, self.src])
+        order = np.argsort(ends, kind="stable")
+
+        self.degree = np.bincount(ends, minlength=n)
+        self.ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(self.degree, out=self.ptr[1:])
+
+        self.adj = other[order].astype(np.int32)
+        self.eid = (order % max(self.m, 1)).astype(np.int32)
+
+        self._keys = None
+        self._key_edges = None
+
+    @classmethod
+    def from_edges(cls, n, edges):
+        """
+        From an (m, 2) edge array, as returned by instance_io.
+        """
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        return cls(n, edges[:, 0], edges[:, 1])
+
+    # --------------------------------------------------
+    # Local queries
+    # --------------------------------------------------
+    def neighbors(self, a):
+        return self.adj[self.ptr[a]:self.ptr[a + 1]]
+
+    def incident(self, a):
+        return self.eid[self.ptr[a]:self.ptr[a + 1]]
+
+    def _edge_index(self):
+        # Sorted (min, max) keys, built on first lookup
+        if self._keys is None:
+            lo = np.minimum(self.src, self.dst).astype(np.int64)
+            hi = np.maximum(self.src, self.dst).astype(np.int64)
+            keys = lo * self.n + hi
+            order = np.argsort(keys, kind="stable")
+            self._keys = keys[order]
+            self._key_edges = order.astype(np.int32)
+        return self._keys, self._key_edges
+
+    def find_edge(self, a, b):
+        """
+        Id of the edge {a, b}, -1 if absent. O(log m).
+        """
+        keys, edges = self._edge_index()
+        key = min(a, b) * self.n + max(a, b)
+        pos = int(np.searchsorted(keys, key))
+        if pos < self.m and keys[pos] == key:
+            return int(edges[pos])
+        return -1
+
+    def find_edges(self, a, b):
+        """
+        Vectorized find_edge over id arrays.
+        """
+        keys, edges = self._edge_index()
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        key = np.minimum(a, b) * self.n + np.maximum(a, b)
+        pos = np.minimum(np.searchsorted(keys, key), max(self.m - 1, 0))
+        if self.m == 0:
+            return np.full(len(key), -1, dtype=np.int64)
+        return np.where(keys[pos] == key, edges[pos], -1)
+
+    # --------------------------------------------------
+    # Global structure
+    # --------------------------------------------------
+    def components(self):
+        """
+        (number of components, component label per vertex).
+        """
+        uf = UnionFind(self.n)
+        for a, b in zip(self.src.tolist(), self.dst.tolist()):
+            uf.union(a, b)
+        labels = np.array([uf.find(a) for a in range(self.n)], dtype=np.int32)
+        return uf.components, labels
+
+    def is_connected(self):
+        uf = UnionFind(self.n)
+        for a, b in zip(self.src.tolist(), self.dst.tolist()):
+            uf.union(a, b)
+            if uf.components == 1:
+                return True
+        return uf.components <= 1
+
+    def _dfs_lowpoints(self):
+        """
+        Iterative DFS over the CSR arrays (no recursion limit).
+        Returns lists (disc, low, parent, parent_edge), -1 on roots.
+        """
+        n = self.n
+        ptr = self.ptr.tolist()
+        adj = self.adj.tolist()
+        eid = self.eid.tolist()
+
+        disc = [-1] * n
+        low = [0] * n
+        parent = [-1] * n
+        parent_edge = [-1] * n
+        pos = ptr[:-1]
+        t = 0
+
+        for root in range(n):
+            if disc[root] != -1:
+                continue
+            disc[root] = low[root] = t
+            t += 1
+            stack = [root]
+
+            while stack:
+                v = stack[-1]
+                k = pos[v]
+                if k < ptr[v + 1]:
+                    pos[v] = k + 1
+                    w = adj[k]
+                    if eid[k] == parent_edge[v]:
+                        continue
+                    if disc[w] == -1:
+                        disc[w] = low[w] = t
+                        t += 1
+                        parent[w] = v
+                        parent_edge[w] = eid[k]
+                        stack.append(w)
+                    elif disc[w] < low[v]:
+                        low[v] = disc[w]
+                else:
+                    stack.pop()
+                    if stack:
+                        u = stack[-1]
+                        if low[v] < low[u]:
+                            low[u] = low[v]
+
+        return disc, low, parent, parent_edge
+
+    def bridges(self):
+        """
+        Ids of the bridges (edges on no cycle), in O(n + m).
+        """
+        disc, low, parent, parent_edge = self._dfs_lowpoints()
+        return [
+            parent_edge[v] for v in range(self.n)
+            if parent[v] >= 0 and low[v] > disc[parent[v]]
+        ]
+
+    def block_labels(self):
+        """
+        (number of blocks, block id per edge): the biconnected
+        components, a bridge being a block of its own. Iterative
+        Hopcroft-Tarjan, edges stacked as they are explored.
+        """
+        n = self.n
+        ptr = self.ptr.tolist()
+        adj = self.adj.tolist()
+        eid = self.eid.tolist()
+
+        disc = [-1] * n
+        low = [0] * n
+        parent_edge = [-1] * n
+        pos = ptr[:-1]
+        label = [-1] * self.m
+        edge_stack = []
+        blocks = 0
+        t = 0
+
+        for root in range(n):
+            if disc[root] != -1:
+                continue
+            disc[root] = low[root] = t
+            t += 1
+            stack = [root]
+
+            while stack:
+                v = stack[-1]
+                k = pos[v]
+                if k < ptr[v + 1]:
+                    pos[v] = k + 1
+                    w = adj[k]
+                    e = eid[k]
+                    if e == parent_edge[v]:
+                        continue
+                    if disc[w] == -1:
+                        disc[w] = low[w] = t
+                        t += 1
+                        parent_edge[w] = e
+                        edge_stack.append(e)
+                        stack.append(w)
+                    elif disc[w] < disc[v]:
+                        # Back edge to an ancestor, stacked from below only
+                        edge_stack.append(e)
+                        if disc[w] < low[v]:
+                            low[v] = disc[w]
+                else:
+                    stack.pop()
+                    if stack:
+                        u = stack[-1]
+                        if low[v] < low[u]:
+                            low[u] = low[v]
+                        if low[v] >= disc[u]:
+                            # u separates v's subtree: pop its block
+                            e = parent_edge[v]
+                            while True:
+                                f = edge_stack.pop()
+                                label[f] = blocks
+                                if f == e:
+                                    break
+                            blocks += 1
+
+        return blocks, np.array(label, dtype=np.int32)
+
+    def blocks_per_vertex(self, labels=None):
+        """
+        Number of blocks containing each vertex (0 if isolated,
+        >= 2 on articulation points).
+        """
+        if labels is None:
+            _, labels = self.block_labels()
+        labels = labels.astype(np.int64)
+        k = labels.max(initial=0) + 1
+        pairs = np.unique(np.concatenate([
+            self.src.astype(np.int64) * k + labels,
+            self.dst.astype(np.int64) * k + labels,
+        ]))
+        return np.bincount(pairs // k, minlength=self.n)
+
+    def cycle_basis(self, as_edges=False):
+        """
+        Fundamental cycles of a BFS spanning forest: one cycle per
+        non-tree edge, closed by the tree path. Vertex id lists, or
+        edge id lists if as_edges.
+        """
+        n = self.n
+        ptr = self.ptr.tolist()
+        adj = self.adj.tolist()
+        eid = self.eid.tolist()
+
+        parent = [-1] * n
+        parent_edge = [-1] * n
+        depth = [0] * n
+        seen = [False] * n
+        for root in range(n):
+            if seen[root]:
+                continue
+            seen[root] = True
+            order = [root]
+            for a in order:
+                for k in range(ptr[a], ptr[a + 1]):
+                    b = adj[k]
+                    if not seen[b]:
+                        seen[b] = True
+                        parent[b] = a
+                        parent_edge[b] = eid[k]
+                        depth[b] = depth[a] + 1
+                        order.append(b)
+
+        in_tree = np.zeros(self.m, dtype=bool)
+        tree_edges = [e for e in parent_edge if e >= 0]
+        in_tree[tree_edges] = True
+
+        cycles = []
+        for e in np.flatnonzero(~in_tree).tolist():
+            a = int(self.src[e])
+            b = int(self.dst[e])
+            left = [a]
+            right = [b]
+            left_edges = []
+            right_edges = []
+            while a != b:
+                if depth[a] >= depth[b]:
+                    left_edges.append(parent_edge[a])
+                    a = parent[a]
+                    left.append(a)
+                else:
+                    right_edges.append(parent_edge[b])
+                    b = parent[b]
+                    right.append(b)
+            if as_edges:
+                cycles.append(left_edges + right_edges[::-1] + [e])
+            else:
+                cycles.append(left + right[-2::-1])
+
+        return cycles
+
+
+# ============================================================
+# Label views
+# ============================================================
+#
+# Read-only mappings keyed by vertex / edge labels over the arrays, in
+# place of per-vertex and per-edge dicts.
+
+class VertexValues(Mapping):
+    """
+    {vertex label: value} over a per-id sequence.
+    """
+
+    __slots__ = ("_labels", "_ids", "_values")
+
+    def __init__(self, labels, ids, values):
+        self._labels = labels
+        self._ids = ids
+        self._values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+    def __getitem__(self, v):
+        return self._values[self._ids[v]]
+
+    def __iter__(self):
+        return iter(self._labels)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def array(self):
+        return np.array(self._values)
+
+
+class EdgeIds(Mapping):
+    """
+    {(u, v): edge id} in both orientations, by binary search in the
+    core instead of a dict of 2m tuples.
+    """
+
+    __slots__ = ("_core", "_ids", "_edges")
+
+    def __init__(self, core, ids, edges):
+        self._core = core
+        self._ids = ids
+        self._edges = edges
+
+    def __getitem__(self, key):
+        u, v = key
+        a = self._ids.get(u)
+        b = self._ids.get(v)
+        if a is not None and b is not None:
+            i = self._core.find_edge(a, b)
+            if i >= 0:
+                return i
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def __iter__(self):
+        for (u, v) in self._edges:
+            yield (u, v)
+            yield (v, u)
+
+    def __len__(self):
+        return 2 * len(self._edges)
@@ -1,6 +1,7 @@
 import networkx as nx
-import matplotlib.pyplot as plt
-import os
+
+import viz
+from instance_io import load_edge_array
 
 def load_instance(path):
     """
@@ -9,36 +10,27 @@ def load_instance(path):
     n m [ignored]
     u v [ignored]
     """
-    G = nx.Graph()
-
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"File not found: {path}")
-
-    with open(path, "r") as f:
-        header = f.readline().split()
-        n = int(header[0])
-        m = int(header[1])
-
-        # Nodes: 0-based indexing
-        G.add_nodes_from(range(n))
-
-        for line in f:
-            if not line.strip():
-                continue
-
-            parts = list(map(int, line.split()))
-            u, v = parts[0], parts[1]
-
-            # Convert to 0-based indexing
-            G.add_edge(u - 1, v - 1)
+    n, edges = load_edge_array(path)
+    G = graph_from_edges(n, edges)
 
     # Safety checks
     assert G.number_of_nodes() == n, "Node count mismatch"
-    assert G.number_of_edges() == m, "Edge count mismatch"
+    assert G.number_of_edges() == len(edges), "Edge count mismatch"
 
     return G
 
 
+def graph_from_edges(n, edges):
+    """
+    Build the networkx graph of an (n, int32 edges) instance.
+    Nodes: 0-based indexing.
+    """
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(edges.tolist())
+    return G
+
+
 def graph_info(G):
     degrees = dict(G.degree())
 
@@ -65,25 +57,31 @@ def draw_graph(G, title="Graph"):
     """
     Draw small graphs with FILE labels (1-based).
     """
+    if not viz.enabled():
+        return
+
     if G.number_of_nodes() > 100:
         print("Graph too large to draw.")
         return
 
-    pos = nx.spring_layout(G, seed=42)
-
-    # Display labels as in the file (1-based indexing)
-    labels = {v: v + 1 for v in G.nodes()}
-
-    nx.draw(
-        G,
-        pos,
-        labels=labels,
-        with_labels=True,
-        node_size=500,
-        font_size=10
-    )
-    plt.title(title)
-    plt.show()
+    def draw(ax):
+        pos = viz.get_layout(list(G.nodes()), list(G.edges()))
+
+        # Display labels as in the file (1-based indexing)
+        labels = {v: v + 1 for v in G.nodes()}
+
+        nx.draw(
+            G,
+            pos,
+            ax=ax,
+            labels=labels,
+            with_labels=True,
+            node_size=500,
+            font_size=10
+        )
+        ax.set_title(title)
+
+    viz.render(draw, name="graph")
 
 # Use raw string for Windows paths
 #graph_path = r"Instances\Instances\Spd_Inst_Rid_Final2\Spd_RF2_20_27_211.txt"
@@ -1,49 +1,39 @@
-from collections import deque
 import networkx as nx
-import matplotlib.pyplot as plt
 
-def read_graph(filename):
-    with open(filename, "r") as f:
-        first_line = f.readline().strip().split()
-        n = int(first_line[0])
-        m = int(first_line[1])
+import viz
+from instance_io import load_edge_array
+from union_find import UnionFind
 
-        VG = [str(i) for i in range(1, n + 1)]
-        EG = []
+def read_graph(filename):
+    """
+    Vertices and edges with FILE labels (1-based strings).
+    """
+    n, edges = load_edge_array(filename)
 
-        for _ in range(m):
-            line = f.readline().strip().split()
-            u, v, _ = line[0], line[1], line[2]
-            EG.append((u, v))
+    VG = [str(i) for i in range(1, n + 1)]
+    EG = [(str(u + 1), str(v + 1)) for u, v in edges.tolist()]
 
     return VG, EG
 
 
-def is_connected(VG, selected_edges):
+def is_connected(VG, selected_edges, index=None):
+    """
+    Whether the edges connect all of VG (union-find on vertex ids).
+    """
     if not VG:
         return True
 
-    adj = {v: [] for v in VG}
+    vertex_id = index.vertex_id if index is not None else {v: i for i, v in enumerate(VG)}
+    uf = UnionFind(len(VG))
     for (u, v) in selected_edges:
-        adj[u].append(v)
-        adj[v].append(u)
-
-    visited = set()
-    start = VG[0]
-    queue = deque([start])
-    visited.add(start)
+        uf.union(vertex_id[u], vertex_id[v])
+    return uf.components == 1
 
-    while queue:
-        node = queue.popleft()
-        for neigh in adj[node]:
-            if neigh not in visited:
-                visited.add(neigh)
-                queue.append(neigh)
 
-    return len(visited) == len(VG)
+def count_branch_vertices(VG, T, index=None):
+    if index is not None:
+        return index.branch_count(T)
 
-
-def count_branch_vertices(VG, T):
     degree = {v: 0 for v in VG}
     for (u, v) in T:
         degree[u] += 1
@@ -53,21 +43,28 @@ def count_branch_vertices(VG, T):
     return branch_vertices
 
 
-def visualize_edges(VG, edges):
+def visualize_edges(VG, edges, title="MBVST Solution Graph", name="solution", EG=None):
+    """
+    Draw an edge set over VG (no-op unless visualization is enabled),
+    in the layout of the instance graph (VG, EG) if EG is given.
+    """
+    if not viz.enabled():
+        return
 
-    G = nx.Graph()
-    G.add_nodes_from(VG)
-    G.add_edges_from(edges)
+    def draw(ax):
+        G = nx.Graph()
+        G.add_nodes_from(VG)
+        G.add_edges_from(edges)
+
+        pos = viz.get_layout(VG, edges if EG is None else EG)
+        nx.draw_networkx_nodes(G, pos, ax=ax, node_color='lightblue', node_size=600)
+        nx.draw_networkx_edges(G, pos, ax=ax, edgelist=edges, width=2, edge_color='orange')
+        nx.draw_networkx_labels(G, pos, ax=ax, font_size=12, font_weight='bold')
 
-    pos = nx.spring_layout(G, seed=42)  # layout for visualization
-    plt.figure(figsize=(8,6))
-    nx.draw_networkx_nodes(G, pos, node_color='lightblue', node_size=600)
-    nx.draw_networkx_edges(G, pos, edgelist=edges, width=2, edge_color='orange')
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight='bold')
+        ax.set_title(title)
+        ax.axis('off')
 
-    plt.title("MBVST Solution Graph")
-    plt.axis('off')
-    plt.show()
+    viz.render(draw, name=name)
 
 
 def draw_graph_ax(ax, VG, edges, cycles=None, iteration=0, pos=None):
@@ -77,7 +74,7 @@ def draw_graph_ax(ax, VG, edges, cycles=None, iteration=0, pos=None):
     G.add_edges_from(edges)
 
     if pos is None:
-        pos = nx.spring_layout(G, seed=42)  # consistent layout
+        pos = viz.get_layout(VG, edges)  # consistent layout
 
     ax.set_title(f"Iter {iteration + 1}")
     ax.axis('off')
@@ -98,50 +95,57 @@ def draw_solution(G, T, title="MBVST Solution"):
     """
     Draw original graph G with solution tree T highlighted.
     """
+    if not viz.enabled():
+        return
+
     if G.number_of_nodes() > 100:
         print("Graph too large to draw.")
         return
 
-    # Use same layout for both graphs
-    pos = nx.spring_layout(G, seed=42)
-
-    # File-based labels (1-based)
-    labels = {v: v + 1 for v in G.nodes()}
-
-    plt.figure(figsize=(8, 6))
-
-    # Draw all edges in light gray
-    nx.draw_networkx_edges(
-        G,
-        pos,
-        edge_color="lightgray",
-        width=1
-    )
-
-    # Draw solution edges in red
-    nx.draw_networkx_edges(
-        T,
-        pos,
-        edge_color="red",
-        width=2
-    )
-
-    # Draw nodes
-    nx.draw_networkx_nodes(
-        G,
-        pos,
-        node_color="skyblue",
-        node_size=500
-    )
-
-    # Draw labels
-    nx.draw_networkx_labels(
-        G,
-        pos,
-        labels=labels,
-        font_size=10
-    )
-
-    plt.title(title)
-    plt.axis("off")
-    plt.show()
+    def draw(ax):
+        # Use same layout for both graphs
+        pos = viz.get_layout(list(G.nodes()), list(G.edges()))
+
+        # File-based labels (1-based)
+        labels = {v: v + 1 for v in G.nodes()}
+
+        # Draw all edges in light gray
+        nx.draw_networkx_edges(
+            G,
+            pos,
+            ax=ax,
+            edge_color="lightgray",
+            width=1
+        )
+
+        # Draw solution edges in red
+        nx.draw_networkx_edges(
+            T,
+            pos,
+            ax=ax,
+            edge_color="red",
+            width=2
+        )
+
+        # Draw nodes
+        nx.draw_networkx_nodes(
+            G,
+            pos,
+            ax=ax,
+            node_color="skyblue",
+            node_size=500
+        )
+
+        # Draw labels
+        nx.draw_networkx_labels(
+            G,
+            pos,
+            ax=ax,
+            labels=labels,
+            font_size=10
+        )
+
+        ax.set_title(title)
+        ax.axis("off")
+
+    viz.render(draw, name="solution_on_graph")
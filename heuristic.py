@@ -1,183 +1,648 @@
 import time
-import networkx as nx
-
-from ple import mbvst_relaxed_PLNE
+import random
+
+from ple import (
+    mbvst_relaxed_PLNE,
+    optimize_relaxed,
+    add_no_good_cut,
+    add_cycle_cuts,
+    set_warm_start,
+    selected_edges as model_selection,
+)
 from reconnect import reconnect_component
-from cycle import break_cycles_intelligently
-from helper import visualize_edges
+from cycle import break_cycles_intelligently, fundamental_cycles
+from helper import visualize_edges, count_branch_vertices
+from instance_index import InstanceIndex
+from union_find import UnionFind
+from constructive import constructive_spanning_tree
+from local_search import improve_tree
+from reduction import reduce_instance
+from lower_bound import structural_bound
+from instrument import event, timer
 
 
 # ============================================================
 # Fallback solution
 # ============================================================
 
-def fallback_spanning_tree(VG, EG):
+def fallback_spanning_tree(VG, EG, index=None):
     """
-    Always returns a valid spanning tree using BFS.
+    Always returns a valid spanning tree, without any solver
+    (path-like construction + leaf repair, see constructive.py).
     Used only if the heuristic fails completely.
     """
-    print("[FALLBACK] Building BFS spanning tree (no optimization).")
-
-    G = nx.Graph()
-    G.add_nodes_from(VG)
-    G.add_edges_from(EG)
+    event("fallback_start")
 
-    if not nx.is_connected(G):
+    try:
+        edges = constructive_spanning_tree(VG, EG, index=index)
+    except ValueError:
         raise ValueError("[FALLBACK ERROR] Original graph is not connected.")
 
-    T = nx.bfs_tree(G, source=VG[0])
-    edges = list(T.edges())
+    if index is None:
+        branch_vertices = count_branch_vertices(VG, edges)
+    else:
+        branch_vertices = index.branch_count(edges)
+    event("fallback", branch_vertices=branch_vertices)
+
+    return edges, branch_vertices
+
+
+# ============================================================
+# Solver-free heuristic
+# ============================================================
+
+def heuristic_constructive(VG, EG, index=None, local_search_time=1.0,
+                           reduce=False):
+    """
+    Solver-free heuristic for the MBVST, for hosts without a MILP
+    license or instances beyond MILP reach.
+
+    Path-like tree construction followed by leaf-aware repair,
+    in O(m log n), then edge-exchange local search for at most
+    `local_search_time` seconds. Same return as heuristic_cycle_basis.
+    """
+    if reduce:
+        return _solve_on_kernel(
+            lambda kernel: heuristic_constructive(
+                kernel.VG, kernel.EG, index=kernel.index,
+                local_search_time=local_search_time
+            ),
+            VG, EG, index
+        )
+
+    event("constructive_start")
+    start_time = time.time()
+
+    if index is None:
+        index = InstanceIndex(VG, EG)
+
+    with timer("construct"):
+        edges = constructive_spanning_tree(VG, EG, index=index)
+
+    if local_search_time > 0:
+        with timer("local_search"):
+            edges, branch_vertices = improve_tree(
+                VG, EG, edges, time_limit=local_search_time, index=index
+            )
+    else:
+        branch_vertices = index.branch_count(edges)
 
-    branch_vertices = sum(1 for v in VG if T.degree(v) >= 3)
-    print(f"[FALLBACK] Branch vertices: {branch_vertices}")
+    event("constructive_done", runtime=time.time() - start_time,
+          branch_vertices=branch_vertices)
 
     return edges, branch_vertices
 
 
+# ============================================================
+# Kernel solving
+# ============================================================
+
+def _solve_on_kernel(solve, VG, EG, index):
+    """
+    Run solve(kernel) -> (kernel tree, obj) on the reduced instance
+    (see reduction.py) and lift the tree back.
+    Returns (tree_edges, branch_vertices) on the original graph.
+    """
+    with timer("reduce"):
+        kernel = reduce_instance(VG, EG, index=index)
+    event("kernel", summary=kernel.summary(), n=kernel.n, m=kernel.m,
+          fixed_branches=kernel.fixed_branches)
+
+    tree = []
+    if kernel.m > 0:
+        tree, _ = solve(kernel)
+
+    with timer("lift"):
+        tree = kernel.lift(tree)
+    branch_vertices = count_branch_vertices(VG, tree)
+    event("kernel_result", branch_vertices=branch_vertices)
+
+    return tree, branch_vertices
+
+
+def _solutions_on_kernel(solve, VG, EG, index):
+    """
+    Generator version of _solve_on_kernel: solve(kernel) yields kernel
+    solutions (see heuristic_solutions), yielded here lifted to the
+    original graph, with their time counted from before the reduction.
+    """
+    start_time = time.time()
+    with timer("reduce"):
+        kernel = reduce_instance(VG, EG, index=index)
+    event("kernel", summary=kernel.summary(), n=kernel.n, m=kernel.m,
+          fixed_branches=kernel.fixed_branches)
+
+    if kernel.m > 0:
+        solutions = solve(kernel)
+    else:
+        solutions = [_solution([], 0, start_time, "reduction", 0)]
+
+    branch_vertices = None
+    for solution in solutions:
+        with timer("lift"):
+            tree = kernel.lift(solution["tree"])
+        branch_vertices = count_branch_vertices(VG, tree)
+        yield _solution(
+            tree, branch_vertices, start_time,
+            solution["source"], solution["iteration"]
+        )
+
+    event("kernel_result", branch_vertices=branch_vertices)
+
+
+def _solution(tree, branch_vertices, start_time, source, iteration):
+    now = time.time()
+    return {
+        "tree": tree,
+        "branch_vertices": branch_vertices,
+        "timestamp": now,
+        "elapsed": now - start_time,
+        "source": source,
+        "iteration": iteration,
+    }
+
+
+# ============================================================
+# Repair of a relaxed selection
+# ============================================================
+
+def _repair_selection(selected_edges, VG, EG, dG, index, max_components,
+                      stats, vertex_rank=None, cycle_rule="degree", rng=None):
+    """
+    Turn a MILP edge selection into a spanning tree.
+    Returns (tree_edges, broken_cycles), or None if the selection is
+    discarded. Fills stats["components"] and stats["removed"].
+
+    Tie-breaking: reconnection by `vertex_rank` (see reconnect.py),
+    cycle breaking by `cycle_rule` (see cycle.py), then by the order of
+    the selection, shuffled first if `rng` is given.
+    """
+    vertex_id = index.vertex_id
+    uf = UnionFind(len(VG))
+    for (u, v) in selected_edges:
+        uf.union(vertex_id[u], vertex_id[v])
+
+    nb_components = uf.components
+    stats["components"] = nb_components
+
+    # Already a spanning tree (always the case in lazy mode)
+    if nb_components == 1 and len(selected_edges) == len(VG) - 1:
+        return selected_edges, []
+
+    # --------------------------------------------------
+    # Fragmentation check
+    # --------------------------------------------------
+    if nb_components > max_components:
+        event("too_fragmented", components=nb_components,
+              max_components=max_components)
+        return None
+
+    # --------------------------------------------------
+    # Reconnect components
+    # --------------------------------------------------
+    try:
+        with timer("reconnect"):
+            selected_edges = reconnect_component(
+                selected_edges, VG, EG, dG, index=index, rank=vertex_rank
+            )
+    except ValueError as e:
+        event("reconnect_failed", error=str(e))
+        return None
+
+    # --------------------------------------------------
+    # Break cycles (Kruskal pass, see cycle.py)
+    # --------------------------------------------------
+    try:
+        with timer("break_cycles"):
+            if rng is not None:
+                selected_edges = list(selected_edges)
+                rng.shuffle(selected_edges)
+            tree_edges, removed_edges = break_cycles_intelligently(
+                selected_edges, VG, index=index, rule=cycle_rule
+            )
+            if len(tree_edges) != len(VG) - 1:
+                event("still_disconnected")
+                return None
+            cycles = fundamental_cycles(tree_edges, removed_edges, VG, index=index)
+        stats["removed"] = len(removed_edges)
+        event("cycles_broken", removed=len(removed_edges))
+    except Exception as e:
+        event("cycle_break_failed", error=str(e))
+        return None
+
+    return tree_edges, cycles
+
+
 # ============================================================
 # Main heuristic
 # ============================================================
 
-def heuristic_cycle_basis(VG, EG, max_iter=50, max_components=5):
+def heuristic_cycle_basis(VG, EG, max_iter=50, max_components=5, index=None,
+                          lazy=False, local_search_time=1.0, threads=None,
+                          backend=None, reduce=False, lower_bound=None,
+                          seed=None, perturb=0.0, cycle_rule="degree",
+                          time_limit=None, shared_best=None,
+                          callback=None):
     """
     Heuristic solver for the Minimum Branch Vertices Spanning Tree (MBVST).
 
-    Steps per iteration:
-      1) Solve relaxed MILP (acyclicity relaxed)
+    The relaxed MILP is built once per instance. Steps per iteration:
+      1) Re-optimize the relaxed MILP (acyclicity relaxed)
       2) Discard overly fragmented solutions
       3) Reconnect components
       4) Break remaining cycles heuristically
       5) Evaluate number of branch vertices
       6) Keep the best solution found
+      7) Cut off the current selection and the broken cycles,
+         warm start the next solve from the repaired tree
+
+    The best tree is then improved by edge-exchange local search
+    for at most `local_search_time` seconds. `threads` caps the
+    solver threads (None = solver default), `backend` names the MILP
+    solver (see milp_backend.py).
+
+    `index` is the shared InstanceIndex, built here if not given.
+    With lazy=True the MILP separates subtours itself and returns
+    spanning trees, so steps 2-4 are skipped. With reduce=True all of
+    the above runs on the kernel of the instance (see reduction.py).
+
+    The search stops as soon as the incumbent reaches `lower_bound`
+    (default: the structural bound of lower_bound.py), or after
+    `time_limit` seconds (local search included) if given.
+
+    Strategy knobs, for the portfolio mode (see heuristic_portfolio):
+      - seed       : solver seed, and random tie-breaking in the
+                     reconnection and the cycle breaking
+      - perturb    : random objective costs in [0, perturb / n) on the
+                     edges (perturb <= 1 keeps the branch count first)
+      - cycle_rule : tie-break rule of break_cycles_intelligently
+      - shared_best: multiprocessing Value holding the best branch
+                     count of all workers; read to stop once any worker
+                     reaches the bound, updated on every improvement
+
+    `callback(solution)` is called on every improving solution as soon
+    as it is found (see heuristic_solutions for the iterator form).
     """
 
-    print("[INFO] Starting MBVST heuristic")
+    first = best = None
+    for solution in heuristic_solutions(
+        VG, EG, max_iter=max_iter, max_components=max_components,
+        index=index, lazy=lazy, local_search_time=local_search_time,
+        threads=threads, backend=backend, reduce=reduce,
+        lower_bound=lower_bound, seed=seed, perturb=perturb,
+        cycle_rule=cycle_rule, time_limit=time_limit,
+        shared_best=shared_best
+    ):
+        if first is None and solution["source"] == "milp":
+            first = solution
+        best = solution
+        if callback is not None:
+            callback(solution)
+
+    # ==================================================
+    # Visualizations
+    # ==================================================
+    # (no-op in headless mode, background rendering in file mode)
+    if first is not None:
+        visualize_edges(
+            VG, first["tree"],
+            title="First valid solution", name="first_solution", EG=EG
+        )
+
+    visualize_edges(
+        VG, best["tree"],
+        title="Best final solution", name="best_solution", EG=EG
+    )
+
+    return best["tree"], best["branch_vertices"]
+
+
+def heuristic_solutions(VG, EG, max_iter=50, max_components=5, index=None,
+                        lazy=False, local_search_time=1.0, threads=None,
+                        backend=None, reduce=False, lower_bound=None,
+                        seed=None, perturb=0.0, cycle_rule="degree",
+                        time_limit=None, shared_best=None):
+    """
+    Iterator form of heuristic_cycle_basis (same parameters): yields
+    every improving solution as soon as it is found, as a dict
+      - tree            : spanning tree edges
+      - branch_vertices : its number of branch vertices
+      - timestamp       : time.time() when it was found
+      - elapsed         : seconds since the start of the search
+      - source          : "milp", "local_search", "fallback",
+                          "constructive" (first solution under a
+                          time_limit), "reduction" (fully reduced instance)
+      - iteration       : heuristic iteration (None for local search)
+    Branch counts strictly decrease; the last solution is the result.
+    Stopping the iteration early stops the search, so a caller can
+    hold the best answer at any deadline and record time-to-target.
+    """
+
+    if reduce:
+        yield from _solutions_on_kernel(
+            lambda kernel: heuristic_solutions(
+                kernel.VG, kernel.EG, max_iter=max_iter,
+                max_components=max_components, index=kernel.index,
+                lazy=lazy, local_search_time=local_search_time,
+                threads=threads, backend=backend,
+                lower_bound=(None if lower_bound is None
+                             else lower_bound - kernel.fixed_branches),
+                seed=seed, perturb=perturb, cycle_rule=cycle_rule,
+                time_limit=time_limit, shared_best=shared_best
+            ),
+            VG, EG, index
+        )
+        return
+
+    event("heuristic_start", n=len(VG), m=len(EG))
     start_time = time.time()
+    deadline = None if time_limit is None else start_time + time_limit
 
     # --------------------------------------------------
-    # Precompute original degrees
+    # Shared instance index (degrees, incidence, bridges...)
     # --------------------------------------------------
-    dG = {v: 0 for v in VG}
-    for u, v in EG:
-        dG[u] += 1
-        dG[v] += 1
+    if index is None:
+        index = InstanceIndex(VG, EG)
+    dG = index.dG
+
+    if lower_bound is None:
+        with timer("lower_bound"):
+            lower_bound = structural_bound(VG, EG, index=index)
+    event("lower_bound", bound=lower_bound)
 
     best_solution = None
     best_obj = float("inf")
-    first_solution_edges = None
+
+    # Under a deadline, a solver-free tree is available right away
+    if deadline is not None:
+        with timer("construct"):
+            best_solution = constructive_spanning_tree(VG, EG, index=index)
+        best_obj = index.branch_count(best_solution)
+        if shared_best is not None:
+            _publish_best(shared_best, best_obj)
+        yield _solution(best_solution, best_obj, start_time, "constructive", 0)
+
+    # Strategy randomization (none by default: deterministic run)
+    rng = None if seed is None else random.Random(seed)
+    vertex_rank = None
+    if rng is not None:
+        vertex_rank = list(range(index.n))
+        rng.shuffle(vertex_rank)
+
+    edge_costs = None
+    if perturb > 0:
+        rng_costs = rng if rng is not None else random.Random()
+        edge_costs = [perturb * rng_costs.random() / index.n for _ in range(index.m)]
+
+    # --------------------------------------------------
+    # Build the relaxed MILP once
+    # --------------------------------------------------
+    try:
+        with timer("model_build"):
+            model, x_vars, y_vars = mbvst_relaxed_PLNE(
+                VG, EG, index=index, lazy=lazy, backend=backend,
+                edge_costs=edge_costs
+            )
+            model.set_params(threads=threads, seed=seed)
+    except Exception as e:
+        event("model_error", error=str(e))
+        model = None
+        max_iter = 0
 
     # ==================================================
     # Main loop
     # ==================================================
     for it in range(max_iter):
-        print(f"\n[ITERATION {it + 1}]")
-
-        # --------------------------------------------------
-        # 1) Solve relaxed MILP
-        # --------------------------------------------------
-        try:
-            model, x_vars, y_vars = mbvst_relaxed_PLNE(VG, EG)
-            model.optimize()
-        except Exception as e:
-            print(f"[ERROR] MILP solver crashed: {e}")
-            continue
-
-        if model.SolCount == 0:
-            print("[WARNING] MILP returned no feasible solution.")
-            continue
-
-        selected_edges = [e for e in EG if x_vars[e].X > 0.5]
-        print(f"[INFO] MILP selected {len(selected_edges)} edges")
+        # Nothing better exists
+        if best_obj <= lower_bound or (
+                shared_best is not None and shared_best.value <= lower_bound):
+            event("bound_reached", bound=lower_bound)
+            break
 
-        # --------------------------------------------------
-        # 2) Build solution graph
-        # --------------------------------------------------
-        G = nx.Graph()
-        G.add_nodes_from(VG)
-        G.add_edges_from(selected_edges)
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                event("time_limit", iteration=it + 1)
+                break
+            model.set_params(time_limit=remaining)
 
-        # --------------------------------------------------
-        # 3) Fragmentation check
-        # --------------------------------------------------
-        nb_components = nx.number_connected_components(G)
-        if nb_components > max_components:
-            print(
-                f"[WARNING] Too many connected components "
-                f"({nb_components} > {max_components}). Iteration skipped."
-            )
-            continue
+        event("iteration_start", iteration=it + 1)
 
         # --------------------------------------------------
-        # 4) Reconnect components
+        # 1) Re-optimize relaxed MILP
         # --------------------------------------------------
         try:
-            selected_edges = reconnect_component(
-                selected_edges, VG, EG, dG
-            )
-        except ValueError as e:
-            print(f"[ERROR] Reconnection failed: {e}")
-            continue
+            with timer("optimize"):
+                optimize_relaxed(model)
+        except Exception as e:
+            event("solver_error", error=str(e))
+            break
 
-        G = nx.Graph()
-        G.add_nodes_from(VG)
-        G.add_edges_from(selected_edges)
+        if not model.has_solution:
+            event("no_solution", status=model.status)
+            break
 
-        if not nx.is_connected(G):
-            print("[ERROR] Graph still disconnected after reconnection.")
-            continue
+        selected_edges = model_selection(model, x_vars)
+        event("selection", iteration=it + 1, status=model.status,
+              selected=len(selected_edges))
+
+        # Never return this selection again
+        add_no_good_cut(model, x_vars, selected_edges)
 
         # --------------------------------------------------
-        # 5) Break cycles
+        # 2-4) Repair into a spanning tree (skipped for trees)
         # --------------------------------------------------
-        try:
-            removed_edges = break_cycles_intelligently(G)
-            print(f"[INFO] Removed {len(removed_edges)} cycle edges")
-        except Exception as e:
-            print(f"[ERROR] Cycle breaking failed: {e}")
+        stats = {"components": None, "removed": 0}
+        repaired = _repair_selection(
+            selected_edges, VG, EG, dG, index, max_components, stats,
+            vertex_rank=vertex_rank, cycle_rule=cycle_rule, rng=rng
+        )
+        if repaired is None:
+            event("iteration", iteration=it + 1, status=model.status,
+                  selected=len(selected_edges), branch_vertices=None,
+                  improved=False, **stats)
             continue
+        final_edges, cycles = repaired
 
-        final_edges = list(G.edges())
-
-        # Save first valid solution for visualization
-        if first_solution_edges is None:
-            first_solution_edges = final_edges
+        # Cycles of the repaired graph are invalid in any tree
+        add_cycle_cuts(model, x_vars, cycles)
+        set_warm_start(model, x_vars, y_vars, final_edges, index=index)
 
         # --------------------------------------------------
-        # 6) Evaluate solution
+        # 5) Evaluate solution
         # --------------------------------------------------
-        branch_vertices = sum(1 for v in VG if G.degree(v) >= 3)
-        print(f"[INFO] Branch vertices: {branch_vertices}")
+        with timer("evaluation"):
+            branch_vertices = index.branch_count(final_edges)
 
         # --------------------------------------------------
-        # 7) Update best solution
+        # 6) Update best solution
         # --------------------------------------------------
-        if branch_vertices < best_obj:
+        improved = branch_vertices < best_obj
+        if improved:
             best_obj = branch_vertices
             best_solution = final_edges
-            print("[SUCCESS] New best solution found")
+            if shared_best is not None:
+                _publish_best(shared_best, best_obj)
+
+        event("iteration", iteration=it + 1, status=model.status,
+              selected=len(selected_edges), branch_vertices=branch_vertices,
+              improved=improved, **stats)
+
+        if improved:
+            yield _solution(best_solution, best_obj, start_time, "milp", it + 1)
 
     # ==================================================
     # Final safety check
     # ==================================================
     if best_solution is None:
-        print("[WARNING] No valid solution found in all iterations.")
-        best_solution, best_obj = fallback_spanning_tree(VG, EG)
-
-    elapsed = time.time() - start_time
-    print("\n[INFO] Heuristic finished")
-    print(f"[INFO] Total runtime: {elapsed:.3f} seconds")
-    print(f"[RESULT] Best number of branch vertices: {best_obj}")
+        event("no_valid_solution")
+        best_solution, best_obj = fallback_spanning_tree(VG, EG, index=index)
+        yield _solution(best_solution, best_obj, start_time, "fallback", 0)
 
     # ==================================================
-    # Visualizations
+    # Local search post-optimization
     # ==================================================
-    if first_solution_edges is not None:
-        print("[VISUAL] First valid solution")
-        visualize_edges(VG, first_solution_edges)
+    if deadline is not None:
+        local_search_time = min(local_search_time, deadline - time.time())
+    if shared_best is not None and shared_best.value <= lower_bound:
+        local_search_time = 0
+
+    if local_search_time > 0 and best_obj > lower_bound:
+        with timer("local_search"):
+            best_solution, ls_obj = improve_tree(
+                VG, EG, best_solution, time_limit=local_search_time, index=index
+            )
+        event("local_search", before=best_obj, after=ls_obj)
+        if ls_obj < best_obj:
+            best_obj = ls_obj
+            yield _solution(best_solution, best_obj, start_time, "local_search", None)
 
-    print("[VISUAL] Best final solution")
-    visualize_edges(VG, best_solution)
+    if shared_best is not None:
+        _publish_best(shared_best, best_obj)
 
-    return best_solution, best_obj
+    event("heuristic_done", runtime=time.time() - start_time,
+          branch_vertices=best_obj)
+
+
+# ============================================================
+# Portfolio mode
+# ============================================================
+#
+# Worker k runs heuristic_cycle_basis with strategy k on the same
+# (reduced) instance; strategy 0 is the deterministic default, so a
+# portfolio never does worse than a single run given the same time.
+
+PORTFOLIO_STRATEGIES = [
+    {},
+    {"seed": 1, "cycle_rule": "cost"},
+    {"seed": 2, "perturb": 1.0},
+    {"seed": 3, "perturb": 1.0, "cycle_rule": "cost"},
+]
 
 
+def portfolio_strategy(k):
+    """
+    Strategy of worker k: the table above, then seeded variations.
+    """
+    if k < len(PORTFOLIO_STRATEGIES):
+        return dict(PORTFOLIO_STRATEGIES[k])
+    return {
+        "seed": k,
+        "perturb": 1.0 if k % 2 else 0.0,
+        "cycle_rule": "degree" if (k // 2) % 2 else "cost",
+    }
+
+
+def _publish_best(shared_best, obj):
+    with shared_best.get_lock():
+        if obj < shared_best.value:
+            shared_best.value = obj
+
+
+def _portfolio_worker(VG, EG, deg_offset, strategy, options, shared_best):
+    """
+    One portfolio run in a worker process (module level for spawn).
+    """
+    import instrument
+    instrument.configure(console=False)
+
+    index = InstanceIndex(VG, EG, deg_offset=deg_offset)
+    return heuristic_cycle_basis(
+        VG, EG, index=index, shared_best=shared_best, **strategy, **options
+    )
+
+
+def heuristic_portfolio(VG, EG, workers=None, time_limit=60.0, index=None,
+                        reduce=False, lower_bound=None, **options):
+    """
+    Portfolio mode of heuristic_cycle_basis: `workers` processes
+    (default: one per core) run diverse strategies (solver seeds,
+    objective perturbations, reconnection and cycle-breaking ties,
+    see portfolio_strategy) for at most `time_limit` seconds.
+
+    Workers share the best branch count in shared memory: each stops
+    (and skips its local search) once any of them reaches the lower
+    bound. A worker overrunning its budget is killed after a grace
+    period. `options` are passed to heuristic_cycle_basis (max_iter,
+    local_search_time, backend...); solver threads default to an even
+    share of the cores.
+
+    Same return as heuristic_cycle_basis: the best tree of all workers.
+    """
+    import multiprocessing as mp
+    from batch_runner import run_jobs
+
+    if reduce:
+        return _solve_on_kernel(
+            lambda kernel: heuristic_portfolio(
+                kernel.VG, kernel.EG, workers=workers, time_limit=time_limit,
+                index=kernel.index,
+                lower_bound=(None if lower_bound is None
+                             else lower_bound - kernel.fixed_branches),
+                **options
+            ),
+            VG, EG, index
+        )
+
+    start_time = time.time()
+    if index is None:
+        index = InstanceIndex(VG, EG)
+    if lower_bound is None:
+        with timer("lower_bound"):
+            lower_bound = structural_bound(VG, EG, index=index)
+
+    cores = mp.cpu_count()
+    workers = workers or cores
+    options.setdefault("threads", max(1, cores // workers))
+    options["time_limit"] = time_limit
+    options["lower_bound"] = lower_bound
+
+    event("portfolio_start", workers=workers, time_limit=time_limit)
+
+    shared_best = mp.get_context("spawn").Value("i", 2 ** 31 - 1)
+    deg_offset = {v: off for v, off in index.deg_offset.items() if off}
+    jobs = [
+        (k, _portfolio_worker,
+         (index.VG, index.EG, deg_offset, portfolio_strategy(k), options, shared_best))
+        for k in range(workers)
+    ]
+
+    best_solution = None
+    best_obj = float("inf")
+    grace = 10 + 0.1 * time_limit
+    for k, result, error in run_jobs(jobs, workers, time_limit + grace):
+        if error is not None:
+            event("portfolio_worker", worker=k, error=error, branch_vertices=None)
+            continue
+        tree, obj = result
+        event("portfolio_worker", worker=k, error=None, branch_vertices=obj)
+        if obj < best_obj:
+            best_solution, best_obj = tree, obj
+
+    if best_solution is None:
+        event("no_valid_solution")
+        best_solution, best_obj = fallback_spanning_tree(VG, EG, index=index)
+
+    event("heuristic_done", runtime=time.time() - start_time,
+          branch_vertices=best_obj)
+    return best_solution, best_obj
@@ -0,0 +1,211 @@
+import os
+import sys
+
+import numpy as np
+
+
+# ============================================================
+# Synthetic instance generator
+# ============================================================
+#
+# Connected sparse graphs in the corpus format ("n m 0" / "u v 0",
+# 1-based ids, named Spd_RF2_<n>_<m>_<seed>.txt), written vertex by
+# vertex: memory is a few int arrays of size n, never the edge list.
+#
+# Construction, on positions 0..n-1 relabelled by a random permutation:
+#   - a spanning backbone (random recursive tree, or planted paths)
+#   - m - (n - 1) extra edges, uniform over the free vertex pairs of
+#     each segment (G(n, m)-like degrees), drawn per lower endpoint
+#
+# Planted optimum (planted=k): 2k + 1 segments S_0..S_2k and k hubs,
+# hub h joined by single edges to the end of S_2h and the starts of
+# S_2h+1 and S_2h+2 (a tree of segments). Segments are Hamiltonian
+# paths plus internal chords, so the hubs are cut vertices with 3
+# blocks (forced branch vertices, see lower_bound.py) and paths + hub
+# edges form a tree with exactly k branch vertices: the optimum is k
+# (0 = a planted Hamiltonian path).
+
+WRITE_BATCH = 1 << 16   # edge lines per write
+
+
+def instance_name(n, m, seed):
+    return f"Spd_RF2_{n}_{m}_{seed}.txt"
+
+
+def _segments(n, planted, rng):
+    """
+    (lo, hi) position ranges of the segments and the hub positions,
+    ordered S_0, h_0, S_1, S_2, h_1, S_3, S_4, ...
+    """
+    if planted is None:
+        return [(0, n)], []
+
+    k = planted
+    if n - k < 2 * k + 1:
+        raise ValueError(f"n={n} too small for {k} planted branch vertices")
+
+    # 2k + 1 non-empty segments over the n - k non-hub vertices
+    cuts = np.sort(rng.choice(np.arange(1, n - k), size=2 * k, replace=False))
+    sizes = np.diff(np.concatenate(([0], cuts, [n - k]))).tolist()
+
+    segments = []
+    hubs = []
+    pos = 0
+    for s, size in enumerate(sizes):
+        if s > 0 and s % 2 == 1:
+            hubs.append(pos)
+            pos += 1
+        segments.append((pos, pos + size))
+        pos += size
+    return segments, hubs
+
+
+def _backbone_parents(segments, n, planted, rng):
+    """
+    parent[i] < i inside each segment (-1 on segment starts):
+    i - 1 for planted paths, uniform earlier vertex otherwise.
+    """
+    parent = np.full(n, -1, dtype=np.int64)
+    for lo, hi in segments:
+        if hi - lo < 2:
+            continue
+        i = np.arange(lo + 1, hi)
+        if planted is None:
+            parent[lo + 1:hi] = lo + (rng.random(hi - lo - 1) * (i - lo)).astype(np.int64)
+        else:
+            parent[lo + 1:hi] = i - 1
+    return parent
+
+
+def _extra_counts(segments, n, parent, extra, rng):
+    """
+    Number of extra edges (i, j > i) per position, proportional to the
+    free pairs of i, capped to them. Raises ValueError if the segments
+    cannot hold `extra` more edges.
+    """
+    children = np.bincount(parent[parent >= 0], minlength=n)
+
+    cap = np.zeros(n, dtype=np.int64)
+    for lo, hi in segments:
+        cap[lo:hi] = (hi - 1 - np.arange(lo, hi)) - children[lo:hi]
+
+    total = int(cap.sum())
+    if extra > total:
+        raise ValueError(f"At most {total} extra edges fit, {extra} requested")
+    if extra == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    counts = np.minimum(rng.multinomial(extra, cap / total), cap)
+
+    # Overflow clipped above goes to the first positions with room
+    deficit = extra - int(counts.sum())
+    i = 0
+    while deficit > 0:
+        room = int(cap[i] - counts[i])
+        if room > 0:
+            take = min(room, deficit)
+            counts[i] += take
+            deficit -= take
+        i += 1
+    return counts
+
+
+def _sample_partners(i, hi, k, parent, rng):
+    """
+    k distinct j in (i, hi) that are not backbone children of i.
+    """
+    free = hi - 1 - i
+    if 2 * k >= free:
+        candidates = [j for j in range(i + 1, hi) if parent[j] != i]
+        return rng.choice(candidates, size=k, replace=False).tolist()
+
+    chosen = set()
+    while len(chosen) < k:
+        j = int(rng.integers(i + 1, hi))
+        if parent[j] != i:
+            chosen.add(j)
+    return list(chosen)
+
+
+def generate_instance(folder, n, m, seed=0, planted=None):
+    """
+    Write a connected instance with n vertices and m edges to `folder`.
+    planted=k plants an optimum of k branch vertices (see above).
+    Returns the path of the instance.
+    """
+    if n < 2:
+        raise ValueError("n must be at least 2")
+    if m < n - 1:
+        raise ValueError(f"A connected graph on {n} vertices needs m >= {n - 1}")
+
+    rng = np.random.default_rng(seed)
+
+    segments, hubs = _segments(n, planted, rng)
+    parent = _backbone_parents(segments, n, planted, rng)
+    counts = _extra_counts(segments, n, parent, m - (n - 1), rng).tolist()
+    label = (rng.permutation(n) + 1).tolist()
+    parent = parent.tolist()
+
+    # Hub edges: end of S_2h, starts of S_2h+1 and S_2h+2
+    hub_edges = []
+    for h, hub in enumerate(hubs):
+        before = segments[2 * h]
+        hub_edges += [
+            (before[1] - 1, hub),
+            (hub, segments[2 * h + 1][0]),
+            (hub, segments[2 * h + 2][0]),
+        ]
+
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, instance_name(n, m, seed))
+
+    with open(path, "w") as f:
+        f.write(f"{n} {m} 0\n")
+
+        lines = [f"{label[a]} {label[b]} 0\n" for a, b in hub_edges]
+        for lo, hi in segments:
+            for i in range(lo, hi):
+                if parent[i] >= 0:
+                    lines.append(f"{label[parent[i]]} {label[i]} 0\n")
+                if counts[i]:
+                    for j in _sample_partners(i, hi, counts[i], parent, rng):
+                        lines.append(f"{label[i]} {label[j]} 0\n")
+
+                if len(lines) >= WRITE_BATCH:
+                    f.write("".join(lines))
+                    lines = []
+
+        f.write("".join(lines))
+
+    return path
+
+
+def edges_for_degree(n, average_degree):
+    """
+    Edge count of an n-vertex instance with the given average degree.
+    """
+    return max(n - 1, round(n * average_degree / 2))
+
+
+# ============================================================
+# Command line
+# ============================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5, 6):
+        print(
+            "Usage: python instance_gen.py <folder> <n> <m | average degree> "
+            "[seed] [planted branch vertices]"
+        )
+        sys.exit(1)
+
+    n = int(sys.argv[2])
+    size = sys.argv[3]
+    m = edges_for_degree(n, float(size)) if "." in size else int(size)
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    planted = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    path = generate_instance(sys.argv[1], n, m, seed=seed, planted=planted)
+    print(f"[DONE] {path}")
+    if planted is not None:
+        print(f"[INFO] Planted optimum: {planted} branch vertices")
@@ -0,0 +1,160 @@
+import numpy as np
+
+from graph_core import CsrGraph, EdgeIds, VertexValues
+
+
+class InstanceIndex:
+    """
+    Per-instance graph data, computed once from the loader and
+    shared by the MILP, the reconnection and the heuristic loop.
+
+    - core                : CsrGraph on vertex ids (see graph_core.py)
+    - vertex_id / edge_id : label lookups (edge_id accepts both
+                            orientations, binary search in the core)
+    - src, dst            : int32 endpoint ids of edge i = EG[i]
+    - inc_ptr, inc_edges  : CSR incidence, edges of vertex i are
+                            inc_edges[inc_ptr[i]:inc_ptr[i + 1]]
+    - dG                  : original degrees
+    - deg_offset          : tree degree each vertex gets from edges outside
+                            EG (kernels, see reduction.py), 0 by default
+    - bridge_ids, cycle_basis : computed on first use, then cached
+    """
+
+    def __init__(self, VG, EG, deg_offset=None, core=None):
+        self.VG = list(VG)
+        self.EG = list(EG)
+        self.n = len(self.VG)
+        self.m = len(self.EG)
+
+        self.vertex_id = {v: i for i, v in enumerate(self.VG)}
+
+        if core is None:
+            vertex_id = self.vertex_id
+            src = np.fromiter(
+                (vertex_id[u] for u, _ in self.EG), dtype=np.int32, count=self.m
+            )
+            dst = np.fromiter(
+                (vertex_id[v] for _, v in self.EG), dtype=np.int32, count=self.m
+            )
+            core = CsrGraph(self.n, src, dst)
+
+        self.core = core
+        self.src = core.src
+        self.dst = core.dst
+        self.inc_ptr = core.ptr
+        self.inc_edges = core.eid
+        self.degree = core.degree
+
+        self.edge_id = EdgeIds(core, self.vertex_id, self.EG)
+        self.dG = VertexValues(self.VG, self.vertex_id, core.degree)
+
+        self.offset = np.zeros(self.n, dtype=np.int64)
+        if deg_offset:
+            for v, d in deg_offset.items():
+                i = self.vertex_id.get(v)
+                if i is not None:
+                    self.offset[i] = d
+        self.deg_offset = VertexValues(self.VG, self.vertex_id, self.offset)
+
+        self._bridge_ids = None
+        self._cycle_basis = None
+
+    @classmethod
+    def from_arrays(cls, n, edges, deg_offset=None):
+        """
+        Index of an (n, int32 edges (m, 2)) instance as loaded by
+        instance_io, labels = vertex ids. No per-edge Python work
+        besides the EG list.
+        """
+        core = CsrGraph.from_edges(n, edges)
+        EG = list(zip(core.src.tolist(), core.dst.tolist()))
+        return cls(range(n), EG, deg_offset=deg_offset, core=core)
+
+    # --------------------------------------------------
+    # Edge lookup
+    # --------------------------------------------------
+    def has_edge(self, u, v):
+        return (u, v) in self.edge_id
+
+    def edge_key(self, u, v):
+        """
+        Return the edge as stored in EG, or None if absent.
+        """
+        i = self.edge_id.get((u, v))
+        return None if i is None else self.EG[i]
+
+    def edge_ids(self, edges):
+        """
+        Vectorized edge_id over a list of edges (-1 if absent).
+        """
+        vertex_id = self.vertex_id
+        a = [vertex_id[u] for u, _ in edges]
+        b = [vertex_id[v] for _, v in edges]
+        return self.core.find_edges(a, b)
+
+    def incident_ids(self, v):
+        return self.core.incident(self.vertex_id[v])
+
+    def incident_edges(self, v):
+        EG = self.EG
+        return [EG[i] for i in self.incident_ids(v).tolist()]
+
+    def cycle_edges(self, cycle):
+        """
+        Map a cycle given as a vertex list to EG edges.
+        """
+        cycle_edges = []
+        for i in range(len(cycle)):
+            e = self.edge_key(cycle[i], cycle[(i + 1) % len(cycle)])
+            if e is not None:
+                cycle_edges.append(e)
+        return cycle_edges
+
+    def branch_count(self, tree_edges):
+        """
+        Branch vertices of a tree over EG, counting degree offsets.
+        Raises ValueError if an edge is not in EG.
+        """
+        ids = self.edge_ids(tree_edges)
+        if np.any(ids < 0):
+            missing = tree_edges[int(np.flatnonzero(ids < 0)[0])]
+            raise ValueError(f"Edge {missing} is not in the instance")
+        ends = np.concatenate([self.src[ids], self.dst[ids]])
+        degree = np.bincount(ends, minlength=self.n) + self.offset
+        return int(np.count_nonzero(degree >= 3))
+
+    # --------------------------------------------------
+    # Cached structure
+    # --------------------------------------------------
+    @property
+    def bridge_ids(self):
+        if self._bridge_ids is None:
+            self._bridge_ids = self.core.bridges()
+        return self._bridge_ids
+
+    @property
+    def bridges(self):
+        """
+        Bridges, oriented as in EG.
+        """
+        EG = self.EG
+        return [EG[i] for i in self.bridge_ids]
+
+    @property
+    def cycle_basis(self):
+        """
+        Fundamental cycles as vertex label lists.
+        """
+        if self._cycle_basis is None:
+            VG = self.VG
+            self._cycle_basis = [
+                [VG[a] for a in cycle] for cycle in self.core.cycle_basis()
+            ]
+        return self._cycle_basis
+
+    def cycle_basis_edges(self):
+        """
+        The same cycles as lists of EG edges, without edge lookups.
+        """
+        EG = self.EG
+        return [[EG[i] for i in cycle] for cycle in self.core.cycle_basis(as_edges=True)]
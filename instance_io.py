@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import struct
+
+import numpy as np
+
+
+# ============================================================
+# Fast instance loading
+# ============================================================
+#
+# Canonical in-memory form of an instance: (n, edges) where edges is an
+# int32 array of shape (m, 2) with 0-based vertex ids.
+
+def parse_instance_text(data, source="<text>"):
+    """
+    Parse "n m 0" / "u v 0" text (1-based ids) with vectorized NumPy.
+    """
+    header, _, body = data.partition(b"\n")
+    header = header.split()
+    if len(header) < 2:
+        raise ValueError(f"Missing header in {source}")
+
+    n = int(header[0])
+    m = int(header[1])
+
+    # Text-mode fromstring parses all whitespace-separated integers in C
+    values = np.fromstring(body, dtype=np.int64, sep=" ")
+    width = len(values) // m if m else 2
+    if width < 2 or len(values) != width * m:
+        raise ValueError(f"Edge count mismatch in {source}")
+
+    table = values.reshape(m, width)
+    edges = (table[:, :2] - 1).astype(np.int32)
+
+    if m and (edges.min() < 0 or edges.max() >= n):
+        raise ValueError(f"Vertex id out of range in {source}")
+
+    return n, edges
+
+
+def load_edge_array(path):
+    """
+    Load an instance file as (n, int32 edges (m, 2), 0-based).
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"File not found: {path}")
+
+    with open(path, "rb") as f:
+        return parse_instance_text(f.read(), source=path)
+
+
+# ============================================================
+# Packed binary corpus
+# ============================================================
+#
+# Layout:
+#   8 bytes   magic
+#   8 bytes   header length (little-endian uint64)
+#   header    JSON {"instances": {name: [n, m, offset]}}, padded to 8 bytes
+#   data      int32 edge arrays, `offset` counted in int32 from data start
+
+CORPUS_MAGIC = b"MBVSTC01"
+
+
+def pack_corpus(folder, out_path):
+    """
+    Pack every .txt instance of `folder` into one corpus file.
+    Returns the number of instances packed.
+    """
+    names = sorted(f for f in os.listdir(folder) if f.endswith(".txt"))
+
+    arrays = []
+    table = {}
+    offset = 0
+    for name in names:
+        n, edges = load_edge_array(os.path.join(folder, name))
+        table[name] = [n, len(edges), offset]
+        arrays.append(edges)
+        offset += edges.size
+
+    header = json.dumps({"instances": table}).encode()
+    header += b" " * (-len(header) % 8)
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CORPUS_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for edges in arrays:
+            f.write(np.ascontiguousarray(edges, dtype="<i4").tobytes())
+    os.replace(tmp, out_path)
+
+    return len(names)
+
+
+class Corpus:
+    """
+    Memory-mapped corpus: get(name) returns (n, edges) where edges is
+    a zero-copy view into the file, shared by all processes mapping it.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(8) != CORPUS_MAGIC:
+                raise ValueError(f"Not an instance corpus: {path}")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            self.table = json.loads(f.read(header_len))["instances"]
+
+        self.path = path
+        self.data = np.memmap(
+            path, dtype="<i4", mode="r", offset=16 + header_len
+        )
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, name):
+        return name in self.table
+
+    def names(self):
+        return sorted(self.table)
+
+    def get(self, name):
+        n, m, offset = self.table[name]
+        return n, self.data[offset:offset + 2 * m].reshape(m, 2)
+
+
+# ============================================================
+# Command line
+# ============================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "pack":
+        print("Usage: python instance_io.py pack <instance_folder> <corpus_file>")
+        sys.exit(1)
+
+    count = pack_corpus(sys.argv[2], sys.argv[3])
+    print(f"[DONE] Packed {count} instances into {sys.argv[3]}")
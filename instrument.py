@@ -0,0 +1,310 @@
+import sys
+import json
+import time
+import contextlib
+
+
+# ============================================================
+# Instrumentation: events, stage timers, peak memory
+# ============================================================
+#
+# Code reports through event(name, **fields) and `with timer(stage):`.
+# Both dispatch to the installed sinks; with no sink installed, event()
+# returns immediately and timer() hands out a shared no-op context
+# manager, so the instrumented code pays a function call and nothing
+# else.
+#
+# Sinks:
+#   ConsoleSink : the human-readable progress lines (installed by default)
+#   JsonlSink   : one JSON object per event / timing, appended to a file
+#   Recorder    : in-memory stage totals and peak RSS (see recording())
+
+_sinks = []
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def add_sink(sink):
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def configure(console=None):
+    """
+    console=False silences the progress lines, console=True restores them.
+    """
+    if console is None:
+        return
+
+    consoles = [s for s in _sinks if isinstance(s, ConsoleSink)]
+    if console and not consoles:
+        _sinks.insert(0, ConsoleSink())
+    elif not console:
+        for sink in consoles:
+            _sinks.remove(sink)
+
+
+def solver_verbose():
+    """
+    `verbose` for MILP backends (set_params): False while the progress
+    lines are off (configure(console=False), quiet()), None otherwise
+    so each solver keeps its default log.
+    """
+    return None if any(isinstance(s, ConsoleSink) for s in _sinks) else False
+
+
+def event(name, **fields):
+    if not _sinks:
+        return
+
+    fields["event"] = name
+    for sink in _sinks:
+        sink.event(fields)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        for sink in _sinks:
+            sink.timing(self.stage, elapsed)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage):
+    if not _sinks:
+        return _NULL_TIMER
+    return _Timer(stage)
+
+
+def reset_peak_rss():
+    """
+    Restart the peak RSS measurement of this process from its current
+    size (Linux: VmHWM reset through /proc/self/clear_refs). Returns
+    False where the peak cannot be reset: peak_rss_mb() then covers
+    the whole process lifetime.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB since the last
+    reset_peak_rss() (process lifetime if none), None if unavailable.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ============================================================
+# Sinks
+# ============================================================
+
+class Sink:
+
+    def event(self, record):
+        pass
+
+    def timing(self, stage, seconds):
+        pass
+
+
+# Console rendering of events: format string or function -> text / None
+MESSAGES = {
+    "heuristic_start": "[INFO] Starting MBVST heuristic",
+    "constructive_start": "[INFO] Starting solver-free MBVST heuristic",
+    "kernel": "[INFO] Kernel: {summary}",
+    "kernel_result": "[RESULT] Branch vertices on the original graph: {branch_vertices}",
+    "lower_bound": "[INFO] Lower bound: {bound} branch vertices",
+    "solver_skipped": "[INFO] Start tree matches the lower bound, solver skipped.",
+    "start_rejected": "[WARNING] Start tree is not a spanning tree, ignored.",
+    "model_error": "[ERROR] MILP construction failed: {error}",
+    "iteration_start": "\n[ITERATION {iteration}]",
+    "solver_error": "[ERROR] MILP solver crashed: {error}",
+    "no_solution": "[WARNING] MILP returned no feasible solution. Stopping.",
+    "selection": "[INFO] MILP selected {selected} edges",
+    "too_fragmented": (
+        "[WARNING] Too many connected components "
+        "({components} > {max_components}). Iteration skipped."
+    ),
+    "reconnect_failed": "[ERROR] Reconnection failed: {error}",
+    "still_disconnected": "[ERROR] Graph still disconnected after reconnection.",
+    "cycles_broken": "[INFO] Removed {removed} cycle edges",
+    "cycle_break_failed": "[ERROR] Cycle breaking failed: {error}",
+    "iteration": lambda r: (
+        None if r["branch_vertices"] is None else
+        f"[INFO] Branch vertices: {r['branch_vertices']}"
+        + ("\n[SUCCESS] New best solution found" if r["improved"] else "")
+    ),
+    "bound_reached": "[INFO] Incumbent matches the lower bound. Stopping.",
+    "time_limit": "[INFO] Time limit reached. Stopping.",
+    "portfolio_start": "[INFO] Portfolio: {workers} workers, {time_limit} s",
+    "portfolio_worker": lambda r: (
+        f"[INFO] Worker {r['worker']}: {r['branch_vertices']} branch vertices"
+        if r["error"] is None else f"[ERROR] Worker {r['worker']}: {r['error']}"
+    ),
+    "no_valid_solution": "[WARNING] No valid solution found in all iterations.",
+    "fallback_start": "[FALLBACK] Building constructive spanning tree (no MILP).",
+    "fallback": "[FALLBACK] Branch vertices: {branch_vertices}",
+    "local_search": "[INFO] Local search: {before} -> {after} branch vertices",
+    "root_cuts": "[INFO] Root cutting planes: {cuts} cutsets, LP bound {bound}",
+    "blocks_start": (
+        "[INFO] Blocks: {blocks} ({direct} solved directly), "
+        "{articulation} articulation points, largest block {largest} edges"
+    ),
+    "blocks_chunk": "[ERROR] Block chunk {chunk}: {error}",
+    "blocks_round": (
+        "[INFO] Block round {round}: {solved} blocks solved, "
+        "{branch_vertices} branch vertices"
+    ),
+    "heuristic_done": (
+        "\n[INFO] Heuristic finished\n"
+        "[INFO] Total runtime: {runtime:.3f} seconds\n"
+        "[RESULT] Best number of branch vertices: {branch_vertices}"
+    ),
+    "constructive_done": (
+        "[INFO] Total runtime: {runtime:.3f} seconds\n"
+        "[RESULT] Best number of branch vertices: {branch_vertices}"
+    ),
+}
+
+
+class ConsoleSink(Sink):
+    """
+    Progress lines on stdout, as the heuristic always printed them.
+    """
+
+    def event(self, record):
+        message = MESSAGES.get(record["event"])
+        if message is None:
+            return
+        text = message(record) if callable(message) else message.format(**record)
+        if text is not None:
+            print(text)
+
+
+class JsonlSink(Sink):
+    """
+    Append every event and timing to `path` as JSON lines, tagged with
+    `context` (e.g. instance and method). Lines are written in append
+    mode, one write each, so worker processes can share the file.
+    """
+
+    def __init__(self, path, context=None):
+        self.path = path
+        self.context = context or {}
+
+    def _write(self, record):
+        line = json.dumps({**self.context, "time": time.time(), **record}, default=str)
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    def event(self, record):
+        self._write(record)
+
+    def timing(self, stage, seconds):
+        self._write({"event": "timing", "stage": stage, "seconds": seconds})
+
+
+class Recorder(Sink):
+    """
+    Per-stage total time and call count, plus the events if keep_events.
+    peak_rss_mb is the peak since the recorder was created, None where
+    the process peak cannot be reset (it would include earlier jobs).
+    """
+
+    def __init__(self, keep_events=False):
+        self.stages = {}
+        self.calls = {}
+        self.events = [] if keep_events else None
+        self._peak_reset = reset_peak_rss()
+
+    def event(self, record):
+        if self.events is not None:
+            self.events.append(dict(record))
+
+    def timing(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    @property
+    def peak_rss_mb(self):
+        return peak_rss_mb() if self._peak_reset else None
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    No progress lines for the duration of the block (other sinks stay).
+    """
+    consoles = [s for s in _sinks if isinstance(s, ConsoleSink)]
+    for sink in consoles:
+        _sinks.remove(sink)
+    try:
+        yield
+    finally:
+        for sink in consoles:
+            _sinks.insert(0, sink)
+
+
+@contextlib.contextmanager
+def recording(keep_events=False):
+    """
+    Install a Recorder for the duration of the block.
+    """
+    recorder = add_sink(Recorder(keep_events=keep_events))
+    try:
+        yield recorder
+    finally:
+        remove_sink(recorder)
+
+
+# Progress lines are on unless configure(console=False) is called
+add_sink(ConsoleSink())
@@ -0,0 +1,183 @@
+import time
+from collections import deque
+
+from instance_index import InstanceIndex
+
+
+# ============================================================
+# Edge-exchange local search for MBVST trees
+# ============================================================
+
+DEADLINE_CHECK = 256        # edges scanned between two clock reads
+
+
+def _root_tree(tree_adj, root=0):
+    """
+    Parent / depth arrays of the tree rooted at `root` (BFS).
+    """
+    n = len(tree_adj)
+    parent = [-1] * n
+    depth = [0] * n
+    seen = [False] * n
+    seen[root] = True
+
+    queue = deque([root])
+    while queue:
+        u = queue.popleft()
+        for w in tree_adj[u]:
+            if not seen[w]:
+                seen[w] = True
+                parent[w] = u
+                depth[w] = depth[u] + 1
+                queue.append(w)
+
+    return parent, depth
+
+
+def _reroot_subtree(tree_adj, parent, depth, s, p):
+    """
+    Parent / depth of the subtree hanging from s, newly attached to p
+    (BFS over that subtree only).
+    """
+    parent[s] = p
+    depth[s] = depth[p] + 1
+    queue = deque([s])
+    while queue:
+        u = queue.popleft()
+        for w in tree_adj[u]:
+            if w != parent[u]:
+                parent[w] = u
+                depth[w] = depth[u] + 1
+                queue.append(w)
+
+
+def _tree_path(parent, depth, a, b):
+    """
+    Edges (child, parent) of the tree path a -> b, climbing to their
+    LCA: (edges on the a side, edges on the b side).
+    """
+    left = []
+    right = []
+    while depth[a] > depth[b]:
+        left.append((a, parent[a]))
+        a = parent[a]
+    while depth[b] > depth[a]:
+        right.append((b, parent[b]))
+        b = parent[b]
+    while a != b:
+        left.append((a, parent[a]))
+        right.append((b, parent[b]))
+        a = parent[a]
+        b = parent[b]
+    return left, right
+
+
+def _swap_delta(degree, a, b, c, d):
+    """
+    Change in branch count when adding (a, b) and removing (c, d),
+    in O(1) from the current degree counters.
+    """
+    change = {}
+    for v in (a, b):
+        change[v] = change.get(v, 0) + 1
+    for v in (c, d):
+        change[v] = change.get(v, 0) - 1
+
+    delta = 0
+    for v, ch in change.items():
+        delta += (degree[v] + ch >= 3) - (degree[v] >= 3)
+    return delta
+
+
+def improve_tree(VG, EG, tree_edges, time_limit=1.0, index=None):
+    """
+    Improve a spanning tree by edge exchanges.
+
+    For each non-tree edge (a, b), every edge of the tree cycle it
+    closes is a removal candidate. The tree path comes from parent /
+    depth arrays (LCA climbing), and each move is scored in O(1) from
+    incrementally maintained degree counters. The best improving swap
+    is applied (re-rooting only the subtree that moved), until a full
+    pass finds none or `time_limit` seconds have elapsed (checked
+    every DEADLINE_CHECK edges). Degree offsets of the index count
+    towards branching.
+
+    Returns (tree_edges, branch_vertices).
+    """
+    if index is None:
+        index = InstanceIndex(VG, EG)
+
+    deadline = time.time() + time_limit
+    n = index.n
+    vertex_id = index.vertex_id
+
+    tree_adj = [set() for _ in range(n)]
+    for (u, v) in tree_edges:
+        a = vertex_id[u]
+        b = vertex_id[v]
+        tree_adj[a].add(b)
+        tree_adj[b].add(a)
+
+    degree = [len(s) + d for s, d in zip(tree_adj, index.offset.tolist())]
+    branch_vertices = sum(1 for d in degree if d >= 3)
+
+    if n == 0 or len(tree_edges) != n - 1:
+        return list(tree_edges), branch_vertices
+
+    parent, depth = _root_tree(tree_adj)
+    src = index.src.tolist()
+    dst = index.dst.tolist()
+
+    improved = True
+    while improved and branch_vertices > 0 and time.time() < deadline:
+        improved = False
+
+        for i in range(index.m):
+            if i % DEADLINE_CHECK == 0 and time.time() >= deadline:
+                break
+
+            a = src[i]
+            b = dst[i]
+            if b in tree_adj[a]:
+                continue
+
+            # Removal candidates; the subtree below the removed edge
+            # holds the endpoint on its side of the path
+            best = None
+            best_delta = 0
+            left, right = _tree_path(parent, depth, a, b)
+            for inner, outer, path in ((a, b, left), (b, a, right)):
+                for (c, d) in path:
+                    delta = _swap_delta(degree, a, b, c, d)
+                    if delta < best_delta:
+                        best_delta = delta
+                        best = (c, d, inner, outer)
+
+            if best is None:
+                continue
+
+            c, d, inner, outer = best
+            tree_adj[c].discard(d)
+            tree_adj[d].discard(c)
+            tree_adj[a].add(b)
+            tree_adj[b].add(a)
+            for v in (c, d):
+                degree[v] -= 1
+            for v in (a, b):
+                degree[v] += 1
+            branch_vertices += best_delta
+            improved = True
+
+            # Only the subtree of c moved: it now hangs from outer
+            _reroot_subtree(tree_adj, parent, depth, inner, outer)
+
+            if branch_vertices == 0 or time.time() >= deadline:
+                break
+
+    # Edges as stored in EG, looked up in one batch
+    ends = [(a, b) for a in range(n) for b in tree_adj[a] if a < b]
+    if not ends:
+        return [], branch_vertices
+    EG = index.EG
+    ids = index.core.find_edges(*zip(*ends)).tolist()
+    return [EG[i] for i in ids], branch_vertices
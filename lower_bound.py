@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+
+from instance_index import InstanceIndex
+
+
+# ============================================================
+# Lower bounds on the number of branch vertices
+# ============================================================
+
+def forced_branch_vertices(VG, EG, index=None):
+    """
+    Vertices that branch in every spanning tree.
+
+    Removing v leaves one component per block (biconnected component)
+    containing v, plus one per removed pendant tree or closed chain
+    (index.deg_offset on kernels). A spanning tree must reach all of
+    them from v, so v has tree degree >= 3 when there are 3 or more.
+    """
+    if index is None:
+        index = InstanceIndex(VG, EG)
+
+    blocks = index.core.blocks_per_vertex() + index.offset
+    return [index.VG[i] for i in np.flatnonzero(blocks >= 3).tolist()]
+
+
+def structural_bound(VG, EG, index=None):
+    """
+    Number of forced branch vertices, in O(n + m).
+    """
+    return len(forced_branch_vertices(VG, EG, index=index))
+
+
+def lp_bound(VG, EG, index=None, backend=None, time_limit=None):
+    """
+    Rounded-up LP relaxation of the flow model (see plne_cp2.py),
+    or None if the LP is not solved. Weak on its own: it mostly
+    recovers the y fixings, but can only help the structural bound.
+    """
+    from plne_cp2 import build_flow_model
+
+    if index is None:
+        index = InstanceIndex(VG, EG)
+
+    model = build_flow_model(index, backend=backend, relax=True)[0]
+    model.set_params(time_limit=time_limit)
+    model.optimize()
+
+    if model.status != "Optimal":
+        return None
+    return math.ceil(model.objective - 1e-6)
+
+
+def lower_bound(VG, EG, index=None, use_lp=False, backend=None):
+    """
+    Best available lower bound: structural, and LP if use_lp.
+    """
+    bound = structural_bound(VG, EG, index=index)
+
+    if use_lp:
+        lp = lp_bound(VG, EG, index=index, backend=backend)
+        if lp is not None:
+            bound = max(bound, lp)
+
+    return bound
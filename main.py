@@ -1,12 +1,25 @@
 import os
 import csv
+import json
 import time
 import re
+from collections import deque
 import networkx as nx
 
-from graph_validation2 import load_instance
-from heuristic import heuristic_cycle_basis
+from instance_io import Corpus, load_edge_array
+from instance_index import InstanceIndex
+from heuristic import heuristic_cycle_basis, heuristic_constructive, heuristic_portfolio
+from decompose import solve_by_blocks
 from plne_cp2 import solve_mbvst_flow
+from plne_cut import solve_mbvst_cuts
+from local_search import improve_tree
+from helper import count_branch_vertices, is_connected
+from lower_bound import lower_bound
+from batch_runner import run_jobs
+from result_cache import ResultCache, cache_key
+from results_store import ResultsStore
+import viz
+import instrument
 
 
 # ============================================================
@@ -16,11 +29,75 @@ from plne_cp2 import solve_mbvst_flow
 INSTANCE_FOLDER = "Spd_Inst_Rid_Final2"
 OUTPUT_CSV = "results.csv"
 
-TIME_LIMIT_EXACT = 60       # seconds for CPLEX
+# Indexed results store (see results_store.py), None to disable: every
+# batch is a run with its parameters, read by plots.py
+RESULTS_DB = "results.sqlite"
+RUN_LABEL = None
+
+# Optional packed corpus (python instance_io.py pack <folder> <file>),
+# memory-mapped once per process instead of parsing text files
+CORPUS_FILE = None
+
+TIME_LIMIT_EXACT = 60       # seconds for the exact solver
+
+# Exact model: "flow" (single-commodity flow, plne_cp2.py) or "cuts"
+# (branch-and-cut on separated cutset constraints, plne_cut.py)
+EXACT_MODEL = "flow"
+
+LOCAL_SEARCH_TIME = 5       # seconds of edge-exchange search per tree
 MAX_INSTANCES_PER_SIZE = 5
 MIN_N = 20
 MAX_N = 500
 
+# Parallel mode (N_WORKERS > 1): one process per (instance, method) job
+N_WORKERS = 1
+JOB_TIME_LIMIT = 300        # hard wall-clock limit per job (seconds)
+METHODS = ("heuristic", "exact")     # heuristic first: it warm starts exact
+                                     # (parallel mode: exact waits for it)
+
+# Batch runs are headless: "off", or "file" to render figures in background
+VIZ_MODE = "off"
+
+# Solver progress lines on the console, and an optional JSON-lines file
+# with every solver event and stage timing (see instrument.py)
+CONSOLE_LOG = True
+EVENT_LOG = None
+
+# MILP backend ("gurobi", "cplex", "highs", "cbc"), None = first available
+MILP_BACKEND = None
+
+# Give the exact model the heuristic tree as MIP start and cutoff
+# (jobs without a heuristic tree build a constructive one)
+WARM_START_EXACT = True
+
+# Lower bound per instance: structural, plus the flow LP relaxation if set
+LP_LOWER_BOUND = False
+
+# Solve the kernel left by the safe reductions of reduction.py
+REDUCE_INSTANCES = True
+
+HEURISTIC_MAX_ITER = 50
+HEURISTIC_MAX_COMPONENTS = 5
+# Seconds of heuristic, local search included; None = no limit (the
+# portfolio and block modes then use their own default budget)
+HEURISTIC_TIME_LIMIT = None
+
+# Portfolio mode (HEURISTIC_WORKERS > 1): diverse heuristic strategies in
+# parallel processes, sharing the best branch count, within the time limit
+HEURISTIC_WORKERS = 1
+
+# Block mode (DECOMPOSE_BLOCKS): the heuristic solves the biconnected
+# blocks separately (small ones exactly) in BLOCK_WORKERS processes and
+# stitches their trees, see decompose.py
+DECOMPOSE_BLOCKS = False
+BLOCK_WORKERS = 1
+
+# Result cache: finished (instance, method, parameters) are not re-solved.
+# Bump CODE_VERSION whenever a solver change should invalidate old results.
+USE_CACHE = True
+CACHE_DIR = ".mbvst_cache"
+CODE_VERSION = "2"
+
 
 # ============================================================
 # Utility
@@ -41,15 +118,309 @@ def extract_n_from_filename(filename):
     return None
 
 
+_corpus = None
+
+
+def load_job_instance(path):
+    """
+    Load an instance as (n, int32 edges (m, 2)) from the packed corpus
+    if configured, else from text.
+    """
+    global _corpus
+
+    if CORPUS_FILE is None:
+        return load_edge_array(path)
+
+    if _corpus is None:
+        _corpus = Corpus(CORPUS_FILE)
+
+    fname = os.path.basename(path)
+    if fname not in _corpus:
+        return load_edge_array(path)
+
+    return _corpus.get(fname)
+
+
 # ============================================================
-# Main batch runner
+# Per-method runs
 # ============================================================
 
-def main():
+def run_exact(VG, EG, index, threads=None, start_tree=None, bound=0):
+    """
+    Exact model (EXACT_MODEL), warm started from `start_tree` (the
+    heuristic tree), plus local search on non-optimal trees.
+    On a time limit, the best known tree is reported with its status.
+    A start tree reaching the lower `bound` is optimal as is: the
+    solver is skipped.
+    Returns (exact_* fields of a CSV row, tree edges or None).
+    """
+    tree = None
+    try:
+        if not WARM_START_EXACT:
+            start_tree = None
+        elif (start_tree is None or len(start_tree) != len(VG) - 1
+              or not is_connected(VG, start_tree, index=index)):
+            start_tree, _ = heuristic_constructive(
+                VG, EG, index=index, local_search_time=LOCAL_SEARCH_TIME
+            )
+
+        cutoff = None
+        if start_tree is not None:
+            cutoff = count_branch_vertices(VG, start_tree)
+
+        if cutoff is not None and cutoff <= bound:
+            instrument.event("solver_skipped", bound=bound)
+            T_opt = nx.Graph()
+            T_opt.add_nodes_from(VG)
+            T_opt.add_edges_from(start_tree)
+            status = "Optimal"
+            exact_time = 0.0
+        else:
+            solve = solve_mbvst_cuts if EXACT_MODEL == "cuts" else solve_mbvst_flow
+            T_opt, status, exact_time = solve(
+                None, time_limit=TIME_LIMIT_EXACT, index=index, threads=threads,
+                backend=MILP_BACKEND, reduce=REDUCE_INSTANCES,
+                start_tree=start_tree, cutoff=cutoff
+            )
+
+        if nx.is_tree(T_opt):
+            tree = list(T_opt.edges())
+        elif start_tree is not None:
+            # No solution from the solver: keep the incumbent
+            tree = list(start_tree)
+
+        exact_obj = None if tree is None else count_branch_vertices(VG, tree)
+
+        # Non-optimal trees (time limit) are post-optimized
+        if status != "Optimal" and tree is not None:
+            tree, exact_ls_obj = improve_tree(
+                VG, EG, tree,
+                time_limit=LOCAL_SEARCH_TIME, index=index
+            )
+        else:
+            exact_ls_obj = exact_obj
+
+    except Exception as e:
+        print(f"[ERROR] Exact solver failed: {e}")
+        status = "ERROR"
+        exact_time = None
+        exact_obj = None
+        exact_ls_obj = None
+
+    return {
+        "exact_status": status,
+        "exact_time": exact_time,
+        "exact_branch_vertices": exact_obj,
+        "exact_ls_branch_vertices": exact_ls_obj,
+    }, tree
+
+
+def run_heuristic(VG, EG, index, threads=None, bound=None):
+    """
+    MILP-based heuristic (per block if DECOMPOSE_BLOCKS, a portfolio of
+    HEURISTIC_WORKERS processes if more than one), stopped early once
+    it reaches `bound`.
+    heuristic_trace lists the [seconds, branch vertices] of every
+    improving solution of a single run, for time-to-target curves.
+    Returns (heuristic_* fields of a CSV row, tree edges or None).
+    """
+    tree = None
+    trace = []
+    # Portfolio and blocks split a finite budget: keep theirs if unset
+    budget = {} if HEURISTIC_TIME_LIMIT is None else {"time_limit": HEURISTIC_TIME_LIMIT}
+    try:
+        start = time.time()
+        if DECOMPOSE_BLOCKS:
+            tree, heur_obj = solve_by_blocks(
+                VG, EG, index=index, workers=BLOCK_WORKERS, **budget,
+                max_iter=HEURISTIC_MAX_ITER,
+                local_search_time=LOCAL_SEARCH_TIME, threads=threads,
+                backend=MILP_BACKEND, reduce=REDUCE_INSTANCES,
+                lower_bound=bound
+            )
+        elif HEURISTIC_WORKERS > 1:
+            tree, heur_obj = heuristic_portfolio(
+                VG, EG, workers=HEURISTIC_WORKERS, **budget,
+                max_iter=HEURISTIC_MAX_ITER,
+                max_components=HEURISTIC_MAX_COMPONENTS,
+                index=index,
+                local_search_time=LOCAL_SEARCH_TIME,
+                backend=MILP_BACKEND, reduce=REDUCE_INSTANCES,
+                lower_bound=bound
+            )
+        else:
+            tree, heur_obj = heuristic_cycle_basis(
+                VG, EG,
+                max_iter=HEURISTIC_MAX_ITER,
+                max_components=HEURISTIC_MAX_COMPONENTS,
+                index=index,
+                local_search_time=LOCAL_SEARCH_TIME, threads=threads,
+                backend=MILP_BACKEND, reduce=REDUCE_INSTANCES,
+                lower_bound=bound, time_limit=HEURISTIC_TIME_LIMIT,
+                callback=lambda s: trace.append(
+                    [round(s["elapsed"], 4), s["branch_vertices"]]
+                )
+            )
+        heuristic_time = time.time() - start
+
+    except Exception as e:
+        print(f"[ERROR] Heuristic failed: {e}")
+        heuristic_time = None
+        heur_obj = None
+
+    return {
+        "heuristic_time": heuristic_time,
+        "heuristic_branch_vertices": heur_obj,
+        "heuristic_trace": json.dumps(trace) if trace else None,
+    }, tree
+
+
+def run_method(method, VG, EG, index, threads=None, start_tree=None,
+               instance=None):
+    """
+    Run one method on a loaded instance, with its per-stage timings
+    (JSON) and its peak memory (empty where it cannot be measured per
+    job) in the CSV fields.
+    """
+    log = None
+    if EVENT_LOG:
+        log = instrument.add_sink(instrument.JsonlSink(
+            EVENT_LOG, context={"instance": instance, "method": method}
+        ))
+
+    try:
+        with instrument.recording() as rec:
+            with instrument.timer("lower_bound"):
+                bound = lower_bound(
+                    VG, EG, index=index, use_lp=LP_LOWER_BOUND,
+                    backend=MILP_BACKEND
+                )
+
+            if method == "exact":
+                fields, tree = run_exact(
+                    VG, EG, index, threads=threads, start_tree=start_tree,
+                    bound=bound
+                )
+                obj = fields["exact_branch_vertices"]
+            else:
+                fields, tree = run_heuristic(
+                    VG, EG, index, threads=threads, bound=bound
+                )
+                obj = fields["heuristic_branch_vertices"]
+    finally:
+        if log is not None:
+            instrument.remove_sink(log)
+
+    fields[f"{method}_stage_times"] = json.dumps(
+        {stage: round(t, 4) for stage, t in rec.stages.items()}
+    )
+    peak = rec.peak_rss_mb
+    fields[f"{method}_peak_rss_mb"] = None if peak is None else round(peak, 1)
+    fields["m"] = index.m
+    fields["lower_bound"] = bound
+    fields[f"{method}_gap"] = None if obj is None else obj - bound
+    return fields, tree
+
+
+def run_job(path, method, threads=None, start_tree=None):
+    """
+    One (instance, method) job, self-contained for worker processes.
+    """
+    instrument.configure(console=CONSOLE_LOG)
 
-    # --------------------------------------------------
-    # Collect instances grouped by size
-    # --------------------------------------------------
+    index = InstanceIndex.from_arrays(*load_job_instance(path))
+
+    return run_method(
+        method, index.VG, index.EG, index, threads=threads,
+        start_tree=start_tree, instance=os.path.basename(path)
+    )
+
+
+# ============================================================
+# Result cache
+# ============================================================
+
+def method_params(method):
+    """
+    Everything that changes the outcome of a method, for the cache key.
+    """
+    params = {
+        "code_version": CODE_VERSION,
+        "local_search_time": LOCAL_SEARCH_TIME,
+        "milp_backend": MILP_BACKEND,
+        "reduce": REDUCE_INSTANCES,
+    }
+    params["lp_lower_bound"] = LP_LOWER_BOUND
+    if method == "exact":
+        params["time_limit_exact"] = TIME_LIMIT_EXACT
+        params["warm_start"] = WARM_START_EXACT
+        params["exact_model"] = EXACT_MODEL
+    else:
+        params["max_iter"] = HEURISTIC_MAX_ITER
+        params["max_components"] = HEURISTIC_MAX_COMPONENTS
+        params["time_limit"] = HEURISTIC_TIME_LIMIT
+        if DECOMPOSE_BLOCKS:
+            params["blocks"] = BLOCK_WORKERS
+        elif HEURISTIC_WORKERS > 1:
+            params["workers"] = HEURISTIC_WORKERS
+    return params
+
+
+def is_cacheable(method, fields):
+    """
+    Solver crashes (license, environment...) are retried on the next run.
+    """
+    if method == "exact":
+        return fields["exact_status"] != "ERROR"
+    return fields["heuristic_branch_vertices"] is not None
+
+
+def cached_fields(cache, path, method):
+    """
+    Return (cache key, cached fields or None, cached tree or None).
+    """
+    if cache is None:
+        return None, None, None
+
+    key = cache_key(path, method, method_params(method))
+    entry = cache.get(key)
+    if entry is None:
+        return key, None, None
+
+    tree = entry.get("tree")
+    if tree is not None:
+        tree = [tuple(e) for e in tree]
+    return key, entry["fields"], tree
+
+
+def store_fields(cache, key, method, fields, tree):
+    if cache is not None and is_cacheable(method, fields):
+        cache.put(key, fields, tree)
+
+
+# Fields reported when a job is killed or crashes in a worker
+FAILED_JOB_FIELDS = {
+    "exact": {
+        "exact_status": None, "exact_time": None,
+        "exact_branch_vertices": None, "exact_ls_branch_vertices": None,
+        "exact_gap": None, "exact_stage_times": None, "exact_peak_rss_mb": None,
+    },
+    "heuristic": {
+        "heuristic_time": None, "heuristic_branch_vertices": None,
+        "heuristic_gap": None, "heuristic_stage_times": None,
+        "heuristic_peak_rss_mb": None, "heuristic_trace": None,
+    },
+}
+
+
+# ============================================================
+# Main batch runner
+# ============================================================
+
+def collect_instances():
+    """
+    Instance files grouped by size, at most MAX_INSTANCES_PER_SIZE each.
+    """
     files_by_size = {}
 
     for fname in sorted(os.listdir(INSTANCE_FOLDER)):
@@ -65,96 +436,201 @@ def main():
     if not files_by_size:
         raise RuntimeError("[ERROR] No valid instances found.")
 
-    # --------------------------------------------------
-    # Prepare CSV (incremental write)
-    # --------------------------------------------------
-    fieldnames = [
-        "instance", "n", "m",
-        "exact_status", "exact_time", "exact_branch_vertices",
-        "heuristic_time", "heuristic_branch_vertices"
-    ]
+    return {
+        n: files_by_size[n][:MAX_INSTANCES_PER_SIZE]
+        for n in sorted(files_by_size.keys())
+    }
 
-    with open(OUTPUT_CSV, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        f.flush()
 
-        # --------------------------------------------------
-        # Process instances
-        # --------------------------------------------------
-        for n in sorted(files_by_size.keys()):
-            selected_files = files_by_size[n][:MAX_INSTANCES_PER_SIZE]
+def run_sequential(files_by_size, save_row, cache):
+
+    for n, selected_files in files_by_size.items():
+
+        print("\n=================================================")
+        print(f"[SIZE n={n}] Processing {len(selected_files)} instances")
+
+        for fname in selected_files:
+            path = os.path.join(INSTANCE_FOLDER, fname)
+            print(f"\n[INSTANCE] {fname}")
 
-            print("\n=================================================")
-            print(f"[SIZE n={n}] Processing {len(selected_files)} instances")
+            row = {"instance": fname, "n": n}
 
-            for fname in selected_files:
-                path = os.path.join(INSTANCE_FOLDER, fname)
-                print(f"\n[INSTANCE] {fname}")
+            # ------------------------------------------
+            # Cached results
+            # ------------------------------------------
+            todo = []
+            trees = {}
+            for method in METHODS:
+                key, fields, tree = cached_fields(cache, path, method)
+                if fields is None:
+                    todo.append((method, key))
+                else:
+                    print(f"[CACHE] {method} result reused")
+                    row.update(fields)
+                    trees[method] = tree
 
+            if todo:
                 # ------------------------------------------
                 # Load instance
                 # ------------------------------------------
                 try:
-                    G = load_instance(path)
+                    # Shared per-instance index (built once)
+                    index = InstanceIndex.from_arrays(*load_job_instance(path))
                 except Exception as e:
                     print(f"[ERROR] Load failed: {e}")
                     continue
 
-                m = G.number_of_edges()
-                print(f"[INFO] n={n}, m={m}")
+                print(f"[INFO] n={n}, m={index.m}")
 
-                # ------------------------------------------
-                # Exact PLNE
-                # ------------------------------------------
-                try:
-                    T_opt, status, exact_time = solve_mbvst_flow(
-                        G, time_limit=TIME_LIMIT_EXACT
+                for method, key in todo:
+                    fields, tree = run_method(
+                        method, index.VG, index.EG, index,
+                        start_tree=trees.get("heuristic"), instance=fname
                     )
+                    store_fields(cache, key, method, fields, tree)
+                    row.update(fields)
+                    trees[method] = tree
 
-                    if status == "Optimal" and nx.is_tree(T_opt):
-                        exact_obj = count_branch_vertices_tree(T_opt)
-                    else:
-                        exact_obj = None
+            # ------------------------------------------
+            # Write row immediately
+            # ------------------------------------------
+            save_row(row)
 
-                except Exception as e:
-                    print(f"[ERROR] Exact solver failed: {e}")
-                    status = "ERROR"
-                    exact_time = None
-                    exact_obj = None
+            print("[SAVED] Result written")
 
-                # ------------------------------------------
-                # Heuristic
-                # ------------------------------------------
-                try:
-                    VG = list(G.nodes())
-                    EG = list(G.edges())
 
-                    start = time.time()
-                    _, heur_obj = heuristic_cycle_basis(VG, EG)
-                    heuristic_time = time.time() - start
+def run_parallel(files_by_size, save_row, cache):
+    """
+    Dispatch (instance, method) jobs to N_WORKERS processes.
+    With WARM_START_EXACT, the exact job of an instance is submitted
+    once its heuristic job is done, with the heuristic tree (or right
+    away with the cached one).
+    A row is written as soon as both jobs of its instance are done.
+    """
+    workers = N_WORKERS
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"[INFO] Parallel mode: {workers} workers x {threads} solver threads")
+
+    jobs = deque()
+    partial = {}
+    pending = {}
+    keys = {}
+    waiting = {}    # fname -> exact job args, until its heuristic job is done
+    for n, selected_files in files_by_size.items():
+        for fname in selected_files:
+            path = os.path.join(INSTANCE_FOLDER, fname)
+            row = {"instance": fname, "n": n}
+            todo = 0
+            trees = {}
+
+            for method in METHODS:
+                key, fields, tree = cached_fields(cache, path, method)
+                if fields is not None:
+                    row.update(fields)
+                    trees[method] = tree
+                    continue
+                keys[(fname, method)] = key
+                todo += 1
+
+                if method == "exact" and WARM_START_EXACT:
+                    if (fname, "heuristic") in keys:
+                        waiting[fname] = (path, method, threads)
+                        continue
+                    args = (path, method, threads, trees.get("heuristic"))
+                else:
+                    args = (path, method, threads)
+                jobs.append(((fname, method), run_job, args))
+
+            if todo == 0:
+                save_row(row)
+                continue
+            partial[fname] = row
+            pending[fname] = todo
+
+    print(f"[INFO] {len(jobs) + len(waiting)} jobs to run, cached rows written")
+
+    for (fname, method), result, error in run_jobs(jobs, workers, JOB_TIME_LIMIT):
+        if error is not None:
+            print(f"[ERROR] {fname} / {method}: {error}")
+            result = dict(FAILED_JOB_FIELDS[method])
+            if method == "exact":
+                result["exact_status"] = "TIMEOUT" if error == "timeout" else "ERROR"
+            tree = None
+        else:
+            result, tree = result
+            store_fields(cache, keys[(fname, method)], method, result, tree)
+
+        if fname in waiting:
+            jobs.append(((fname, "exact"), run_job, waiting.pop(fname) + (tree,)))
+
+        partial[fname].update(result)
+        pending[fname] -= 1
+
+        if pending[fname] == 0:
+            save_row(partial.pop(fname))
+            print(f"[SAVED] {fname} written")
 
-                except Exception as e:
-                    print(f"[ERROR] Heuristic failed: {e}")
-                    heuristic_time = None
-                    heur_obj = None
 
-                # ------------------------------------------
-                # Write CSV row immediately
-                # ------------------------------------------
-                writer.writerow({
-                    "instance": fname,
-                    "n": n,
-                    "m": m,
-                    "exact_status": status,
-                    "exact_time": exact_time,
-                    "exact_branch_vertices": exact_obj,
-                    "heuristic_time": heuristic_time,
-                    "heuristic_branch_vertices": heur_obj
-                })
-                f.flush()   # 🔥 CRITICAL: save immediately
-
-                print("[SAVED] Result written to CSV")
+def main():
+
+    viz.configure(mode=VIZ_MODE)
+    instrument.configure(console=CONSOLE_LOG)
+
+    # --------------------------------------------------
+    # Collect instances grouped by size
+    # --------------------------------------------------
+    files_by_size = collect_instances()
+
+    # --------------------------------------------------
+    # Prepare CSV (incremental write)
+    # --------------------------------------------------
+    fieldnames = [
+        "instance", "n", "m",
+        "exact_status", "exact_time", "exact_branch_vertices",
+        "exact_ls_branch_vertices", "exact_gap",
+        "heuristic_time", "heuristic_branch_vertices", "heuristic_gap",
+        "lower_bound",
+        "exact_stage_times", "exact_peak_rss_mb",
+        "heuristic_stage_times", "heuristic_peak_rss_mb",
+        "heuristic_trace",
+    ]
+
+    # --------------------------------------------------
+    # Results store: one run per batch, with its parameters
+    # --------------------------------------------------
+    store = None
+    run_id = None
+    if RESULTS_DB:
+        store = ResultsStore(RESULTS_DB)
+        run_id = store.start_run(
+            {method: method_params(method) for method in METHODS},
+            label=RUN_LABEL
+        )
+        print(f"[INFO] Results store {RESULTS_DB}, run {run_id}")
+
+    with open(OUTPUT_CSV, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        f.flush()
+
+        def save_row(row):
+            writer.writerow(row)
+            f.flush()   # 🔥 CRITICAL: save immediately
+            if store is not None:
+                store.add_row(run_id, row, METHODS)
+
+        cache = ResultCache(CACHE_DIR) if USE_CACHE else None
+
+        # --------------------------------------------------
+        # Process instances
+        # --------------------------------------------------
+        if N_WORKERS > 1:
+            run_parallel(files_by_size, save_row, cache)
+        else:
+            run_sequential(files_by_size, save_row, cache)
+
+    if store is not None:
+        store.close()
 
     print("\n=================================================")
     print(f"[DONE] Incremental results saved in {OUTPUT_CSV}")
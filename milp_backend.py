@@ -0,0 +1,738 @@
+import time
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+
+# ============================================================
+# In-process MILP backends
+# ============================================================
+#
+# A small common interface over Gurobi, CPLEX, HiGHS and CBC.
+# Models are built in memory (no LP file, no subprocess), variables and
+# rows are referred to by integer index, and solution values come back
+# as a list indexed like the variables. Large models are loaded in
+# blocks: add_vars takes bound / cost arrays, and add_rows a SciPy
+# sparse matrix of rows sharing a sense, passed to the solver's matrix
+# API where it has one.
+#
+# All models minimize. Row senses are "<=", ">=" and "==".
+# Status strings: "Optimal", "TimeLimit", "Infeasible", "Not Solved".
+
+INF = float("inf")
+
+BACKEND_ORDER = ("gurobi", "cplex", "highs", "cbc")
+
+
+def sparse_rows(rows, columns, coefs, shape):
+    """
+    Row block for add_rows: CSR matrix with coefs[k] at (rows[k],
+    columns[k]), duplicates summed (scalar coefs broadcast).
+    """
+    coefs = np.broadcast_to(np.asarray(coefs, dtype=float), (len(rows),))
+    return coo_matrix((coefs, (rows, columns)), shape=shape).tocsr()
+
+
+class MilpBackend:
+    """
+    Base class. Subclasses implement the _solver-specific hooks;
+    lazy constraints fall back to a solve / separate / re-solve loop
+    for solvers without a native callback.
+    """
+
+    name = None
+
+    def __init__(self, model_name="model"):
+        self.model_name = model_name
+        self.num_vars = 0
+        self.status = "Not Solved"
+        self.runtime = 0.0
+        self.time_limit = None
+        self._separator = None
+        self._rejected = False
+
+    # --------------------------------------------------
+    # Model building
+    # --------------------------------------------------
+    def add_vars(self, count, lb=0.0, ub=1.0, obj=0.0, integer=True):
+        """
+        Add `count` variables, return their index range.
+        lb / ub / obj are scalars or sequences of length count.
+        """
+        def expand(value):
+            return np.broadcast_to(np.asarray(value, dtype=float), (count,))
+
+        first = self.num_vars
+        self._add_vars(count, expand(lb), expand(ub), expand(obj), integer)
+        self.num_vars += count
+        return range(first, first + count)
+
+    def add_row(self, indices, coefs, sense, rhs):
+        if sense not in ("<=", ">=", "=="):
+            raise ValueError(f"Unknown row sense: {sense}")
+        self._add_row(list(indices), [float(c) for c in coefs], sense, float(rhs))
+
+    def add_rows(self, matrix, sense, rhs):
+        """
+        Add the rows of a SciPy sparse matrix (column j = variable j,
+        possibly fewer columns than variables), all with `sense`;
+        rhs is a scalar or one value per row.
+        """
+        if sense not in ("<=", ">=", "=="):
+            raise ValueError(f"Unknown row sense: {sense}")
+        matrix = matrix.tocsr()
+        matrix.sum_duplicates()
+        rhs = np.broadcast_to(np.asarray(rhs, dtype=float), (matrix.shape[0],))
+        if matrix.shape[0]:
+            self._add_rows(matrix, sense, rhs)
+
+    def _add_rows(self, matrix, sense, rhs):
+        # Row by row, for solvers without a matrix API
+        ptr = matrix.indptr.tolist()
+        indices = matrix.indices.tolist()
+        data = matrix.data.tolist()
+        for r, b in enumerate(rhs.tolist()):
+            self._add_row(indices[ptr[r]:ptr[r + 1]], data[ptr[r]:ptr[r + 1]], sense, b)
+
+    def read_model(self, path):
+        """
+        Load a model file (LP / MPS) into this backend.
+        Returns the variable names, in variable index order.
+        """
+        raise NotImplementedError
+
+    def set_bounds(self, idx, lb, ub):
+        raise NotImplementedError
+
+    def set_start(self, values):
+        """
+        MIP start from {variable index: value} (missing entries free).
+        """
+        raise NotImplementedError
+
+    def set_params(self, time_limit=None, threads=None, seed=None,
+                   verbose=None, cutoff=None):
+        raise NotImplementedError
+
+    def set_lazy_callback(self, separator):
+        """
+        separator(values) -> list of violated rows (indices, coefs, sense, rhs),
+        called on every integer solution found by the solver.
+        """
+        self._separator = separator
+
+    # --------------------------------------------------
+    # Solving
+    # --------------------------------------------------
+    def optimize(self):
+        start = time.time()
+        self._rejected = False
+
+        if self._separator is None or self._native_lazy():
+            self._optimize()
+        else:
+            # Row generation: re-solve until the separator is satisfied
+            while True:
+                self._optimize()
+                if not self.has_solution:
+                    break
+
+                rows = self._separator(self.values())
+                if not rows:
+                    break
+                for row in rows:
+                    self.add_row(*row)
+
+                if self.time_limit is not None:
+                    remaining = self.time_limit - (time.time() - start)
+                    if remaining <= 0:
+                        # The incumbent violates the rows just added:
+                        # report no solution rather than a non-tree
+                        self.status = "TimeLimit"
+                        self._rejected = True
+                        break
+                    self._set_time_limit(remaining)
+
+            if self.time_limit is not None:
+                self._set_time_limit(self.time_limit)
+
+        self.runtime = time.time() - start
+
+    @property
+    def has_solution(self):
+        """
+        Whether values() holds a solution of the model, including the
+        separated rows.
+        """
+        return not self._rejected and self._has_solution()
+
+    def _has_solution(self):
+        raise NotImplementedError
+
+    def values(self):
+        raise NotImplementedError
+
+    @property
+    def objective(self):
+        raise NotImplementedError
+
+    def _native_lazy(self):
+        return False
+
+    def _license_error(self, error):
+        """
+        Whether an error of optimize() is the solver refusing the model
+        (no license, size-limited license) rather than a failure.
+        """
+        return False
+
+
+# ============================================================
+# Gurobi
+# ============================================================
+
+class GurobiBackend(MilpBackend):
+
+    name = "gurobi"
+
+    _SENSES = {"<=": "<", ">=": ">", "==": "="}
+
+    def __init__(self, model_name="model"):
+        import gurobipy as gp
+        from gurobipy import GRB
+
+        super().__init__(model_name)
+        self._gp = gp
+        self._GRB = GRB
+        self.model = gp.Model(model_name)
+        self.vars = []
+
+    def _add_vars(self, count, lb, ub, obj, integer):
+        vtype = self._GRB.INTEGER if integer else self._GRB.CONTINUOUS
+        new = self.model.addMVar(count, lb=lb, ub=ub, obj=obj, vtype=vtype)
+        self.vars.extend(new.tolist())
+
+    def _expr(self, indices, coefs):
+        return self._gp.LinExpr(coefs, [self.vars[i] for i in indices])
+
+    @staticmethod
+    def _temp(expr, sense, rhs):
+        if sense == "<=":
+            return expr <= rhs
+        if sense == ">=":
+            return expr >= rhs
+        return expr == rhs
+
+    def _add_row(self, indices, coefs, sense, rhs):
+        self.model.addLConstr(self._temp(self._expr(indices, coefs), sense, rhs))
+
+    def _add_rows(self, matrix, sense, rhs):
+        x = self._gp.MVar.fromlist(self.vars[:matrix.shape[1]])
+        self.model.addMConstr(matrix, x, self._SENSES[sense], rhs)
+
+    def read_model(self, path):
+        self.model = self._gp.read(path)
+        self.vars = self.model.getVars()
+        self.num_vars = len(self.vars)
+        return [var.VarName for var in self.vars]
+
+    def set_bounds(self, idx, lb, ub):
+        self.vars[idx].LB = lb
+        self.vars[idx].UB = ub
+
+    def set_start(self, values):
+        for var in self.vars:
+            var.Start = self._GRB.UNDEFINED
+        for idx, val in values.items():
+            self.vars[idx].Start = val
+
+    def set_params(self, time_limit=None, threads=None, seed=None,
+                   verbose=None, cutoff=None):
+        params = self.model.Params
+        if time_limit is not None:
+            self.time_limit = time_limit
+            params.TimeLimit = time_limit
+        if threads is not None:
+            params.Threads = threads
+        if seed is not None:
+            params.Seed = seed
+        if verbose is not None:
+            params.OutputFlag = 1 if verbose else 0
+        if cutoff is not None:
+            params.Cutoff = cutoff
+
+    def _set_time_limit(self, seconds):
+        self.model.Params.TimeLimit = seconds
+
+    def _native_lazy(self):
+        return True
+
+    def _optimize(self):
+        GRB = self._GRB
+
+        if self._separator is None:
+            self.model.optimize()
+        else:
+            self.model.Params.LazyConstraints = 1
+            separator = self._separator
+
+            def callback(model, where):
+                if where != GRB.Callback.MIPSOL:
+                    return
+                values = model.cbGetSolution(self.vars)
+                for indices, coefs, sense, rhs in separator(values):
+                    model.cbLazy(self._temp(self._expr(indices, coefs), sense, rhs))
+
+            self.model.optimize(callback)
+
+        status = self.model.Status
+        if status == GRB.OPTIMAL:
+            self.status = "Optimal"
+        elif status == GRB.TIME_LIMIT:
+            self.status = "TimeLimit"
+        elif status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD, GRB.CUTOFF):
+            self.status = "Infeasible"
+        else:
+            self.status = "Not Solved"
+
+    def _license_error(self, error):
+        return (isinstance(error, self._gp.GurobiError) and error.errno in
+                (self._GRB.Error.NO_LICENSE, self._GRB.Error.SIZE_LIMIT_EXCEEDED))
+
+    def _has_solution(self):
+        return self.model.SolCount > 0
+
+    def values(self):
+        return self.model.getAttr("X", self.vars)
+
+    @property
+    def objective(self):
+        return self.model.ObjVal
+
+
+# ============================================================
+# CPLEX
+# ============================================================
+
+class CplexBackend(MilpBackend):
+
+    name = "cplex"
+
+    _SENSES = {"<=": "L", ">=": "G", "==": "E"}
+
+    def __init__(self, model_name="model"):
+        import cplex
+
+        super().__init__(model_name)
+        self._cplex = cplex
+        self.cpx = cplex.Cplex()
+        self.cpx.set_problem_name(model_name)
+        self.cpx.objective.set_sense(self.cpx.objective.sense.minimize)
+
+    def _add_vars(self, count, lb, ub, obj, integer):
+        cpx = self.cpx
+        inf = self._cplex.infinity
+        lb = np.maximum(lb, -inf).tolist()
+        ub = np.minimum(ub, inf).tolist()
+        vtype = cpx.variables.type.integer if integer else cpx.variables.type.continuous
+        cpx.variables.add(obj=obj.tolist(), lb=lb, ub=ub, types=[vtype] * count)
+
+    def _add_row(self, indices, coefs, sense, rhs):
+        self.cpx.linear_constraints.add(
+            lin_expr=[self._cplex.SparsePair(ind=indices, val=coefs)],
+            senses=[self._SENSES[sense]],
+            rhs=[rhs]
+        )
+
+    def _add_rows(self, matrix, sense, rhs):
+        # One call for the block (no per-row Python expressions)
+        ptr = matrix.indptr.tolist()
+        indices = matrix.indices.tolist()
+        data = matrix.data.tolist()
+        self.cpx.linear_constraints.add(
+            lin_expr=[[indices[ptr[r]:ptr[r + 1]], data[ptr[r]:ptr[r + 1]]]
+                      for r in range(len(rhs))],
+            senses=self._SENSES[sense] * len(rhs),
+            rhs=rhs.tolist()
+        )
+
+    def read_model(self, path):
+        self.cpx.read(path)
+        self.num_vars = self.cpx.variables.get_num()
+        return self.cpx.variables.get_names()
+
+    def set_bounds(self, idx, lb, ub):
+        self.cpx.variables.set_lower_bounds(idx, lb)
+        self.cpx.variables.set_upper_bounds(idx, ub)
+
+    def set_start(self, values):
+        starts = self.cpx.MIP_starts
+        if starts.get_num() > 0:
+            starts.delete()
+        starts.add(
+            self._cplex.SparsePair(ind=list(values), val=list(values.values())),
+            starts.effort_level.repair
+        )
+
+    def set_params(self, time_limit=None, threads=None, seed=None,
+                   verbose=None, cutoff=None):
+        params = self.cpx.parameters
+        if time_limit is not None:
+            self.time_limit = time_limit
+            params.timelimit.set(time_limit)
+        if threads is not None:
+            params.threads.set(threads)
+        if seed is not None:
+            params.randomseed.set(seed)
+        if verbose is not None and not verbose:
+            for stream in ("set_log_stream", "set_results_stream",
+                           "set_warning_stream", "set_error_stream"):
+                getattr(self.cpx, stream)(None)
+        if cutoff is not None:
+            params.mip.tolerances.uppercutoff.set(cutoff)
+
+    def _set_time_limit(self, seconds):
+        self.cpx.parameters.timelimit.set(seconds)
+
+    def _native_lazy(self):
+        return True
+
+    def _optimize(self):
+        cpx = self.cpx
+
+        if self._separator is not None:
+            from cplex.callbacks import LazyConstraintCallback
+
+            backend = self
+
+            class _Lazy(LazyConstraintCallback):
+                def __call__(self):
+                    values = self.get_values()
+                    for indices, coefs, sense, rhs in backend._separator(values):
+                        self.add(
+                            constraint=backend._cplex.SparsePair(ind=indices, val=coefs),
+                            sense=backend._SENSES[sense],
+                            rhs=rhs
+                        )
+
+            cpx.register_callback(_Lazy)
+
+        cpx.solve()
+
+        status = cpx.solution.get_status()
+        codes = cpx.solution.status
+        if status in (codes.MIP_optimal, codes.optimal_tolerance, codes.optimal):
+            self.status = "Optimal"
+        elif status in (codes.MIP_time_limit_feasible,
+                        codes.MIP_time_limit_infeasible, codes.abort_time_limit):
+            self.status = "TimeLimit"
+        elif status in (codes.MIP_infeasible, codes.infeasible,
+                        codes.MIP_infeasible_or_unbounded):
+            self.status = "Infeasible"
+        else:
+            self.status = "Not Solved"
+
+    def _license_error(self, error):
+        # Community Edition size limits
+        return (isinstance(error, self._cplex.exceptions.CplexError)
+                and len(error.args) > 2 and error.args[2] == 1016)
+
+    def _has_solution(self):
+        try:
+            return self.cpx.solution.is_primal_feasible()
+        except self._cplex.exceptions.CplexError:
+            return False
+
+    def values(self):
+        return self.cpx.solution.get_values()
+
+    @property
+    def objective(self):
+        return self.cpx.solution.get_objective_value()
+
+
+# ============================================================
+# HiGHS
+# ============================================================
+
+class HighsBackend(MilpBackend):
+
+    name = "highs"
+
+    def __init__(self, model_name="model"):
+        import highspy
+
+        super().__init__(model_name)
+        self._highspy = highspy
+        self.h = highspy.Highs()
+        self.h.setOptionValue("output_flag", False)
+
+    def _add_vars(self, count, lb, ub, obj, integer):
+        first = self.num_vars
+        idx = np.arange(first, first + count, dtype=np.int32)
+        self.h.addVars(count, np.array(lb, dtype=float), np.array(ub, dtype=float))
+        self.h.changeColsCost(count, idx, np.array(obj, dtype=float))
+        if integer:
+            kind = self._highspy.HighsVarType.kInteger
+            self.h.changeColsIntegrality(
+                count, idx, np.array([kind] * count, dtype=np.uint8)
+            )
+
+    def _add_row(self, indices, coefs, sense, rhs):
+        lower = rhs if sense in (">=", "==") else -INF
+        upper = rhs if sense in ("<=", "==") else INF
+        self.h.addRow(
+            lower, upper, len(indices),
+            np.array(indices, dtype=np.int32), np.array(coefs, dtype=float)
+        )
+
+    def _add_rows(self, matrix, sense, rhs):
+        count = matrix.shape[0]
+        lower = rhs if sense in (">=", "==") else np.full(count, -INF)
+        upper = rhs if sense in ("<=", "==") else np.full(count, INF)
+        self.h.addRows(
+            count, np.array(lower, dtype=float), np.array(upper, dtype=float),
+            matrix.nnz, matrix.indptr[:-1].astype(np.int32),
+            matrix.indices.astype(np.int32), matrix.data.astype(float)
+        )
+
+    def read_model(self, path):
+        self.h.readModel(path)
+        lp = self.h.getLp()
+        self.num_vars = lp.num_col_
+        return list(lp.col_names_)
+
+    def set_bounds(self, idx, lb, ub):
+        self.h.changeColBounds(idx, lb, ub)
+
+    def set_start(self, values):
+        self.h.setSolution(
+            len(values),
+            np.array(list(values), dtype=np.int32),
+            np.array(list(values.values()), dtype=float)
+        )
+
+    def set_params(self, time_limit=None, threads=None, seed=None,
+                   verbose=None, cutoff=None):
+        h = self.h
+        if time_limit is not None:
+            self.time_limit = time_limit
+            h.setOptionValue("time_limit", float(time_limit))
+        if threads is not None:
+            h.setOptionValue("threads", int(threads))
+        if seed is not None:
+            h.setOptionValue("random_seed", int(seed))
+        if verbose is not None:
+            h.setOptionValue("output_flag", bool(verbose))
+        if cutoff is not None:
+            h.setOptionValue("objective_bound", float(cutoff))
+
+    def _set_time_limit(self, seconds):
+        self.h.setOptionValue("time_limit", float(seconds))
+
+    def _optimize(self):
+        status_enum = self._highspy.HighsModelStatus
+
+        self.h.run()
+        status = self.h.getModelStatus()
+        if status == status_enum.kOptimal:
+            self.status = "Optimal"
+        elif status == status_enum.kTimeLimit:
+            self.status = "TimeLimit"
+        elif status in (status_enum.kInfeasible, status_enum.kUnboundedOrInfeasible):
+            self.status = "Infeasible"
+        else:
+            self.status = "Not Solved"
+
+    def _has_solution(self):
+        return self.h.getInfo().primal_solution_status == 2
+
+    def values(self):
+        return list(self.h.getSolution().col_value)
+
+    @property
+    def objective(self):
+        return self.h.getInfo().objective_function_value
+
+
+# ============================================================
+# CBC (through python-mip, in memory)
+# ============================================================
+
+class CbcBackend(MilpBackend):
+
+    name = "cbc"
+
+    def __init__(self, model_name="model"):
+        import mip
+
+        super().__init__(model_name)
+        self._mip = mip
+        self.model = mip.Model(name=model_name, sense=mip.MINIMIZE,
+                               solver_name=mip.CBC)
+        self.model.verbose = 0
+        self.vars = []
+        self._objective = []
+
+    def _add_vars(self, count, lb, ub, obj, integer):
+        mip = self._mip
+        vtype = mip.INTEGER if integer else mip.CONTINUOUS
+        for k in range(count):
+            var = self.model.add_var(lb=lb[k], ub=ub[k], var_type=vtype)
+            self.vars.append(var)
+            if obj[k]:
+                self._objective.append(obj[k] * var)
+        self.model.objective = self._mip.xsum(self._objective)
+
+    def _add_row(self, indices, coefs, sense, rhs):
+        expr = self._mip.xsum(c * self.vars[i] for i, c in zip(indices, coefs))
+        if sense == "<=":
+            self.model.add_constr(expr <= rhs)
+        elif sense == ">=":
+            self.model.add_constr(expr >= rhs)
+        else:
+            self.model.add_constr(expr == rhs)
+
+    def read_model(self, path):
+        self.model.read(path)
+        self.vars = list(self.model.vars)
+        self.num_vars = len(self.vars)
+        return [var.name for var in self.vars]
+
+    def set_bounds(self, idx, lb, ub):
+        self.vars[idx].lb = lb
+        self.vars[idx].ub = ub
+
+    def set_start(self, values):
+        self.model.start = [(self.vars[i], v) for i, v in values.items()]
+
+    def set_params(self, time_limit=None, threads=None, seed=None,
+                   verbose=None, cutoff=None):
+        if time_limit is not None:
+            self.time_limit = time_limit
+        if threads is not None:
+            self.model.threads = threads
+        if seed is not None:
+            self.model.seed = seed
+        if verbose is not None:
+            self.model.verbose = 1 if verbose else 0
+        if cutoff is not None:
+            self.model.cutoff = cutoff
+
+    def _set_time_limit(self, seconds):
+        self._remaining = seconds
+
+    def _optimize(self):
+        mip = self._mip
+        limit = getattr(self, "_remaining", None) or self.time_limit
+
+        if limit is not None:
+            status = self.model.optimize(max_seconds=limit)
+        else:
+            status = self.model.optimize()
+        self._remaining = None
+
+        if status == mip.OptimizationStatus.OPTIMAL:
+            self.status = "Optimal"
+        elif status in (mip.OptimizationStatus.FEASIBLE,
+                        mip.OptimizationStatus.NO_SOLUTION_FOUND):
+            self.status = "TimeLimit"
+        elif status == mip.OptimizationStatus.INFEASIBLE:
+            self.status = "Infeasible"
+        else:
+            self.status = "Not Solved"
+
+    def _has_solution(self):
+        return self.model.num_solutions > 0
+
+    def values(self):
+        return [var.x for var in self.vars]
+
+    @property
+    def objective(self):
+        return self.model.objective_value
+
+
+# ============================================================
+# Factory
+# ============================================================
+
+BACKENDS = {
+    "gurobi": GurobiBackend,
+    "cplex": CplexBackend,
+    "highs": HighsBackend,
+    "cbc": CbcBackend,
+}
+
+
+class AutoBackend:
+    """
+    The first working backend of BACKEND_ORDER (make_backend(None)).
+
+    Solvers may construct fine and only refuse the model at optimize(),
+    e.g. gurobipy and CPLEX Community with their size-limited licenses.
+    The model building calls are recorded, and replayed on the next
+    backend of the order when optimize() hits a license error; other
+    attributes are those of the current backend.
+    """
+
+    _RECORDED = ("add_vars", "add_row", "add_rows", "read_model", "set_bounds",
+                 "set_start", "set_params", "set_lazy_callback")
+
+    def __init__(self, model_name="model"):
+        self.model_name = model_name
+        self._candidates = list(BACKEND_ORDER)
+        self._errors = []
+        self._calls = []
+        self.backend = self._next_backend()
+
+    def _next_backend(self):
+        while self._candidates:
+            candidate = self._candidates.pop(0)
+            try:
+                return BACKENDS[candidate](self.model_name)
+            except Exception as e:
+                self._errors.append(f"{candidate}: {e}")
+
+        raise RuntimeError("No MILP backend available (" + "; ".join(self._errors) + ")")
+
+    def __getattr__(self, attr):
+        if attr == "backend":
+            raise AttributeError(attr)
+        value = getattr(self.backend, attr)
+        if attr not in self._RECORDED:
+            return value
+
+        def recorded(*args, **kwargs):
+            # Nothing left to fall back on: no need to keep the calls
+            if self._candidates:
+                self._calls.append((attr, args, kwargs))
+            return value(*args, **kwargs)
+        return recorded
+
+    def optimize(self):
+        while True:
+            try:
+                return self.backend.optimize()
+            except Exception as e:
+                if not (self._candidates and self.backend._license_error(e)):
+                    raise
+                self._errors.append(f"{self.backend.name}: {e}")
+
+            self.backend = self._next_backend()
+            for attr, args, kwargs in self._calls:
+                getattr(self.backend, attr)(*args, **kwargs)
+
+
+def make_backend(name=None, model_name="model"):
+    """
+    Create a backend by name, or the first working one of BACKEND_ORDER
+    (see AutoBackend: missing packages are skipped at creation, license
+    and size limit errors at optimize()).
+    """
+    if name is not None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown MILP backend: {name}")
+        return BACKENDS[name](model_name)
+
+    return AutoBackend(model_name)
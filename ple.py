@@ -1,4 +1,8 @@
-def mbvst_relaxed_PLNE(VG, EG):
+import numpy as np
+
+
+def mbvst_relaxed_PLNE(VG, EG, index=None, lazy=False, backend=None,
+                       edge_costs=None):
     """
     Relaxed MILP formulation for the Minimum Branch Vertices
     Spanning Tree (MBVST).
@@ -9,93 +13,239 @@ def mbvst_relaxed_PLNE(VG, EG):
     - Feasibility is guaranteed on connected graphs
 
     Final tree structure is enforced heuristically.
+    `index` is the shared InstanceIndex, built here if not given.
+    `backend` names the MILP solver (see milp_backend.py, default:
+    first available).
+
+    With lazy=True, subtour and cutset rows are separated on every
+    integer incumbent, so the model only returns spanning trees.
+
+    `edge_costs` (aligned with index.EG) are added to the objective on
+    x to diversify the selection; the branch count still comes first
+    as long as any n - 1 of them sum to less than 1.
+
+    Returns (model, x, y) where x maps edges and y vertices to their
+    variable index in the backend model.
     """
 
-    import gurobipy as gp
-    from gurobipy import GRB
-    import networkx as nx
+    from instance_index import InstanceIndex
+    from milp_backend import make_backend, sparse_rows
+    from plne_cp2 import branch_bounds
+    from instrument import solver_verbose
+
+    if index is None:
+        index = InstanceIndex(VG, EG)
 
-    model = gp.Model("MBVST_relaxed")
+    n = index.n
+    m = index.m
+    model = make_backend(backend, "MBVST_relaxed")
+    model.set_params(verbose=solver_verbose())
 
     # --------------------------------------------------
     # Variables
     # --------------------------------------------------
-    # x[e] = 1 if edge e is selected
-    x = model.addVars(EG, vtype=GRB.BINARY, name="x")
+    # x[e] = 1 if edge e is selected (variable i is edge index.EG[i]),
+    # bridges are in every spanning tree
+    x_lb = np.zeros(m)
+    x_lb[index.bridge_ids] = 1
+    x_idx = model.add_vars(m, lb=x_lb, obj=0.0 if edge_costs is None else edge_costs)
+    x = dict(zip(index.EG, x_idx))
 
     # y[v] = 1 if vertex v is a branch vertex
-    y = model.addVars(VG, vtype=GRB.BINARY, name="y")
-
-    # --------------------------------------------------
     # Objective: minimize branch vertices
-    # --------------------------------------------------
-    model.setObjective(
-        gp.quicksum(y[v] for v in VG),
-        GRB.MINIMIZE
-    )
+    # Degree offsets (kernels, see reduction.py) count towards
+    # branching; vertices that can never / always branch are fixed.
+    y_lb, y_ub = branch_bounds(index)
+    y_idx = model.add_vars(n, lb=y_lb, ub=y_ub, obj=1.0)
+    y = dict(zip(index.VG, y_idx))
+
+    cols = model.num_vars
+    x0, y0 = x_idx.start, y_idx.start
 
     # --------------------------------------------------
     # (1) Cardinality: spanning-tree size
     # --------------------------------------------------
-    model.addConstr(
-        gp.quicksum(x[e] for e in EG) == len(VG) - 1,
-        name="cardinality"
-    )
+    model.add_row(x_idx, [1] * m, "==", n - 1)
 
     # --------------------------------------------------
-    # Build original graph
+    # (2) RELAXED cycle constraints (FIX)
+    #     At most |C| - 1 edges per cycle
     # --------------------------------------------------
-    G = nx.Graph()
-    G.add_nodes_from(VG)
-    G.add_edges_from(EG)
+    cycles = [c for c in index.core.cycle_basis(as_edges=True) if c]
+    sizes = np.array([len(c) for c in cycles], dtype=np.int64)
+    if len(cycles):
+        model.add_rows(
+            sparse_rows(
+                np.repeat(np.arange(len(cycles)), sizes),
+                x0 + np.concatenate(cycles), 1, (len(cycles), cols)
+            ),
+            "<=", sizes - 1
+        )
 
     # --------------------------------------------------
-    # (2) Mandatory bridges
+    # (3) Degree / branch linkage
     # --------------------------------------------------
-    for (u, v) in nx.bridges(G):
-        if (u, v) in EG:
-            model.addConstr(x[(u, v)] == 1, name=f"bridge_{u}_{v}")
-        elif (v, u) in EG:
-            model.addConstr(x[(v, u)] == 1, name=f"bridge_{v}_{u}")
+    vertices = np.arange(n)
+    off = index.offset
+    model.add_rows(
+        sparse_rows(
+            np.concatenate([index.src, index.dst, vertices]),
+            np.concatenate([x0 + np.arange(m), x0 + np.arange(m), y0 + vertices]),
+            np.concatenate([np.ones(2 * m), -(index.degree + off)]), (n, cols)
+        ),
+        "<=", 2 - off
+    )
 
     # --------------------------------------------------
-    # (3) RELAXED cycle constraints (FIX)
-    #     At most |C| - 1 edges per cycle
+    # (4) Lazy subtour / cutset separation
     # --------------------------------------------------
-    cycle_basis = nx.cycle_basis(G)
-
-    for idx, cycle in enumerate(cycle_basis):
-        cycle_edges = []
-        for i in range(len(cycle)):
-            u = cycle[i]
-            v = cycle[(i + 1) % len(cycle)]
-
-            if (u, v) in EG:
-                cycle_edges.append((u, v))
-            elif (v, u) in EG:
-                cycle_edges.append((v, u))
-
-        if cycle_edges:
-            model.addConstr(
-                gp.quicksum(x[e] for e in cycle_edges)
-                <= len(cycle_edges) - 1,
-                name=f"cycle_{idx}"
-            )
+    if lazy:
+        model.set_lazy_callback(_tree_separator(index, x_idx))
 
-    # --------------------------------------------------
-    # (4) Degree / branch linkage
-    # --------------------------------------------------
-    dG = {v: 0 for v in VG}
-    for u, v in EG:
-        dG[u] += 1
-        dG[v] += 1
-
-    for v in VG:
-        incident_edges = [e for e in EG if v in e]
-        model.addConstr(
-            gp.quicksum(x[e] for e in incident_edges)
-            <= 2 + dG[v] * y[v],
-            name=f"branch_{v}"
+    return model, x, y
+
+
+def optimize_relaxed(model):
+    """
+    Optimize the relaxed model (with its lazy separation if any).
+    """
+    model.optimize()
+
+
+def _tree_separator(index, x_idx):
+    """
+    Build the separator of the lazy mode.
+
+    The cardinality row fixes |V| - 1 edges, so an incumbent is a
+    spanning tree iff it is connected. Otherwise, for every component S:
+      - x(E(S)) <= |S| - 1 if S contains a cycle (subtour row)
+      - x(delta(S)) >= 1 (cutset row)
+    """
+    from union_find import UnionFind
+
+    src = index.src.tolist()
+    dst = index.dst.tolist()
+    first = x_idx[0] if len(x_idx) else 0
+
+    def separator(values):
+        values = values[first:first + index.m]
+
+        uf = UnionFind(index.n)
+        for i, val in enumerate(values):
+            if val > 0.5:
+                uf.union(src[i], dst[i])
+
+        if uf.components == 1:
+            return []
+
+        root = [uf.find(i) for i in range(index.n)]
+
+        inside = {}
+        crossing = {}
+        selected_inside = {}
+        for i in range(index.m):
+            ra = root[src[i]]
+            rb = root[dst[i]]
+            if ra == rb:
+                inside.setdefault(ra, []).append(x_idx[i])
+                if values[i] > 0.5:
+                    selected_inside[ra] = selected_inside.get(ra, 0) + 1
+            else:
+                crossing.setdefault(ra, []).append(x_idx[i])
+                crossing.setdefault(rb, []).append(x_idx[i])
+
+        rows = []
+        for r in set(root):
+            size = uf.size[r]
+
+            if selected_inside.get(r, 0) >= size:
+                rows.append((inside[r], [1] * len(inside[r]), "<=", size - 1))
+
+            cut = crossing.get(r, [])
+            rows.append((cut, [1] * len(cut), ">=", 1))
+
+        return rows
+
+    return separator
+
+
+def _cycle_edges(cycle, x):
+    """
+    Map a cycle given as a vertex list to the edge keys of x.
+    """
+    cycle_edges = []
+    for i in range(len(cycle)):
+        u = cycle[i]
+        v = cycle[(i + 1) % len(cycle)]
+
+        if (u, v) in x:
+            cycle_edges.append((u, v))
+        elif (v, u) in x:
+            cycle_edges.append((v, u))
+
+    return cycle_edges
+
+
+def selected_edges(model, x):
+    """
+    Edges set to 1 in the model's current solution.
+    """
+    values = model.values()
+    return [e for e, i in x.items() if values[i] > 0.5]
+
+
+def add_no_good_cut(model, x, selected_edges):
+    """
+    Exclude one edge selection from the relaxed model.
+
+    The cardinality row fixes the number of selected edges, so
+    forbidding all of them at once removes exactly this selection.
+    """
+    idx = [x[e] if e in x else x[(e[1], e[0])] for e in selected_edges]
+    model.add_row(idx, [1] * len(idx), "<=", len(idx) - 1)
+
+
+def add_cycle_cuts(model, x, cycles):
+    """
+    Add |C| - 1 rows for cycles found outside the model.
+    Returns the number of rows added.
+    """
+    added = 0
+    for cycle in cycles:
+        cycle_edges = _cycle_edges(cycle, x)
+        if len(cycle_edges) < 3:
+            continue
+
+        model.add_row(
+            [x[e] for e in cycle_edges], [1] * len(cycle_edges),
+            "<=", len(cycle_edges) - 1
         )
+        added += 1
 
-    return model, x, y
+    return added
+
+
+def set_warm_start(model, x, y, tree_edges, index=None):
+    """
+    Use a spanning tree as MIP start for the next optimize() call.
+    Degree offsets of `index` (kernels) count towards branching, as in
+    the branch rows of the model.
+    """
+    tree = {e if e in x else (e[1], e[0]) for e in tree_edges}
+
+    start = {}
+    if index is None:
+        degree = {v: 0 for v in y}
+    else:
+        degree = dict(zip(index.VG, index.offset.tolist()))
+    for e, i in x.items():
+        selected = e in tree
+        start[i] = 1 if selected else 0
+        if selected:
+            degree[e[0]] += 1
+            degree[e[1]] += 1
+
+    for v, i in y.items():
+        start[i] = 1 if degree[v] >= 3 else 0
+
+    model.set_start(start)
@@ -1,83 +1,169 @@
-import pulp
+import numpy as np
 import networkx as nx
 import graph_validation2
 import helper
 import time
+from instance_index import InstanceIndex
+from milp_backend import make_backend, sparse_rows
+from reduction import reduce_instance
+from instrument import event, timer, solver_verbose
 
-def solve_mbvst_flow(G, time_limit=60):
+def directed_arcs(index):
+    """
+    Arc 2i is EG[i] forward, 2i + 1 backward. Returns (tail, head):
+    arc endpoint vertex ids, as arrays.
+    """
+    tail = np.empty(2 * index.m, dtype=np.int64)
+    head = np.empty(2 * index.m, dtype=np.int64)
+    tail[0::2] = index.src
+    tail[1::2] = index.dst
+    head[0::2] = index.dst
+    head[1::2] = index.src
+    return tail, head
 
-    n = G.number_of_nodes()
-    nodes = list(G.nodes())
-    root = nodes[0]
 
-    # Build directed arc set
-    arcs = []
-    for u, v in G.edges():
-        arcs.append((u, v))
-        arcs.append((v, u))
+def branch_bounds(index, forced=()):
+    """
+    Bounds (lb, ub) of the branch variables y: 0 if v can never branch
+    (deg_G(v) + off(v) <= 2), 1 if it always does (off(v) >= 3 or v a
+    vertex id in `forced`).
+    """
+    deg_G = index.degree
+    off = index.offset
+    lb = np.zeros(index.n)
+    ub = np.ones(index.n)
+    ub[deg_G + off <= 2] = 0
+    lb[off >= 3] = 1
+    lb[np.asarray(forced, dtype=np.int64)] = 1
+    return lb, ub
 
-    A_plus = {v: [] for v in nodes}
-    A_minus = {v: [] for v in nodes}
 
-    for (u, v) in arcs:
-        A_plus[u].append((u, v))
-        A_minus[v].append((u, v))
+def build_flow_model(index, backend=None, relax=False):
+    """
+    Build the flow model of an InstanceIndex on a MILP backend
+    (LP relaxation if relax=True), one sparse row block per
+    constraint family.
+    Returns (model, x, f, y, tail, head): x / f index arc a = 2i (EG[i]
+    forward) or 2i + 1 (backward), from vertex id tail[a] to head[a].
+    """
 
-    deg_G = dict(G.degree())
+    n = index.n
+    m = index.m
+    root = 0
 
-    prob = pulp.LpProblem("MBVST_Flow", pulp.LpMinimize)
+    tail, head = directed_arcs(index)
+    arcs = np.arange(2 * m)
 
-    x = pulp.LpVariable.dicts("x", arcs, cat="Binary")
-    f = pulp.LpVariable.dicts("f", arcs, lowBound=0)
-    y = pulp.LpVariable.dicts("y", nodes, cat="Binary")
+    deg_G = index.degree
+    off = index.offset
+    y_lb, y_ub = branch_bounds(index)
 
-    # Objective
-    prob += pulp.lpSum(y[v] for v in nodes)
+    prob = make_backend(backend, "MBVST_Flow")
+    prob.set_params(verbose=solver_verbose())
 
-    # Incoming arc constraints
-    for v in nodes:
-        if v != root:
-            prob += pulp.lpSum(x[a] for a in A_minus[v]) == 1
+    # Objective on y; x, f and y are index ranges of the model
+    x = prob.add_vars(2 * m, integer=not relax)
+    f = prob.add_vars(2 * m, ub=float("inf"), integer=False)
+    y = prob.add_vars(n, lb=y_lb, ub=y_ub, obj=1.0, integer=not relax)
+    cols = prob.num_vars
+    x0, f0, y0 = x.start, f.start, y.start
 
-    # Root has no incoming arc
-    prob += pulp.lpSum(x[a] for a in A_minus[root]) == 0
+    # Incoming arc constraints, root has no incoming arc
+    rhs = np.ones(n)
+    rhs[root] = 0
+    prob.add_rows(sparse_rows(head, x0 + arcs, 1, (n, cols)), "==", rhs)
 
     # Anti-parallel constraint
-    for u, v in G.edges():
-        prob += x[(u, v)] + x[(v, u)] <= 1
+    prob.add_rows(sparse_rows(arcs // 2, x0 + arcs, 1, (m, cols)), "<=", 1)
 
     # Flow constraints
-    prob += (
-        pulp.lpSum(f[a] for a in A_plus[root])
-        - pulp.lpSum(f[a] for a in A_minus[root])
-        == n - 1
+    rhs = np.full(n, -1.0)
+    rhs[root] = n - 1
+    prob.add_rows(
+        sparse_rows(
+            np.concatenate([tail, head]), f0 + np.concatenate([arcs, arcs]),
+            np.repeat([1.0, -1.0], 2 * m), (n, cols)
+        ),
+        "==", rhs
     )
 
-    for v in nodes:
-        if v != root:
-            prob += (
-                pulp.lpSum(f[a] for a in A_plus[v])
-                - pulp.lpSum(f[a] for a in A_minus[v])
-                == -1
-            )
-
     # Flow-edge coupling
-    for (u, v) in arcs:
-        prob += f[(u, v)] <= (n - 1) * x[(u, v)]
-
-    # Branch vertex definition
-    for v in nodes:
-        prob += (
-            pulp.lpSum(x[a] for a in A_plus[v])
-            + pulp.lpSum(x[a] for a in A_minus[v])
-            - 2
-            <= deg_G[v] * y[v]
+    prob.add_rows(
+        sparse_rows(
+            np.concatenate([arcs, arcs]), np.concatenate([f0 + arcs, x0 + arcs]),
+            np.repeat([1.0, -(n - 1)], 2 * m), (2 * m, cols)
+        ),
+        "<=", 0
+    )
+
+    # Bridges are in every tree
+    bridges = np.asarray(index.bridge_ids, dtype=np.int64)
+    prob.add_rows(
+        sparse_rows(
+            np.repeat(np.arange(len(bridges)), 2),
+            x0 + np.stack([2 * bridges, 2 * bridges + 1], axis=1).ravel(),
+            1, (len(bridges), cols)
+        ),
+        "==", 1
+    )
+
+    # Branch vertex definition (with kernel degree offsets)
+    vertices = np.arange(n)
+    prob.add_rows(
+        sparse_rows(
+            np.concatenate([tail, head, vertices]),
+            np.concatenate([x0 + arcs, x0 + arcs, y0 + vertices]),
+            np.concatenate([np.ones(4 * m), -(deg_G + off)]), (n, cols)
+        ),
+        "<=", 2 - off
+    )
+
+    return prob, x, f, y, tail, head
+
+
+def solve_mbvst_flow(G, time_limit=60, index=None, threads=None, backend=None,
+                     reduce=False, start_tree=None, cutoff=None):
+    """
+    Single-commodity flow model of the MBVST.
+
+    `start_tree` (spanning tree edges) is given to the solver as MIP
+    start for x, f and y, and `cutoff` (typically its branch count)
+    as objective upper bound.
+    Returns (tree as nx.Graph, status, runtime).
+    """
+
+    if index is None:
+        index = InstanceIndex(list(G.nodes()), list(G.edges()))
+
+    if reduce:
+        return solve_reduced(
+            solve_mbvst_flow, index, time_limit, threads, backend,
+            start_tree, cutoff
         )
 
-    solver = pulp.CPLEX_CMD(timeLimit=time_limit, msg=True)
+    root = 0
+    nodes = index.VG
+    with timer("model_build"):
+        prob, x, f, y, tail, head = build_flow_model(index, backend)
+    off = [index.deg_offset[v] for v in nodes]
+
+    # Warm start and incumbent bound (integral objective, so +0.5
+    # keeps solutions as good as the start)
+    if start_tree is not None:
+        start = tree_start(index, start_tree, root, x, y, off, f=f)
+        if start is None:
+            event("start_rejected")
+        else:
+            prob.set_start(start)
+
+    prob.set_params(
+        time_limit=time_limit, threads=threads,
+        cutoff=None if cutoff is None else cutoff + 0.5
+    )
 
     start_time = time.time()
-    status = prob.solve(solver)
+    with timer("optimize"):
+        prob.optimize()
     end_time = time.time()
 
     runtime = end_time - start_time
@@ -85,12 +171,104 @@ def solve_mbvst_flow(G, time_limit=60):
     T = nx.Graph()
     T.add_nodes_from(nodes)
 
-    for (u, v) in arcs:
-        if pulp.value(x[(u, v)]) == 1:
-            if not T.has_edge(u, v):
-                T.add_edge(u, v)
+    if prob.has_solution:
+        values = np.asarray(prob.values())[x.start:x.stop]
+        T.add_edges_from(index.EG[a // 2] for a in np.flatnonzero(values > 0.5).tolist())
+
+    return T, prob.status, runtime
+
+
+def tree_start(index, tree_edges, root, x, y, off, f=None):
+    """
+    MIP start {variable: value} of a spanning tree: arcs oriented away
+    from the root, each carrying the size of the subtree below it (if
+    flow variables f are given).
+    Returns None if tree_edges is not a spanning tree of the index.
+    """
+    n = index.n
+    if len(tree_edges) != n - 1:
+        return None
+
+    vertex_id = index.vertex_id
+    tree_adj = [[] for _ in range(n)]
+    for (u, v) in tree_edges:
+        if not index.has_edge(u, v):
+            return None
+        a = vertex_id[u]
+        b = vertex_id[v]
+        tree_adj[a].append(b)
+        tree_adj[b].append(a)
+
+    # BFS order from the root
+    parent = [-1] * n
+    parent[root] = root
+    order = [root]
+    for u in order:
+        for w in tree_adj[u]:
+            if parent[w] == -1:
+                parent[w] = u
+                order.append(w)
+
+    if len(order) != n:
+        return None
+
+    start = {i: 0 for i in x}
+    if f is not None:
+        start.update({i: 0 for i in f})
+
+    size = [1] * n
+    for w in reversed(order[1:]):
+        u = parent[w]
+        size[u] += size[w]
+
+        i = index.core.find_edge(u, w)
+        a = 2 * i if index.src[i] == u else 2 * i + 1
+        start[x[a]] = 1
+        if f is not None:
+            start[f[a]] = size[w]
+
+    for v in range(n):
+        start[y[v]] = 1 if len(tree_adj[v]) + off[v] >= 3 else 0
+
+    return start
+
+
+def solve_reduced(solve, index, time_limit, threads, backend, start_tree, cutoff):
+    """
+    Solve the kernel of the instance (see reduction.py) with `solve`
+    (solve_mbvst_flow or an exact solver of the same signature), then
+    lift its tree back to the original graph. The start tree and
+    cutoff are given for the original graph.
+    """
+    start_time = time.time()
+    with timer("reduce"):
+        kernel = reduce_instance(index.VG, index.EG, index=index)
+    event("kernel", summary=kernel.summary(), n=kernel.n, m=kernel.m,
+          fixed_branches=kernel.fixed_branches)
+
+    if start_tree is not None:
+        start_tree = kernel.restrict(start_tree)
+    if cutoff is not None:
+        cutoff -= kernel.fixed_branches
+
+    if kernel.m == 0:
+        T_k = nx.Graph()
+        T_k.add_nodes_from(kernel.VG)
+        status = "Optimal"
+    else:
+        T_k, status, _ = solve(
+            None, time_limit=time_limit, index=kernel.index,
+            threads=threads, backend=backend,
+            start_tree=start_tree, cutoff=cutoff
+        )
+
+    T = nx.Graph()
+    T.add_nodes_from(index.VG)
+    if nx.is_tree(T_k):
+        with timer("lift"):
+            T.add_edges_from(kernel.lift(T_k.edges()))
 
-    return T, pulp.LpStatus[status], runtime
+    return T, status, time.time() - start_time
 
 
 #graph_path = r"Instances\Instances\Spd_Inst_Rid_Final2\Spd_RF2_500_672_5203.txt"
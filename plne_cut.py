@@ -0,0 +1,287 @@
+import time
+
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_flow, breadth_first_order, connected_components
+
+from instance_index import InstanceIndex
+from milp_backend import make_backend, sparse_rows
+from plne_cp2 import (
+    directed_arcs, branch_bounds, tree_start, solve_reduced
+)
+from lower_bound import forced_branch_vertices
+from instrument import event, timer, solver_verbose
+
+
+# ============================================================
+# Branch-and-cut model of the MBVST
+# ============================================================
+#
+# Arborescence rooted at vertex 0 on arcs z (arc 2i = EG[i] forward,
+# 2i + 1 backward), without flow variables:
+#
+#   z(delta-(v)) = 1 (v != root), z(delta-(root)) = 0
+#   z(2i) + z(2i + 1) <= 1, = 1 on bridges
+#   z(delta-(S)) >= 1 for every S not containing the root (cutsets)
+#   z(delta(v)) - (deg_G(v) + off(v) - 2) y(v) <= 2 - off(v)
+#
+# Cutsets are exponentially many and added on demand: first by
+# max-flow / min-cut separation on the LP relaxation (root cutting
+# planes), then as lazy rows on every integer incumbent. The LP bound
+# of the cutset formulation is the one of the directed spanning tree
+# polytope, much tighter than the f <= (n - 1) x coupling of the flow
+# model (plne_cp2.py), and the branch rows use the smallest valid
+# big-M: the tree degree of v never exceeds deg_G(v). Vertices forced
+# to branch (lower_bound.py) have y fixed to 1.
+
+CUT_EPS = 1e-6
+FLOW_SCALE = 10 ** 6        # max-flow runs on integer capacities
+MAX_CUTS_PER_ROUND = 200
+MAX_LP_ROUNDS = 100
+LP_TIME_SHARE = 0.3         # at most this share of the time limit on LP rounds
+
+
+def build_cut_model(index, backend=None, relax=False):
+    """
+    Cutset model of an InstanceIndex without cutset rows
+    (LP relaxation if relax=True).
+    Returns (model, z, y, tail, head).
+    """
+    n = index.n
+    m = index.m
+    root = 0
+
+    tail, head = directed_arcs(index)
+    arcs = np.arange(2 * m)
+    deg_G = index.degree
+    off = index.offset
+    forced = [index.vertex_id[v] for v in forced_branch_vertices(None, None, index=index)]
+    y_lb, y_ub = branch_bounds(index, forced)
+
+    prob = make_backend(backend, "MBVST_Cut")
+    prob.set_params(verbose=solver_verbose())
+    z = prob.add_vars(2 * m, integer=not relax)
+    y = prob.add_vars(n, lb=y_lb, ub=y_ub, obj=1.0, integer=not relax)
+    cols = prob.num_vars
+    z0, y0 = z.start, y.start
+
+    # One arc into every vertex but the root
+    rhs = np.ones(n)
+    rhs[root] = 0
+    prob.add_rows(sparse_rows(head, z0 + arcs, 1, (n, cols)), "==", rhs)
+
+    # One orientation per edge, bridges in every tree
+    prob.add_rows(sparse_rows(arcs // 2, z0 + arcs, 1, (m, cols)), "<=", 1)
+    bridges = np.asarray(index.bridge_ids, dtype=np.int64)
+    prob.add_rows(
+        sparse_rows(
+            np.repeat(np.arange(len(bridges)), 2),
+            z0 + np.stack([2 * bridges, 2 * bridges + 1], axis=1).ravel(),
+            1, (len(bridges), cols)
+        ),
+        "==", 1
+    )
+
+    # Branch vertices with y free, big-M = deg_G(v) + off(v) - 2
+    free = np.flatnonzero(y_lb < y_ub)
+    row = np.full(n, -1)
+    row[free] = np.arange(len(free))
+    at = np.concatenate([tail, head])
+    keep = row[at] >= 0
+    prob.add_rows(
+        sparse_rows(
+            np.concatenate([row[at][keep], row[free]]),
+            np.concatenate([z0 + np.concatenate([arcs, arcs])[keep], y0 + free]),
+            np.concatenate([np.ones(int(keep.sum())), -(deg_G + off - 2)[free]]),
+            (len(free), cols)
+        ),
+        "<=", (2 - off)[free]
+    )
+
+    return prob, z, y, tail, head
+
+
+def _cutset_row(z, tail, head, sink_side):
+    """
+    z(delta-(S)) >= 1 for the vertex mask S.
+    """
+    entering = np.flatnonzero(sink_side[head] & ~sink_side[tail])
+    return [z[a] for a in entering.tolist()], [1] * len(entering), ">=", 1
+
+
+class CutSeparator:
+    """
+    Violated cutsets of arc values, root = vertex 0.
+
+    - unreachable(values): one cut per weak component of the vertices
+      the root cannot reach through arcs of value > 0 (all violated
+      cuts of an integer point, in O(n + m))
+    - min_cuts(values): max-flow root -> t for every sink t not yet
+      behind a found cut; the sink side of each minimum cut of value
+      < 1 is a violated cutset (fractional points). Stops at `deadline`
+      with the cuts found so far.
+    """
+
+    def __init__(self, n, z, tail, head):
+        self.n = n
+        self.z = z
+        self.tail = np.asarray(tail, dtype=np.int32)
+        self.head = np.asarray(head, dtype=np.int32)
+        self.first = z[0] if len(z) else 0
+
+    def _arc_values(self, values):
+        return np.asarray(values[self.first:self.first + len(self.z)], dtype=float)
+
+    def unreachable(self, values):
+        n = self.n
+        support = self._arc_values(values) > CUT_EPS
+        t = self.tail[support]
+        h = self.head[support]
+        graph = csr_matrix((np.ones(len(t)), (t, h)), shape=(n, n))
+
+        reached = np.zeros(n, dtype=bool)
+        reached[breadth_first_order(graph, 0, directed=True, return_predecessors=False)] = True
+        if reached.all():
+            return []
+
+        # Weak components of the support among unreached vertices
+        inner = ~reached[t] & ~reached[h]
+        sub = csr_matrix((np.ones(int(inner.sum())), (t[inner], h[inner])), shape=(n, n))
+        _, labels = connected_components(sub, directed=True, connection="weak")
+
+        rows = []
+        for label in np.unique(labels[~reached]).tolist():
+            sink_side = (labels == label) & ~reached
+            rows.append(_cutset_row(self.z, self.tail, self.head, sink_side))
+        return rows
+
+    def min_cuts(self, values, max_cuts=MAX_CUTS_PER_ROUND, deadline=None):
+        n = self.n
+        cap = np.rint(self._arc_values(values) * FLOW_SCALE).astype(np.int32)
+        keep = cap > 0
+        graph = csr_matrix((cap[keep], (self.tail[keep], self.head[keep])), shape=(n, n))
+
+        rows = []
+        covered = np.zeros(n, dtype=bool)
+        covered[0] = True
+        for t in range(1, n):
+            if covered[t]:
+                continue
+            if deadline is not None and time.time() >= deadline:
+                break
+            result = maximum_flow(graph, 0, t)
+            if result.flow_value >= FLOW_SCALE * (1 - CUT_EPS):
+                continue
+
+            # Source side: reachable from the root in the residual graph
+            residual = graph - result.flow
+            residual.data = (residual.data > 0).astype(np.int8)
+            residual.eliminate_zeros()
+            source_side = np.zeros(n, dtype=bool)
+            source_side[breadth_first_order(residual, 0, directed=True,
+                                            return_predecessors=False)] = True
+
+            rows.append(_cutset_row(self.z, self.tail, self.head, ~source_side))
+            covered |= ~source_side
+            if len(rows) >= max_cuts:
+                break
+        return rows
+
+    def __call__(self, values):
+        # Lazy callback on integer incumbents
+        return self.unreachable(values)
+
+
+def _root_cuts(index, backend, deadline):
+    """
+    Cutting-plane rounds on the LP relaxation until `deadline` (epoch
+    seconds), model build and separation included.
+    Returns (cut rows, LP bound or None).
+    """
+    with timer("model_build"):
+        lp, z, _, tail, head = build_cut_model(index, backend, relax=True)
+    separate = CutSeparator(index.n, z, tail, head)
+
+    cuts = []
+    bound = None
+    for _ in range(MAX_LP_ROUNDS):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        lp.set_params(time_limit=remaining)
+        with timer("optimize"):
+            lp.optimize()
+        if lp.status != "Optimal":
+            break
+        bound = lp.objective
+
+        values = lp.values()
+        with timer("separation"):
+            rows = (separate.unreachable(values)
+                    or separate.min_cuts(values, deadline=deadline))
+        if not rows:
+            break
+        for row in rows:
+            lp.add_row(*row)
+        cuts += rows
+
+    return cuts, bound
+
+
+def solve_mbvst_cuts(G, time_limit=60, index=None, threads=None, backend=None,
+                     reduce=False, start_tree=None, cutoff=None):
+    """
+    Branch-and-cut for the MBVST (see above), with the interface of
+    solve_mbvst_flow: `start_tree` as MIP start, `cutoff` as objective
+    upper bound, reduce=True to solve the kernel.
+    Returns (tree as nx.Graph, status, runtime).
+    """
+    if index is None:
+        index = InstanceIndex(list(G.nodes()), list(G.edges()))
+
+    if reduce:
+        return solve_reduced(
+            solve_mbvst_cuts, index, time_limit, threads, backend,
+            start_tree, cutoff
+        )
+
+    start_time = time.time()
+    root = 0
+    nodes = index.VG
+
+    cuts, bound = _root_cuts(index, backend, start_time + time_limit * LP_TIME_SHARE)
+    event("root_cuts", cuts=len(cuts),
+          bound=None if bound is None else round(bound, 3))
+
+    with timer("model_build"):
+        prob, z, y, tail, head = build_cut_model(index, backend)
+        for row in cuts:
+            prob.add_row(*row)
+    prob.set_lazy_callback(CutSeparator(index.n, z, tail, head))
+
+    if start_tree is not None:
+        off = index.offset.tolist()
+        start = tree_start(index, start_tree, root, z, y, off)
+        if start is None:
+            event("start_rejected")
+        else:
+            prob.set_start(start)
+
+    prob.set_params(
+        time_limit=max(1.0, time_limit - (time.time() - start_time)),
+        threads=threads,
+        cutoff=None if cutoff is None else cutoff + 0.5
+    )
+
+    with timer("optimize"):
+        prob.optimize()
+
+    T = nx.Graph()
+    T.add_nodes_from(nodes)
+
+    if prob.has_solution:
+        values = np.asarray(prob.values())[z.start:z.stop]
+        T.add_edges_from(index.EG[a // 2] for a in np.flatnonzero(values > 0.5).tolist())
+
+    return T, prob.status, time.time() - start_time
@@ -1,28 +1,26 @@
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load CSV
-df = pd.read_csv("results.csv")
+from results_store import ResultsStore
 
-# Keep only rows where exact solution exists
-df_valid = df.dropna(subset=["exact_branch_vertices"])
+# Results store written by main.py, and the run to plot (default: latest)
+# python plots.py [results.sqlite] [run_id]
+RESULTS_DB = sys.argv[1] if len(sys.argv) > 1 else "results.sqlite"
 
-# Compute gap (%)
-df_valid["gap"] = (
-    (df_valid["heuristic_branch_vertices"] - df_valid["exact_branch_vertices"])
-    / df_valid["exact_branch_vertices"]
-) * 100
+store = ResultsStore(RESULTS_DB)
+run_id = int(sys.argv[2]) if len(sys.argv) > 2 else store.latest_run()
+if run_id is None:
+    sys.exit(f"[ERROR] No run in {RESULTS_DB}")
 
-# Group by graph size
-summary = df_valid.groupby(["n", "m"]).agg(
-    instances=("instance", "count"),
-    exact_avg=("exact_branch_vertices", "mean"),
-    heuristic_avg=("heuristic_branch_vertices", "mean"),
-    gap_avg=("gap", "mean"),
-    exact_time_avg=("exact_time", "mean"),
-    heuristic_time_avg=("heuristic_time", "mean"),
-).reset_index()
+# Per-(n, m) averages over the instances solved by both methods,
+# pre-aggregated by the store (gap in % of the exact value)
+summary = pd.DataFrame(store.pair_summary(run_id))
+if summary.empty:
+    sys.exit(f"[ERROR] Run {run_id} has no instance solved by both methods")
 
+print(f"Run {run_id}")
 print(summary)
 
 plt.figure()
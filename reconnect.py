@@ -1,46 +1,104 @@
-import networkx as nx
+from union_find import UnionFind
 
-def reconnect_component(forest_edges, VG, EG, dG):
 
-    G = nx.Graph()
-    G.add_nodes_from(VG)
-    G.add_edges_from(forest_edges)
+def reconnect_component(forest_edges, VG, EG, dG, index=None, rank=None):
+    """
+    Connect a disconnected edge selection by attaching every secondary
+    component to the largest one.
 
-    # Get connected components
-    components = list(nx.connected_components(G))
-    if len(components) <= 1:
+    For each component, the EG edge towards the main component that
+    creates the fewest new branch vertices is added, using a degree map
+    kept up to date as edges are added (starting from the index's
+    degree offsets, if any).
+
+    Components come from a disjoint-set pass over the selection, and
+    candidate edges from a single pass over EG, so the cost stays
+    O(m α(n)) whatever the number of components.
+
+    Tie-breaking: components are handled in the order of their first
+    vertex in VG, the main component is the first largest one, and
+    among equally good edges the one whose component endpoint (then
+    main endpoint) comes first in VG is kept, or has the lowest
+    rank[vertex id] if `rank` is given. This last rule deliberately
+    differs from the set-based version it replaces, which kept the
+    first of equally good edges in set iteration order (for string
+    labels, a hash order that changes from one process to the next):
+    the selected edges can differ on ties.
+    """
+    n = len(VG)
+    vertex_id = index.vertex_id if index is not None else {v: i for i, v in enumerate(VG)}
+
+    # --------------------------------------------------
+    # Components and degrees of the selection
+    # --------------------------------------------------
+    uf = UnionFind(n)
+    if index is not None:
+        degree = index.offset.tolist()
+    else:
+        degree = [0] * n
+    for (u, v) in forest_edges:
+        a = vertex_id[u]
+        b = vertex_id[v]
+        degree[a] += 1
+        degree[b] += 1
+        uf.union(a, b)
+
+    if uf.components <= 1:
         return forest_edges  # already connected
 
+    root = [uf.find(i) for i in range(n)]
+
+    order = []
+    seen = set()
+    for r in root:
+        if r not in seen:
+            seen.add(r)
+            order.append(r)
+
     # Pick the largest component as the main component
-    main_comp = max(components, key=len)
-    other_comps = [c for c in components if c != main_comp]
+    main = max(order, key=lambda r: uf.size[r])
 
-    new_edges = set(forest_edges)
+    # --------------------------------------------------
+    # One pass over EG: edges towards the main component
+    # --------------------------------------------------
+    if index is not None:
+        ends = zip(index.src.tolist(), index.dst.tolist())
+    else:
+        ends = ((vertex_id[u], vertex_id[v]) for (u, v) in EG)
 
-    for comp in other_comps:
-        # Find candidate edges connecting comp to main_comp
-        candidates = [(u, v) for u in comp for v in main_comp if (u, v) in EG or (v, u) in EG]
-        if not candidates:
-            raise ValueError("No edge to reconnect component exists in EG")
+    candidates = {r: [] for r in order if r != main}
+    for (a, b) in ends:
+        if root[b] == main and root[a] != main:
+            candidates[root[a]].append((a, b))
+        elif root[a] == main and root[b] != main:
+            candidates[root[b]].append((b, a))
 
-        # Select the edge that minimizes branching vertices
-        best_edge = None
-        min_new_branches = float('inf')
-        for u, v in candidates:
-            # Compute degrees if this edge is added
-            deg_u = sum(1 for e in new_edges if u in e) + 1
-            deg_v = sum(1 for e in new_edges if v in e) + 1
+    new_edges = list(forest_edges)
 
-            # Count new branching vertices (degree > 2)
-            new_branches = (deg_u > 2) + (deg_v > 2)
+    for r in order:
+        if r == main:
+            continue
 
-            if new_branches < min_new_branches:
-                min_new_branches = new_branches
-                best_edge = (u, v)
+        # Select the edge that minimizes branching vertices
+        best_edge = None
+        best_key = None
+        for (a, b) in candidates[r]:
+            new_branches = (degree[a] + 1 > 2) + (degree[b] + 1 > 2)
+            if rank is None:
+                key = (new_branches, a, b)
+            else:
+                key = (new_branches, rank[a], rank[b])
+            if best_key is None or key < best_key:
+                best_key = key
+                best_edge = (a, b)
 
-        new_edges.add(best_edge)
-        # Update the graph
-        G.add_edge(*best_edge)
+        if best_edge is None:
+            raise ValueError("No edge to reconnect component exists in EG")
 
-    return list(new_edges)
+        a, b = best_edge
+        degree[a] += 1
+        degree[b] += 1
+        uf.union(a, b)
+        new_edges.append((VG[a], VG[b]))
 
+    return new_edges
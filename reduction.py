@@ -0,0 +1,278 @@
+import numpy as np
+
+from instance_index import InstanceIndex
+
+
+# ============================================================
+# Safe reductions (kernelization) for the MBVST
+# ============================================================
+#
+# Every reduction keeps the optimum: a spanning tree of the kernel
+# lifts to a spanning tree of the original graph with exactly
+# kernel.fixed_branches more branch vertices, where kernel branch
+# vertices count the degree offsets (see InstanceIndex.branch_count).
+#
+#   - Pendant trees: a degree-1 vertex keeps its edge in every tree.
+#     It is removed, its branch status is fixed, and its neighbour
+#     gets +1 degree offset. Repeated, this strips whole pendant trees.
+#   - Degree-2 chains a - c1 - ... - ck - b (ci of original degree 2):
+#     a tree drops at most one chain edge, and dropping an inner edge
+#     is dominated by dropping an end edge, so the chain is contracted
+#     to a - c1 - b with c1 - b standing for ck - b and the inner edges
+#     forced. A chain closing on itself (a == b) is fixed outright:
+#     everything but ck - a is forced, and a gets +1 degree offset.
+#   - Vertices of degree <= 2 (kernel degree + offset) never branch,
+#     vertices with offset >= 3 always do: both are fixed in the models.
+#   - Remaining bridges are forced edges of the kernel (index.bridges),
+#     fixed in both models.
+
+
+class Kernel:
+    """
+    Reduced instance.
+
+    - VG, EG, deg_offset : the kernel graph and the tree degree each
+                           kernel vertex gets from removed edges
+    - index              : InstanceIndex of the kernel (with offsets)
+    - forced_edges       : original edges present in every tree
+    - fixed_branches     : branch vertices among removed vertices
+    - lift(tree_edges)   : kernel tree -> original spanning tree
+    - restrict(tree_edges) : original spanning tree -> kernel tree
+    """
+
+    def __init__(self, original, VG, EG, deg_offset, forced_edges,
+                 fixed_branches, represents):
+        self.original = original
+        self.VG = VG
+        self.EG = EG
+        self.deg_offset = deg_offset
+        self.forced_edges = forced_edges
+        self.fixed_branches = fixed_branches
+        self._represents = represents
+        self._index = None
+
+    @property
+    def n(self):
+        return len(self.VG)
+
+    @property
+    def m(self):
+        return len(self.EG)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = InstanceIndex(self.VG, self.EG, deg_offset=self.deg_offset)
+        return self._index
+
+    def lift(self, tree_edges):
+        """
+        Map kernel tree edges back to the original graph, adding the
+        forced edges. Edges are oriented as in the original EG.
+        """
+        original = self.original
+        edges = list(self.forced_edges)
+        for (u, v) in tree_edges:
+            rep = self._represents.get((u, v)) or self._represents.get((v, u))
+            if rep is not None:
+                u, v = rep[0]
+            edges.append(original.edge_key(u, v))
+        return edges
+
+    def restrict(self, tree_edges):
+        """
+        Map a spanning tree of the original graph to a kernel tree
+        whose lift has at most as many branch vertices (a chain broken
+        at an inner edge is broken at its far end instead).
+        Used to warm start kernel models from original solutions.
+        """
+        original = self.original
+        in_tree = np.zeros(original.m + 1, dtype=bool)   # slot m: absent
+        in_tree[original.edge_ids(tree_edges)] = True
+        in_tree[-1] = False
+        kept = in_tree[original.edge_ids(self.EG)]
+
+        # Chain edges: kept iff all the original edges are in the tree
+        chains = []
+        chain_edges = []
+        for i, e in enumerate(self.EG):
+            rep = self._represents.get(e)
+            if rep is not None:
+                last, inner = rep
+                chains += [i] * (1 + len(inner))
+                chain_edges += [last] + inner
+        if chains:
+            kept[chains] = True
+            np.logical_and.at(kept, chains, in_tree[original.edge_ids(chain_edges)])
+
+        edges = []
+        for (u, v), keep in zip(self.EG, kept.tolist()):
+            if keep:
+                edges.append((u, v))
+        return edges
+
+    def summary(self):
+        return (
+            f"{self.n} vertices, {self.m} edges "
+            f"(from {self.original.n}, {self.original.m}), "
+            f"{self.fixed_branches} fixed branch vertices"
+        )
+
+
+def reduce_instance(VG, EG, index=None):
+    """
+    Apply the reductions above until none applies, starting from the
+    degree offsets of the index (e.g. on a block, see decompose.py).
+    Returns a Kernel (the original graph itself if nothing reduces).
+    """
+    if index is None:
+        index = InstanceIndex(VG, EG)
+
+    n = index.n
+    VG = index.VG
+    src = index.src.tolist()
+    dst = index.dst.tolist()
+
+    adj = [set() for _ in range(n)]
+    for a, b in zip(src, dst):
+        adj[a].add(b)
+        adj[b].add(a)
+
+    alive = [True] * n
+    offset = index.offset.tolist()
+    forced = []
+    fixed_branches = 0
+
+    # Kernel edge (a, b) -> (original edge, forced inner edges), ids,
+    # for contracted chains
+    represents = {}
+
+    def original_edge(a, b):
+        rep = represents.get((a, b)) or represents.get((b, a))
+        return (a, b) if rep is None else rep[0]
+
+    def inner_edges(a, b):
+        rep = represents.get((a, b)) or represents.get((b, a))
+        return [] if rep is None else rep[1]
+
+    def remove_edge(a, b):
+        adj[a].discard(b)
+        adj[b].discard(a)
+
+    pending = [v for v in range(n) if len(adj[v]) == 1]
+
+    changed = True
+    while changed:
+        changed = False
+
+        # --------------------------------------------------
+        # Pendant trees
+        # --------------------------------------------------
+        while pending:
+            v = pending.pop()
+            if not alive[v] or len(adj[v]) != 1:
+                continue
+
+            (u,) = adj[v]
+            forced.append(original_edge(v, u))
+            remove_edge(v, u)
+            alive[v] = False
+            fixed_branches += (1 + offset[v] >= 3)
+            offset[u] += 1
+            changed = True
+
+            if len(adj[u]) == 1:
+                pending.append(u)
+
+        # --------------------------------------------------
+        # Degree-2 chains
+        # --------------------------------------------------
+        def inner(v):
+            return alive[v] and len(adj[v]) == 2 and offset[v] == 0
+
+        visited = [False] * n
+        for start in range(n):
+            if visited[start] or not inner(start):
+                continue
+
+            # Walk to the anchor on each side of start
+            sides = []
+            for first in adj[start]:
+                path = [start]
+                prev, cur = start, first
+                while inner(cur) and cur != start:
+                    path.append(cur)
+                    (nxt,) = adj[cur] - {prev}
+                    prev, cur = cur, nxt
+                sides.append((path, cur))
+
+            (left, a), (right, b) = sides
+            if a == start:
+                continue  # isolated cycle, no anchor
+
+            chain = left[::-1] + right[1:]    # a - chain... - b
+            for c in chain:
+                visited[c] = True
+
+            c1 = chain[0]
+            ck = chain[-1]
+
+            if a == b:
+                # Closed chain: force all but its last edge
+                path = [a] + chain
+                for x, y in zip(path, path[1:]):
+                    forced.append(original_edge(x, y))
+                    remove_edge(x, y)
+                remove_edge(ck, a)
+                for c in chain:
+                    alive[c] = False
+                offset[a] += 1
+                if len(adj[a]) == 1:
+                    pending.append(a)
+                changed = True
+
+            elif len(chain) > 1:
+                # a - c1 - b, c1 - b standing for ck - b
+                last = original_edge(ck, b)
+                hidden = list(inner_edges(ck, b))
+                for x, y in zip(chain, chain[1:]):
+                    forced.append(original_edge(x, y))
+                    hidden += [original_edge(x, y)] + inner_edges(x, y)
+                    remove_edge(x, y)
+                remove_edge(ck, b)
+                for c in chain[1:]:
+                    alive[c] = False
+                adj[c1].add(b)
+                adj[b].add(c1)
+                represents[(c1, b)] = (last, hidden)
+                changed = True
+
+    if all(alive) and not forced:
+        return Kernel(index, VG, index.EG, dict(index.deg_offset), [], 0, {})
+
+    # --------------------------------------------------
+    # Kernel graph (original edges keep their order)
+    # --------------------------------------------------
+    kernel_VG = [VG[v] for v in range(n) if alive[v]]
+
+    kernel_EG = []
+    for (u, v), a, b in zip(index.EG, src, dst):
+        if alive[a] and alive[b] and b in adj[a] and (a, b) not in represents \
+                and (b, a) not in represents:
+            kernel_EG.append((u, v))
+
+    label_represents = {}
+    for (a, b), ((x, y), hidden) in represents.items():
+        if alive[a] and alive[b] and b in adj[a]:
+            kernel_EG.append((VG[a], VG[b]))
+            label_represents[(VG[a], VG[b])] = (
+                (VG[x], VG[y]), [(VG[p], VG[q]) for p, q in hidden]
+            )
+
+    deg_offset = {VG[v]: offset[v] for v in range(n) if alive[v] and offset[v]}
+    forced_edges = [index.edge_key(VG[x], VG[y]) for x, y in forced]
+
+    return Kernel(
+        index, kernel_VG, kernel_EG, deg_offset, forced_edges,
+        fixed_branches, label_represents
+    )
@@ -0,0 +1,67 @@
+import os
+import json
+import hashlib
+
+
+# ============================================================
+# Content-addressed cache of results and solution trees
+# ============================================================
+
+_file_hashes = {}
+
+
+def file_hash(path):
+    """
+    SHA-256 of the instance file contents (memoized per path and mtime).
+    """
+    stamp = (path, os.path.getmtime(path))
+    if stamp not in _file_hashes:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _file_hashes[stamp] = h.hexdigest()
+    return _file_hashes[stamp]
+
+
+def cache_key(path, method, params):
+    """
+    Key covering the instance contents, the method and its parameters
+    (time limits, iteration counts, code version...).
+    """
+    payload = json.dumps(
+        {"instance": file_hash(path), "method": method, "params": params},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    One JSON file per key: {"fields": {...}, "tree": [[u, v], ...]}.
+    Writes are atomic (temp file + rename), so concurrent runs and
+    crashes never leave a partial entry behind.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key, fields, tree=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"fields": fields, "tree": tree}, f)
+        os.replace(tmp, path)
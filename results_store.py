@@ -0,0 +1,358 @@
+import sys
+import csv
+import json
+import time
+import sqlite3
+
+
+# ============================================================
+# Indexed results store (SQLite)
+# ============================================================
+#
+# One row per (run, instance, method), where a run is one batch with
+# its parameters, plus aggregates kept up to date by every insert:
+#
+#   summary : per (run, method, n, m), count and sums of branch
+#             vertices, runtimes and gaps to the lower bound
+#   pairs   : per (run, n, m), instances solved by both methods, with
+#             the sums behind the heuristic-vs-exact plots
+#
+# so reports read a few rows per size class whatever the history.
+# Inserts run in IMMEDIATE transactions in WAL mode: several processes
+# (parallel batches, a report in progress) can share the file, and
+# re-inserting a (run, instance, method) replaces its contribution.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY,
+    started     TEXT NOT NULL,
+    label       TEXT,
+    params      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    run_id          INTEGER NOT NULL REFERENCES runs(run_id),
+    instance        TEXT NOT NULL,
+    method          TEXT NOT NULL,
+    n               INTEGER NOT NULL,
+    m               INTEGER NOT NULL,
+    status          TEXT,
+    branch_vertices INTEGER,
+    runtime         REAL,
+    lower_bound     INTEGER,
+    gap             INTEGER,
+    fields          TEXT NOT NULL,
+    PRIMARY KEY (run_id, instance, method)
+);
+
+CREATE INDEX IF NOT EXISTS results_size ON results (n, m, method);
+CREATE INDEX IF NOT EXISTS results_instance ON results (instance, method);
+
+CREATE TABLE IF NOT EXISTS summary (
+    run_id          INTEGER NOT NULL,
+    method          TEXT NOT NULL,
+    n               INTEGER NOT NULL,
+    m               INTEGER NOT NULL,
+    instances       INTEGER NOT NULL DEFAULT 0,
+    solved          INTEGER NOT NULL DEFAULT 0,
+    sum_branch      REAL NOT NULL DEFAULT 0,
+    timed           INTEGER NOT NULL DEFAULT 0,
+    sum_time        REAL NOT NULL DEFAULT 0,
+    gaps            INTEGER NOT NULL DEFAULT 0,
+    sum_gap         REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, method, n, m)
+);
+
+CREATE TABLE IF NOT EXISTS pairs (
+    run_id          INTEGER NOT NULL,
+    n               INTEGER NOT NULL,
+    m               INTEGER NOT NULL,
+    instances       INTEGER NOT NULL DEFAULT 0,
+    sum_exact       REAL NOT NULL DEFAULT 0,
+    sum_heuristic   REAL NOT NULL DEFAULT 0,
+    sum_exact_time  REAL NOT NULL DEFAULT 0,
+    sum_heuristic_time REAL NOT NULL DEFAULT 0,
+    gaps            INTEGER NOT NULL DEFAULT 0,
+    sum_gap_pct     REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, n, m)
+);
+"""
+
+RESULT_COLUMNS = (
+    "run_id", "instance", "method", "n", "m", "status", "branch_vertices",
+    "runtime", "lower_bound", "gap", "fields",
+)
+
+
+def method_fields(row, method):
+    """
+    The `method_*` fields of a CSV row (prefix stripped), plus the
+    columns shared by all methods.
+    """
+    prefix = method + "_"
+    fields = {k[len(prefix):]: v for k, v in row.items() if k.startswith(prefix)}
+    fields["lower_bound"] = row.get("lower_bound")
+    return fields
+
+
+def _number(value, kind=float):
+    # CSV imports give strings, "" for missing values
+    if value is None or value == "":
+        return None
+    return kind(float(value))
+
+
+class ResultsStore:
+
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    # --------------------------------------------------
+    # Writes
+    # --------------------------------------------------
+    def start_run(self, params, label=None):
+        """
+        Register a batch run with its parameters, return its id.
+        """
+        with self._transaction():
+            cur = self.conn.execute(
+                "INSERT INTO runs (started, label, params) VALUES (?, ?, ?)",
+                (time.strftime("%Y-%m-%d %H:%M:%S"), label,
+                 json.dumps(params, sort_keys=True, default=str))
+            )
+        return cur.lastrowid
+
+    def add(self, run_id, instance, method, n, m, fields):
+        """
+        Insert (or replace) the result of `method` on `instance`.
+        `fields` as in the CSV row without the method prefix:
+        branch_vertices, time, status, gap, lower_bound, ...
+        """
+        record = {
+            "run_id": run_id,
+            "instance": instance,
+            "method": method,
+            "n": _number(n, int),
+            "m": _number(m, int),
+            "status": fields.get("status") or None,
+            "branch_vertices": _number(fields.get("branch_vertices"), int),
+            "runtime": _number(fields.get("time")),
+            "lower_bound": _number(fields.get("lower_bound"), int),
+            "gap": _number(fields.get("gap"), int),
+            "fields": json.dumps(fields, default=str),
+        }
+
+        with self._transaction():
+            old = self._get(run_id, instance, method)
+            if old is not None:
+                self._aggregate(old, -1)
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO results ({', '.join(RESULT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})",
+                [record[c] for c in RESULT_COLUMNS]
+            )
+            self._aggregate(record, +1)
+
+    def add_row(self, run_id, row, methods):
+        """
+        Store a main.py CSV row, one result per method present in it.
+        """
+        if row.get("m") in (None, ""):
+            return   # every method failed before loading
+        for method in methods:
+            fields = method_fields(row, method)
+            if any(v not in (None, "") for k, v in fields.items() if k != "lower_bound"):
+                self.add(run_id, row["instance"], method, row["n"], row["m"], fields)
+
+    def _get(self, run_id, instance, method):
+        return self.conn.execute(
+            "SELECT * FROM results WHERE run_id = ? AND instance = ? AND method = ?",
+            (run_id, instance, method)
+        ).fetchone()
+
+    def _aggregate(self, r, sign):
+        """
+        Add (sign=+1) or remove (-1) the contribution of result r.
+        """
+        bv = r["branch_vertices"]
+        runtime = r["runtime"]
+        gap = r["gap"]
+        self.conn.execute(
+            """
+            INSERT INTO summary (run_id, method, n, m) VALUES (?, ?, ?, ?)
+            ON CONFLICT DO NOTHING
+            """,
+            (r["run_id"], r["method"], r["n"], r["m"])
+        )
+        self.conn.execute(
+            """
+            UPDATE summary SET
+                instances = instances + ?,
+                solved = solved + ?, sum_branch = sum_branch + ?,
+                timed = timed + ?, sum_time = sum_time + ?,
+                gaps = gaps + ?, sum_gap = sum_gap + ?
+            WHERE run_id = ? AND method = ? AND n = ? AND m = ?
+            """,
+            (sign,
+             sign * (bv is not None), sign * (bv or 0),
+             sign * (runtime is not None), sign * (runtime or 0.0),
+             sign * (gap is not None), sign * (gap or 0),
+             r["run_id"], r["method"], r["n"], r["m"])
+        )
+
+        # Heuristic-vs-exact pair, once both results are in
+        other = {"exact": "heuristic", "heuristic": "exact"}.get(r["method"])
+        if other is None or bv is None:
+            return
+        o = self._get(r["run_id"], r["instance"], other)
+        if o is None or o["branch_vertices"] is None:
+            return
+
+        exact, heuristic = (r, o) if r["method"] == "exact" else (o, r)
+        e = exact["branch_vertices"]
+        h = heuristic["branch_vertices"]
+        self.conn.execute(
+            """
+            INSERT INTO pairs (run_id, n, m) VALUES (?, ?, ?)
+            ON CONFLICT DO NOTHING
+            """,
+            (r["run_id"], r["n"], r["m"])
+        )
+        self.conn.execute(
+            """
+            UPDATE pairs SET
+                instances = instances + ?,
+                sum_exact = sum_exact + ?, sum_heuristic = sum_heuristic + ?,
+                sum_exact_time = sum_exact_time + ?,
+                sum_heuristic_time = sum_heuristic_time + ?,
+                gaps = gaps + ?, sum_gap_pct = sum_gap_pct + ?
+            WHERE run_id = ? AND n = ? AND m = ?
+            """,
+            (sign, sign * e, sign * h,
+             sign * (exact["runtime"] or 0.0), sign * (heuristic["runtime"] or 0.0),
+             sign * (e > 0), sign * ((h - e) / e * 100 if e > 0 else 0.0),
+             r["run_id"], r["n"], r["m"])
+        )
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    def runs(self):
+        return [dict(r) for r in self.conn.execute("SELECT * FROM runs ORDER BY run_id")]
+
+    def latest_run(self):
+        row = self.conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+        return row[0]
+
+    def method_summary(self, run_id, method):
+        """
+        Per-(n, m) averages of one method in one run.
+        """
+        return [dict(r) for r in self.conn.execute(
+            """
+            SELECT n, m, instances, solved,
+                   sum_branch / NULLIF(solved, 0) AS branch_avg,
+                   sum_time / NULLIF(timed, 0) AS time_avg,
+                   sum_gap / NULLIF(gaps, 0) AS gap_avg
+            FROM summary WHERE run_id = ? AND method = ?
+            ORDER BY n, m
+            """,
+            (run_id, method)
+        )]
+
+    def pair_summary(self, run_id):
+        """
+        Per-(n, m) heuristic vs exact averages over the instances with
+        both results (gap in % of the exact value, exact > 0).
+        """
+        return [dict(r) for r in self.conn.execute(
+            """
+            SELECT n, m, instances,
+                   sum_exact / instances AS exact_avg,
+                   sum_heuristic / instances AS heuristic_avg,
+                   sum_gap_pct / NULLIF(gaps, 0) AS gap_avg,
+                   sum_exact_time / instances AS exact_time_avg,
+                   sum_heuristic_time / instances AS heuristic_time_avg
+            FROM pairs WHERE run_id = ? AND instances > 0
+            ORDER BY n, m
+            """,
+            (run_id,)
+        )]
+
+    def results(self, instance=None, method=None):
+        """
+        Stored results, optionally of one instance and/or method, with
+        their full fields decoded.
+        """
+        query = "SELECT * FROM results"
+        conditions = []
+        args = []
+        if instance is not None:
+            conditions.append("instance = ?")
+            args.append(instance)
+        if method is not None:
+            conditions.append("method = ?")
+            args.append(method)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        rows = []
+        for r in self.conn.execute(query + " ORDER BY run_id, instance, method", args):
+            row = dict(r)
+            row["fields"] = json.loads(row["fields"])
+            rows.append(row)
+        return rows
+
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error): the write lock is
+    taken up front, so concurrent writers wait instead of failing on
+    upgrade.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def import_csv(store, csv_path, methods=("heuristic", "exact"), label=None):
+    """
+    Load a results.csv written by main.py as a new run. Returns its id.
+    """
+    run_id = store.start_run({"imported_from": csv_path}, label=label or csv_path)
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            store.add_row(run_id, row, methods)
+    return run_id
+
+
+# ============================================================
+# Command line
+# ============================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        print("Usage: python results_store.py import <results.csv> <store.sqlite>")
+        sys.exit(1)
+
+    store = ResultsStore(sys.argv[3])
+    run_id = import_csv(store, sys.argv[2])
+    print(f"[DONE] {sys.argv[2]} imported as run {run_id}")
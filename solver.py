@@ -1,40 +1,56 @@
-import cplex
 import time
 from helper import *
+from milp_backend import make_backend
 
-def solve_mbvst_lp(filename):
+
+def _edge_variables(names):
+    """
+    Map the x_('u',_'v') variable names of an LP file to
+    (variable index, (u, v)), parsed once per model.
+    """
+    edge_vars = []
+
+    for i, name in enumerate(names):
+        if name.startswith("x") and "(" in name:
+            inside = name[name.index("(")+1 : name.index(")")]
+            u, v = inside.replace("'", "").split(",")
+            u, v = u.strip(), v.strip()
+
+            # Normalize vertex names: Remove underscores if any
+            u = u.lstrip('_')
+            v = v.lstrip('_')
+
+            edge_vars.append((i, (u, v)))
+
+    return edge_vars
+
+
+def solve_mbvst_lp(filename, backend="cplex"):
     start_time = time.time()
 
-    cpx = cplex.Cplex(filename)
-    cpx.solve()
+    model = make_backend(backend, "MBVST_lp")
+    names = model.read_model(filename)
+    edge_vars = _edge_variables(names)
+    model.optimize()
 
     end_time = time.time()
     elapsed_time = end_time - start_time
 
-    print("Status:", cpx.solution.get_status_string())
-    print("Objective:", cpx.solution.get_objective_value())
+    print("Status:", model.status)
+    print("Objective:", model.objective)
 
-    names = cpx.variables.get_names()
-    values = cpx.solution.get_values()
+    values = model.values()
 
     selected_edges = []
     VG = set()
 
-    for name, val in zip(names, values):
-        if name.startswith("x") and abs(val - 1) < 1e-6:
-            inside = name[name.index("(")+1 : name.index(")")]
-            u, v = inside.replace("'", "").split(",")
-            u, v = u.strip(), v.strip()
-
-            # Normalize vertex names: Remove underscores if any
-            u = u.lstrip('_')
-            v = v.lstrip('_')
-
+    for i, (u, v) in edge_vars:
+        if abs(values[i] - 1) < 1e-6:
             selected_edges.append((u, v))
             VG.add(u)
             VG.add(v)
 
-    print("\nSelected edges from CPLEX:")
+    print("\nSelected edges from solver:")
     print(selected_edges)
 
     VG = sorted(list(VG))
@@ -47,9 +63,7 @@ def solve_mbvst_lp(filename):
         "selected_edges": selected_edges,
         "vertices": VG,
         "connected": connected,
-        "objective": cpx.solution.get_objective_value(),
-        "status": cpx.solution.get_status_string(),
+        "objective": model.objective,
+        "status": model.status,
         "execution_time": elapsed_time
     }
-
-
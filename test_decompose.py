@@ -0,0 +1,76 @@
+import random
+
+import instrument
+from instance_index import InstanceIndex
+from decompose import solve_by_blocks
+from test_reduction import is_spanning_tree, optimum
+
+
+# ============================================================
+# Checks of the block decomposition (decompose.py)
+# ============================================================
+#
+# On small random graphs of several blocks glued at shared cut
+# vertices (cycles with chords, plus pendant bridges), the stitched
+# tree is a spanning tree of the graph, its reported branch count is
+# the true one, and it is never below the optimum. Blocks are solved
+# in this process, and once through worker processes.
+#
+# Run with pytest, or `python test_decompose.py`.
+
+SEEDS = range(20)
+TIME_LIMIT = 10
+
+instrument.configure(console=False)
+
+
+def random_block_graph(seed, blocks=4):
+    """
+    Cycles of 4 to 8 vertices with 0 to 2 chords each, every new block
+    attached at a random vertex of the graph so far (cut vertices may
+    join several blocks), then a few pendant edges.
+    """
+    rng = random.Random(seed)
+    n = 1
+    EG = []
+    for _ in range(blocks):
+        size = rng.randint(4, 8)
+        ring = [rng.randrange(n)] + list(range(n, n + size - 1))
+        n += size - 1
+        EG += [(ring[k], ring[(k + 1) % size]) for k in range(size)]
+        for _ in range(rng.randint(0, 2)):
+            a, b = sorted(rng.sample(range(size), 2))
+            if 1 < b - a < size - 1:
+                EG.append((ring[a], ring[b]))
+    for _ in range(rng.randint(1, 4)):
+        EG.append((rng.randrange(n), n))
+        n += 1
+    return list(range(n)), list(dict.fromkeys(EG))
+
+
+def check_blocks(seed, **options):
+    VG, EG = random_block_graph(seed)
+    index = InstanceIndex(VG, EG)
+    tree, branch_vertices = solve_by_blocks(
+        VG, EG, index=index, time_limit=TIME_LIMIT, local_search_time=0.1,
+        **options
+    )
+    assert is_spanning_tree(VG, EG, tree), seed
+    assert branch_vertices == index.branch_count(tree), seed
+    assert branch_vertices >= optimum(index), seed
+
+
+def test_blocks_stitch_spanning_tree():
+    for seed in SEEDS:
+        check_blocks(seed)
+        check_blocks(seed, reduce=True)
+
+
+def test_blocks_workers():
+    check_blocks(0, workers=2)
+
+
+if __name__ == "__main__":
+    test_blocks_stitch_spanning_tree()
+    test_blocks_workers()
+    print(f"decomposition checks passed on {len(SEEDS)} graphs")
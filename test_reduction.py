@@ -0,0 +1,111 @@
+import random
+
+import networkx as nx
+
+import instrument
+from instance_index import InstanceIndex
+from reduction import reduce_instance
+from plne_cp2 import solve_mbvst_flow
+
+
+# ============================================================
+# Checks of the safe reductions (reduction.py)
+# ============================================================
+#
+# On small random sparse graphs (random tree plus a few chords, so
+# pendant trees, degree-2 chains and bridges all occur):
+#   - lift(restrict(T)) is a spanning tree with at most the branch
+#     vertices of T, for random spanning trees T
+#   - kernel optimum + fixed_branches == optimum of the original graph
+#
+# Run with pytest, or `python test_reduction.py`.
+
+SEEDS = range(40)
+N = 18
+TIME_LIMIT = 60
+
+instrument.configure(console=False)
+
+
+def random_sparse_graph(seed, n=N):
+    """
+    Connected graph on 0..n-1: random recursive tree plus up to n / 2
+    chords.
+    """
+    rng = random.Random(seed)
+    EG = [(rng.randrange(v), v) for v in range(1, n)]
+    edges = {frozenset(e) for e in EG}
+    for _ in range(rng.randint(1, n // 2)):
+        e = frozenset(rng.sample(range(n), 2))
+        if e not in edges:
+            edges.add(e)
+            EG.append(tuple(sorted(e)))
+    return list(range(n)), EG
+
+
+def random_spanning_tree(VG, EG, seed):
+    rng = random.Random(seed)
+    G = nx.Graph()
+    G.add_nodes_from(VG)
+    G.add_weighted_edges_from((u, v, rng.random()) for (u, v) in EG)
+    return list(nx.minimum_spanning_tree(G).edges())
+
+
+def is_spanning_tree(VG, EG, tree_edges):
+    edges = {frozenset(e) for e in EG}
+    if any(frozenset(e) not in edges for e in tree_edges):
+        return False
+    T = nx.Graph()
+    T.add_nodes_from(VG)
+    T.add_edges_from(tree_edges)
+    return T.number_of_nodes() == len(VG) and nx.is_tree(T)
+
+
+def optimum(index):
+    """
+    Optimal branch count of an index (degree offsets included).
+    """
+    if index.m == 0:
+        return index.branch_count([])
+    T, status, _ = solve_mbvst_flow(None, index=index, time_limit=TIME_LIMIT)
+    assert status == "Optimal"
+    return index.branch_count(list(T.edges()))
+
+
+def test_lift_restrict_spanning_tree():
+    for seed in SEEDS:
+        VG, EG = random_sparse_graph(seed)
+        index = InstanceIndex(VG, EG)
+        kernel = reduce_instance(VG, EG, index=index)
+
+        for k in range(5):
+            tree = random_spanning_tree(VG, EG, 1000 * seed + k)
+            restricted = kernel.restrict(tree)
+            assert is_spanning_tree(kernel.VG, kernel.EG, restricted), seed
+
+            lifted = kernel.lift(restricted)
+            assert is_spanning_tree(VG, EG, lifted), seed
+            assert index.branch_count(lifted) <= index.branch_count(tree), seed
+            assert (index.branch_count(lifted)
+                    == kernel.index.branch_count(restricted) + kernel.fixed_branches), seed
+
+
+def test_kernel_keeps_optimum():
+    for seed in SEEDS:
+        VG, EG = random_sparse_graph(seed)
+        index = InstanceIndex(VG, EG)
+        kernel = reduce_instance(VG, EG, index=index)
+
+        assert optimum(kernel.index) + kernel.fixed_branches == optimum(index), seed
+
+        T, status, _ = solve_mbvst_flow(None, index=index, reduce=True,
+                                        time_limit=TIME_LIMIT)
+        tree = list(T.edges())
+        assert status == "Optimal" and is_spanning_tree(VG, EG, tree), seed
+        assert index.branch_count(tree) == optimum(index), seed
+
+
+if __name__ == "__main__":
+    test_lift_restrict_spanning_tree()
+    test_kernel_keeps_optimum()
+    print(f"reduction checks passed on {len(SEEDS)} graphs")
@@ -0,0 +1,36 @@
+class UnionFind:
+    """
+    Disjoint-set forest over the integers 0..n-1
+    (path halving + union by size).
+    """
+
+    __slots__ = ("parent", "size", "components")
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.components = n
+
+    def find(self, a):
+        parent = self.parent
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def union(self, a, b):
+        """
+        Merge the sets of a and b.
+        Returns False if they were already in the same set.
+        """
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra == rb:
+            return False
+
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        self.components -= 1
+        return True
@@ -0,0 +1,145 @@
+import os
+import atexit
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+
+
+# ============================================================
+# Visualization settings
+# ============================================================
+#
+# Modes:
+#   "off"  : nothing is drawn (default, never on the solve path)
+#   "file" : figures are rendered to OUTPUT_DIR by a background thread
+#   "show" : interactive, blocking plt.show() (debugging only)
+
+MODE = os.environ.get("MBVST_VIZ", "off")
+OUTPUT_DIR = "figures"
+FORMAT = "png"              # or "svg"
+LAYOUT_CACHE_SIZE = 4       # instances whose layout is kept (LRU)
+
+_executor = None
+_pending = []
+_layouts = OrderedDict()
+_layout_lock = threading.Lock()
+_counter = 0
+
+
+def configure(mode=None, output_dir=None, fmt=None):
+    global MODE, OUTPUT_DIR, FORMAT
+
+    if mode is not None:
+        if mode not in ("off", "file", "show"):
+            raise ValueError(f"Unknown visualization mode: {mode}")
+        MODE = mode
+    if output_dir is not None:
+        OUTPUT_DIR = output_dir
+    if fmt is not None:
+        FORMAT = fmt
+
+
+def enabled():
+    return MODE != "off"
+
+
+# ============================================================
+# Per-instance layout cache
+# ============================================================
+
+def get_layout(VG, EG=()):
+    """
+    spring_layout of the instance graph (VG, EG), computed once per
+    instance and reused by every drawing of it (trees, cycles, ...).
+    The last LAYOUT_CACHE_SIZE instances are kept.
+    """
+    key = (hash(tuple(VG)), hash(tuple(EG)))
+
+    with _layout_lock:
+        pos = _layouts.get(key)
+        if pos is None:
+            G = nx.Graph()
+            G.add_nodes_from(VG)
+            G.add_edges_from(EG)
+            pos = nx.spring_layout(G, seed=42)
+            _layouts[key] = pos
+            while len(_layouts) > LAYOUT_CACHE_SIZE:
+                _layouts.popitem(last=False)
+        else:
+            _layouts.move_to_end(key)
+
+    return pos
+
+
+def clear_layouts():
+    with _layout_lock:
+        _layouts.clear()
+
+
+# ============================================================
+# Rendering
+# ============================================================
+
+def _save(draw, figsize, path):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    draw(ax)
+    fig.savefig(path)
+
+
+def render(draw, name="figure", figsize=(8, 6)):
+    """
+    Render draw(ax) according to MODE.
+    In "file" mode this returns immediately, the figure is written
+    by a background thread (matplotlib's object API, no pyplot).
+    """
+    global _executor, _counter
+
+    if MODE == "off":
+        return
+
+    if MODE == "show":
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=figsize)
+        draw(ax)
+        plt.show()
+        return
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    _counter += 1
+    path = os.path.join(OUTPUT_DIR, f"{_counter:04d}_{name}.{FORMAT}")
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="viz")
+        atexit.register(wait)
+
+    _collect(block=False)
+    _pending.append(_executor.submit(_save, draw, figsize, path))
+
+
+def _collect(block):
+    """
+    Drop finished renders (all of them if block), reporting failures.
+    """
+    still_pending = []
+    for future in _pending:
+        if not block and not future.done():
+            still_pending.append(future)
+            continue
+        try:
+            future.result()
+        except Exception as e:
+            print(f"[VISUAL] Rendering failed: {e}")
+    _pending[:] = still_pending
+
+
+def wait():
+    """
+    Block until every queued figure is written.
+    """
+    _collect(block=True)